@@ -0,0 +1,40 @@
+"""Add content block size and listing index
+
+Revision ID: a5e3c8f1b7d4
+Revises: f2c9d7e5a8b1
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e3c8f1b7d4'
+down_revision: Union[str, Sequence[str], None] = 'f2c9d7e5a8b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('content_blocks', sa.Column('content_size', sa.Integer(), nullable=True))
+    # New writes get the size from the ORM; backfill existing rows from the stored JSON text
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("UPDATE content_blocks SET content_size = octet_length(content_data::text)")
+    else:
+        op.execute("UPDATE content_blocks SET content_size = length(CAST(content_data AS BLOB))")
+
+    # Keyset pagination walks (created_at, id) newest first; filters narrow by chapter
+    op.create_index('ix_content_blocks_created_at_id', 'content_blocks', ['created_at', 'id'])
+    op.create_index('ix_content_blocks_chapter_id', 'content_blocks', ['chapter_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_content_blocks_chapter_id', table_name='content_blocks')
+    op.drop_index('ix_content_blocks_created_at_id', table_name='content_blocks')
+    with op.batch_alter_table('content_blocks') as batch_op:
+        batch_op.drop_column('content_size')
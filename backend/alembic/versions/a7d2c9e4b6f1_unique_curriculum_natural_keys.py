@@ -0,0 +1,93 @@
+"""Make curriculum natural keys unique
+
+Revision ID: a7d2c9e4b6f1
+Revises: f2b8d6a4c1e9
+Create Date: 2026-10-20 09:30:00.000000
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2c9e4b6f1'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d6a4c1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _rename_duplicates(table: str, parent: str, name: str) -> int:
+    """Give every row after the first of a (parent, name) group a " (2)", " (3)", ... suffix."""
+    bind = op.get_bind()
+    groups = bind.execute(sa.text(
+        f"SELECT {parent}, {name} FROM {table} GROUP BY {parent}, {name} HAVING count(*) > 1"
+    )).all()
+    renamed = 0
+    for parent_value, name_value in groups:
+        ids = bind.execute(sa.text(
+            f"SELECT id FROM {table} WHERE {parent} = :parent AND {name} = :name ORDER BY id"
+        ), {"parent": parent_value, "name": name_value}).scalars().all()
+        taken = set(bind.execute(sa.text(
+            f"SELECT {name} FROM {table} WHERE {parent} = :parent"
+        ), {"parent": parent_value}).scalars())
+        suffix = 2
+        for row_id in ids[1:]:
+            while f"{name_value} ({suffix})" in taken:
+                suffix += 1
+            new_name = f"{name_value} ({suffix})"
+            taken.add(new_name)
+            bind.execute(sa.text(f"UPDATE {table} SET {name} = :name WHERE id = :id"), {"name": new_name, "id": row_id})
+            renamed += 1
+    return renamed
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing duplicates are kept under new names; an admin can merge or delete them
+    renamed = _rename_duplicates('subjects', 'grade_level', 'name')
+    renamed += _rename_duplicates('chapters', 'subject_id', 'title')
+    if renamed:
+        logger.warning("Renamed %d duplicate subjects / chapters with a numbered suffix", renamed)
+
+    # The app reads one block of each type per chapter; keep the newest, as imports did when updating
+    bind = op.get_bind()
+    groups = bind.execute(sa.text(
+        "SELECT chapter_id, block_type FROM content_blocks GROUP BY chapter_id, block_type HAVING count(*) > 1"
+    )).all()
+    deleted = 0
+    for chapter_id, block_type in groups:
+        ids = bind.execute(sa.text(
+            "SELECT id FROM content_blocks WHERE chapter_id = :chapter_id AND block_type = :block_type "
+            "ORDER BY created_at DESC, id DESC"
+        ), {"chapter_id": chapter_id, "block_type": block_type}).scalars().all()
+        bind.execute(
+            sa.text("DELETE FROM content_blocks WHERE id IN :ids").bindparams(sa.bindparam('ids', expanding=True)),
+            {"ids": ids[1:]}
+        )
+        deleted += len(ids) - 1
+    if deleted:
+        logger.warning("Deleted %d duplicate content blocks, keeping the newest of each type per chapter", deleted)
+
+    # Curriculum imports upsert on these keys
+    op.drop_index('ix_subjects_grade_level_name', table_name='subjects')
+    op.create_index('ix_subjects_grade_level_name', 'subjects', ['grade_level', 'name'], unique=True)
+    op.drop_index('ix_chapters_subject_id_title', table_name='chapters')
+    op.create_index('ix_chapters_subject_id_title', 'chapters', ['subject_id', 'title'], unique=True)
+    op.drop_index('ix_content_blocks_chapter_id_block_type', table_name='content_blocks')
+    op.create_index('ix_content_blocks_chapter_id_block_type', 'content_blocks', ['chapter_id', 'block_type'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Renamed and deleted duplicates are not restored
+    op.drop_index('ix_content_blocks_chapter_id_block_type', table_name='content_blocks')
+    op.create_index('ix_content_blocks_chapter_id_block_type', 'content_blocks', ['chapter_id', 'block_type'])
+    op.drop_index('ix_chapters_subject_id_title', table_name='chapters')
+    op.create_index('ix_chapters_subject_id_title', 'chapters', ['subject_id', 'title'])
+    op.drop_index('ix_subjects_grade_level_name', table_name='subjects')
+    op.create_index('ix_subjects_grade_level_name', 'subjects', ['grade_level', 'name'])
@@ -0,0 +1,46 @@
+"""Add content-addressed image blobs
+
+Revision ID: b3d1c6e2f4a7
+Revises: 94163cd385be
+Create Date: 2026-10-19 09:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d1c6e2f4a7'
+down_revision: Union[str, Sequence[str], None] = '94163cd385be'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('image_blobs',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash'),
+        sa.UniqueConstraint('filename')
+    )
+    
+    # Existing rows keep content_hash NULL until dedupe_images.py has run
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_images_content_hash', 'image_blobs', ['content_hash'], ['content_hash'])
+    op.create_index('ix_images_content_hash', 'images', ['content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_images_content_hash', table_name='images')
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_constraint('fk_images_content_hash', type_='foreignkey')
+        batch_op.drop_column('content_hash')
+    op.drop_table('image_blobs')
@@ -0,0 +1,125 @@
+"""Compress content block documents
+
+Revision ID: b8d4f2a6c9e3
+Revises: a5e3c8f1b7d4
+Create Date: 2026-10-19 19:40:00.000000
+
+"""
+import functools
+import json
+import zlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f2a6c9e3'
+down_revision: Union[str, Sequence[str], None] = 'a5e3c8f1b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows rewritten per statement, so the whole table is never held in memory at once
+BATCH_SIZE = 500
+
+# Frozen copy of the storage format of app/core/compression.py as of this
+# revision, so later changes to the app can't change what this migration
+# writes. Upgrades always write zlib; rows carry their codec, so they read
+# back whatever CONTENT_COMPRESSION is set to.
+ZLIB_HEADER = b"\x00z"
+ZSTD_HEADER = b"\x00s"
+COMPRESSION_MIN_BYTES = 256
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_decompressor(dict_id: int):
+    import zstandard
+    if not dict_id:
+        return zstandard.ZstdDecompressor()
+    path = Path(settings.CONTENT_ZSTD_DICT_DIR) / f"{dict_id}.zdict"
+    return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(path.read_bytes()))
+
+
+def _encode(value) -> bytes:
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return raw
+    packed = ZLIB_HEADER + zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) else raw
+
+
+def _decompress_stored(stored: bytes) -> bytes:
+    if stored[:2] == ZLIB_HEADER:
+        return zlib.decompress(stored[2:])
+    if stored[:2] == ZSTD_HEADER:
+        import zstandard
+        frame = stored[2:]
+        return _zstd_decompressor(zstandard.get_frame_parameters(frame).dict_id).decompress(frame)
+    return stored
+
+
+def _rewrite_batches(convert) -> int:
+    """Run `convert` over every content_data value, keyset-paginated by id."""
+    bind = op.get_bind()
+    first_page = sa.text("SELECT id, content_data FROM content_blocks ORDER BY id LIMIT :limit")
+    next_page = sa.text("SELECT id, content_data FROM content_blocks WHERE id > :last ORDER BY id LIMIT :limit")
+    update = sa.text("UPDATE content_blocks SET content_data = :data WHERE id = :id")
+    last, rewritten = None, 0
+    while True:
+        if last is None:
+            rows = bind.execute(first_page, {"limit": BATCH_SIZE}).all()
+        else:
+            rows = bind.execute(next_page, {"last": last, "limit": BATCH_SIZE}).all()
+        if not rows:
+            return rewritten
+        changes = []
+        for row_id, data in rows:
+            converted = convert(data)
+            if converted is not None:
+                changes.append({"id": row_id, "data": converted})
+        if changes:
+            bind.execute(update, changes)
+            rewritten += len(changes)
+        last = rows[-1][0]
+
+
+def _compress(data):
+    if isinstance(data, str):
+        data = data.encode()
+    data = bytes(data)
+    if data[:2] in (ZLIB_HEADER, ZSTD_HEADER):
+        return None
+    return _encode(json.loads(data))
+
+
+def _decompress(data):
+    if isinstance(data, str):
+        return None
+    text = _decompress_stored(bytes(data)).decode()
+    # SQLite keeps the old JSON column's text representation; Postgres converts below
+    return text if op.get_bind().dialect.name != 'postgresql' else text.encode()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE content_blocks ALTER COLUMN content_data TYPE bytea "
+            "USING convert_to(content_data::text, 'UTF8')"
+        )
+    # SQLite stores whatever it is given, so the declared type can stay as it is
+    _rewrite_batches(_compress)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rewrite_batches(_decompress)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE content_blocks ALTER COLUMN content_data TYPE json "
+            "USING convert_from(content_data, 'UTF8')::json"
+        )
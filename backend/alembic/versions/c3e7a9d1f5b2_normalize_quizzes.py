@@ -0,0 +1,178 @@
+"""Normalize stored quizzes
+
+Revision ID: c3e7a9d1f5b2
+Revises: b8d4f2a6c9e3
+Create Date: 2026-10-19 20:30:00.000000
+
+"""
+import functools
+import json
+import logging
+import string
+import zlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a9d1f5b2'
+down_revision: Union[str, Sequence[str], None] = 'b8d4f2a6c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Frozen copies of app/core/compression.py and app/services/quiz_service.py
+# as of this revision: later changes to the app must not change what this
+# migration writes.
+
+ZLIB_HEADER = b"\x00z"
+ZSTD_HEADER = b"\x00s"
+COMPRESSION_MIN_BYTES = 256
+OPTION_LETTERS = string.ascii_uppercase
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_decompressor(dict_id: int):
+    import zstandard
+    if not dict_id:
+        return zstandard.ZstdDecompressor()
+    path = Path(settings.CONTENT_ZSTD_DICT_DIR) / f"{dict_id}.zdict"
+    return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(path.read_bytes()))
+
+
+def _decode(stored):
+    if isinstance(stored, str):
+        return json.loads(stored)
+    stored = bytes(stored)
+    if stored[:2] == ZLIB_HEADER:
+        stored = zlib.decompress(stored[2:])
+    elif stored[:2] == ZSTD_HEADER:
+        import zstandard
+        frame = stored[2:]
+        stored = _zstd_decompressor(zstandard.get_frame_parameters(frame).dict_id).decompress(frame)
+    return json.loads(stored)
+
+
+def _encode(value) -> bytes:
+    # Always zlib; rows carry their codec, so they read back whatever CONTENT_COMPRESSION says
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return raw
+    packed = ZLIB_HEADER + zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) else raw
+
+
+def _content_size(value) -> int:
+    return len(json.dumps(value).encode())
+
+
+def _normalize_options(options):
+    if isinstance(options, list):
+        values = list(options)
+        relabel = {}
+    elif isinstance(options, dict):
+        keys = [str(k).strip().upper() for k in options]
+        if sorted(keys) == list(OPTION_LETTERS[:len(keys)]):
+            by_letter = dict(zip(keys, options.values()))
+            return {letter: str(by_letter[letter]) for letter in sorted(by_letter)}, {}
+        values = list(options.values())
+        relabel = {str(k): OPTION_LETTERS[i] for i, k in enumerate(options) if i < len(OPTION_LETTERS)}
+    else:
+        raise ValueError("options must be a list or an object keyed by letter")
+    if len(values) > len(OPTION_LETTERS):
+        raise ValueError(f"a question can have at most {len(OPTION_LETTERS)} options")
+    return {OPTION_LETTERS[i]: str(value) for i, value in enumerate(values)}, relabel
+
+
+def _answer_letter(answer, options, relabel):
+    if answer is None:
+        return None
+    if isinstance(answer, int) and not isinstance(answer, bool):
+        return OPTION_LETTERS[answer] if 0 <= answer < len(options) else None
+    answer = str(answer)
+    if answer in relabel:
+        return relabel[answer]
+    letter = answer.strip().upper()
+    if letter in options:
+        return letter
+    if len(letter) > 1 and letter[0] in options and letter[1] in ").:":
+        return letter[0]
+    for letter, text in options.items():
+        if text.strip() == answer.strip():
+            return letter
+    return None
+
+
+def _normalize_quiz(data) -> dict:
+    """Canonical quiz with its answer key; ValueError if it's malformed."""
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list) or not data["questions"]:
+        raise ValueError("a quiz must be an object with a list of questions")
+    questions = []
+    for index, raw in enumerate(data["questions"], 1):
+        if not isinstance(raw, dict):
+            raise ValueError(f"question {index} must be an object")
+        options, relabel = _normalize_options(raw.get("options"))
+        answer = raw.get("correct_answer", raw.get("answer"))
+        question = {
+            "question": str(raw.get("question") or "").strip(),
+            "options": options,
+            "correct_answer": _answer_letter(answer, options, relabel) or str(answer),
+        }
+        if not question["question"]:
+            raise ValueError(f"question {index} has no text")
+        if len(options) < 2:
+            raise ValueError(f"question {index} needs at least two options")
+        if question["correct_answer"] not in options:
+            raise ValueError(f"question {index}: correct_answer {question['correct_answer']!r} is not one of the options")
+        if raw.get("explanation"):
+            question["explanation"] = str(raw["explanation"])
+        questions.append(question)
+    return {"questions": questions, "answer_key": "".join(q["correct_answer"] for q in questions)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rewrite every quiz in the canonical format with its answer key, keyset-paginated by id
+    bind = op.get_bind()
+    first_page = sa.text(
+        "SELECT id, content_data FROM content_blocks WHERE block_type = 'quiz' ORDER BY id LIMIT :limit"
+    )
+    next_page = sa.text(
+        "SELECT id, content_data FROM content_blocks WHERE block_type = 'quiz' AND id > :last "
+        "ORDER BY id LIMIT :limit"
+    )
+    update = sa.text("UPDATE content_blocks SET content_data = :data, content_size = :size WHERE id = :id")
+    last = None
+    while True:
+        if last is None:
+            rows = bind.execute(first_page, {"limit": BATCH_SIZE}).all()
+        else:
+            rows = bind.execute(next_page, {"last": last, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        changes = []
+        for row_id, data in rows:
+            try:
+                quiz = _normalize_quiz(_decode(data))
+            except ValueError as e:
+                # Left as is; scoring it fails with a clear error until an admin fixes it
+                logger.warning("Quiz %s could not be normalized: %s", row_id, e)
+                continue
+            changes.append({"id": row_id, "data": _encode(quiz), "size": _content_size(quiz)})
+        if changes:
+            bind.execute(update, changes)
+        last = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The canonical format keeps correct_answer, which is all older code reads
+    pass
@@ -0,0 +1,85 @@
+"""Add image listing and filename search indexes
+
+Revision ID: c7a2e4f1d9b3
+Revises: b3d1c6e2f4a7
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a2e4f1d9b3'
+down_revision: Union[str, Sequence[str], None] = 'b3d1c6e2f4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination walks (created_at, id) newest first
+    op.create_index('ix_images_created_at_id', 'images', ['created_at', 'id'])
+    op.drop_index('ix_images_created_at', table_name='images')
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Trigram indexes let ILIKE '%term%' use an index scan
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_images_original_filename_trgm', 'images', ['original_filename'],
+            postgresql_using='gin', postgresql_ops={'original_filename': 'gin_trgm_ops'}
+        )
+        op.create_index(
+            'ix_images_filename_trgm', 'images', ['filename'],
+            postgresql_using='gin', postgresql_ops={'filename': 'gin_trgm_ops'}
+        )
+    elif dialect == 'sqlite':
+        # The trigram tokenizer needs SQLite 3.34; older builds keep searching with LIKE
+        version = op.get_bind().execute(sa.text('SELECT sqlite_version()')).scalar()
+        if tuple(int(part) for part in version.split('.')) < (3, 34):
+            return
+
+        # External-content FTS5 table over images, kept in sync by triggers. It is
+        # keyed by rowid, which VACUUM may renumber: run
+        # INSERT INTO images_fts(images_fts) VALUES ('rebuild') after a VACUUM.
+        op.execute(
+            "CREATE VIRTUAL TABLE images_fts USING fts5("
+            "original_filename, filename, content='images', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER images_fts_ai AFTER INSERT ON images BEGIN "
+            "INSERT INTO images_fts(rowid, original_filename, filename) "
+            "VALUES (new.rowid, new.original_filename, new.filename); END"
+        )
+        op.execute(
+            "CREATE TRIGGER images_fts_ad AFTER DELETE ON images BEGIN "
+            "INSERT INTO images_fts(images_fts, rowid, original_filename, filename) "
+            "VALUES ('delete', old.rowid, old.original_filename, old.filename); END"
+        )
+        op.execute(
+            "CREATE TRIGGER images_fts_au AFTER UPDATE OF original_filename, filename ON images BEGIN "
+            "INSERT INTO images_fts(images_fts, rowid, original_filename, filename) "
+            "VALUES ('delete', old.rowid, old.original_filename, old.filename); "
+            "INSERT INTO images_fts(rowid, original_filename, filename) "
+            "VALUES (new.rowid, new.original_filename, new.filename); END"
+        )
+        op.execute("INSERT INTO images_fts(images_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_images_filename_trgm', table_name='images')
+        op.drop_index('ix_images_original_filename_trgm', table_name='images')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS images_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS images_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS images_fts_ai')
+        op.execute('DROP TABLE IF EXISTS images_fts')
+
+    op.create_index('ix_images_created_at', 'images', ['created_at'])
+    op.drop_index('ix_images_created_at_id', table_name='images')
@@ -0,0 +1,92 @@
+"""Add content block version and hash
+
+Revision ID: d9f1b3e5a7c4
+Revises: c3e7a9d1f5b2
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+import functools
+import hashlib
+import json
+import zlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f1b3e5a7c4'
+down_revision: Union[str, Sequence[str], None] = 'c3e7a9d1f5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Frozen copies of the decoder in app/core/compression.py and content_hash
+# in app/models/curriculum.py as of this revision, so later changes to the
+# app can't change what this migration writes.
+
+ZLIB_HEADER = b"\x00z"
+ZSTD_HEADER = b"\x00s"
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_decompressor(dict_id: int):
+    import zstandard
+    if not dict_id:
+        return zstandard.ZstdDecompressor()
+    path = Path(settings.CONTENT_ZSTD_DICT_DIR) / f"{dict_id}.zdict"
+    return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(path.read_bytes()))
+
+
+def _decode(stored):
+    if isinstance(stored, str):
+        return json.loads(stored)
+    stored = bytes(stored)
+    if stored[:2] == ZLIB_HEADER:
+        stored = zlib.decompress(stored[2:])
+    elif stored[:2] == ZSTD_HEADER:
+        import zstandard
+        frame = stored[2:]
+        stored = _zstd_decompressor(zstandard.get_frame_parameters(frame).dict_id).decompress(frame)
+    return json.loads(stored)
+
+
+def _content_hash(content_data) -> str:
+    return hashlib.sha256(json.dumps(content_data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('content_blocks', sa.Column('content_version', sa.Integer(), nullable=False, server_default='1'))
+    op.add_column('content_blocks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # Hashes are computed from the decoded document, so backfill in batches keyed by id
+    bind = op.get_bind()
+    first_page = sa.text("SELECT id, content_data FROM content_blocks ORDER BY id LIMIT :limit")
+    next_page = sa.text("SELECT id, content_data FROM content_blocks WHERE id > :last ORDER BY id LIMIT :limit")
+    update = sa.text("UPDATE content_blocks SET content_hash = :hash WHERE id = :id")
+    last = None
+    while True:
+        if last is None:
+            rows = bind.execute(first_page, {"limit": BATCH_SIZE}).all()
+        else:
+            rows = bind.execute(next_page, {"last": last, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {"id": row_id, "hash": _content_hash(_decode(data))}
+            for row_id, data in rows
+        ])
+        last = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('content_blocks') as batch_op:
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('content_version')
@@ -0,0 +1,36 @@
+"""Add curriculum natural key indexes
+
+Revision ID: e1a7c5b9d3f8
+Revises: d9f1b3e5a7c4
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c5b9d3f8'
+down_revision: Union[str, Sequence[str], None] = 'd9f1b3e5a7c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Curriculum imports look rows up by natural key, and exports walk subject -> chapters -> blocks
+    op.create_index('ix_subjects_grade_level_name', 'subjects', ['grade_level', 'name'])
+    op.create_index('ix_chapters_subject_id_title', 'chapters', ['subject_id', 'title'])
+    # Also serves every lookup by chapter_id alone, so it replaces the single-column index
+    op.create_index('ix_content_blocks_chapter_id_block_type', 'content_blocks', ['chapter_id', 'block_type'])
+    op.drop_index('ix_content_blocks_chapter_id', table_name='content_blocks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_content_blocks_chapter_id', 'content_blocks', ['chapter_id'])
+    op.drop_index('ix_content_blocks_chapter_id_block_type', table_name='content_blocks')
+    op.drop_index('ix_chapters_subject_id_title', table_name='chapters')
+    op.drop_index('ix_subjects_grade_level_name', table_name='subjects')
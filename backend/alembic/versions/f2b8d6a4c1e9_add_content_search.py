@@ -0,0 +1,173 @@
+"""Add content search
+
+Revision ID: f2b8d6a4c1e9
+Revises: e1a7c5b9d3f8
+Create Date: 2026-10-19 23:20:00.000000
+
+"""
+import functools
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6a4c1e9'
+down_revision: Union[str, Sequence[str], None] = 'e1a7c5b9d3f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+DOCUMENT_COLUMNS = "title, description, body, subject_name, grade_level"
+
+# Frozen copies of the decoder in app/core/compression.py and lesson_text in
+# app/services/search_service.py as of this revision, so later changes to
+# the app can't change what this migration indexes.
+
+ZLIB_HEADER = b"\x00z"
+ZSTD_HEADER = b"\x00s"
+_MARKDOWN_SYNTAX = re.compile(r"!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)|[#*_`>|~]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=None)
+def _zstd_decompressor(dict_id: int):
+    import zstandard
+    if not dict_id:
+        return zstandard.ZstdDecompressor()
+    path = Path(settings.CONTENT_ZSTD_DICT_DIR) / f"{dict_id}.zdict"
+    return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(path.read_bytes()))
+
+
+def _decode(stored):
+    if isinstance(stored, str):
+        return json.loads(stored)
+    stored = bytes(stored)
+    if stored[:2] == ZLIB_HEADER:
+        stored = zlib.decompress(stored[2:])
+    elif stored[:2] == ZSTD_HEADER:
+        import zstandard
+        frame = stored[2:]
+        stored = _zstd_decompressor(zstandard.get_frame_parameters(frame).dict_id).decompress(frame)
+    return json.loads(stored)
+
+
+def _lesson_text(content_data) -> str:
+    if not isinstance(content_data, dict):
+        return ""
+    markdown = content_data.get("markdown") or content_data.get("lesson_text") or ""
+    if not isinstance(markdown, str):
+        return ""
+    return _WHITESPACE.sub(" ", _MARKDOWN_SYNTAX.sub(lambda m: m.group(1) or " ", markdown)).strip()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.create_table(
+        'search_documents',
+        sa.Column('chapter_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('chapters.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('subject_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('subject_name', sa.String(), nullable=False),
+        sa.Column('grade_level', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_search_documents_grade_level', 'search_documents', ['grade_level'])
+
+    if dialect == 'postgresql':
+        # Weighted so title matches rank above subject / description matches, and those above the lesson text
+        op.execute(
+            "ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', coalesce(subject_name, '') || ' ' || coalesce(description, '')), 'B') || "
+            "setweight(to_tsvector('english', body), 'C')) STORED"
+        )
+        op.create_index('ix_search_documents_search_vector', 'search_documents', ['search_vector'], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        # External-content FTS5 table kept in sync by triggers. It is keyed by
+        # rowid, which VACUUM may renumber: run
+        # INSERT INTO search_documents_fts(search_documents_fts) VALUES ('rebuild') after a VACUUM.
+        # Prefix indexes keep short search-as-you-type prefixes from merging thousands of terms.
+        op.execute(
+            f"CREATE VIRTUAL TABLE search_documents_fts USING fts5({DOCUMENT_COLUMNS}, "
+            "content='search_documents', tokenize='porter unicode61', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER search_documents_fts_ai AFTER INSERT ON search_documents BEGIN "
+            f"INSERT INTO search_documents_fts(rowid, {DOCUMENT_COLUMNS}) "
+            "VALUES (new.rowid, new.title, new.description, new.body, new.subject_name, new.grade_level); END"
+        )
+        op.execute(
+            "CREATE TRIGGER search_documents_fts_ad AFTER DELETE ON search_documents BEGIN "
+            f"INSERT INTO search_documents_fts(search_documents_fts, rowid, {DOCUMENT_COLUMNS}) "
+            "VALUES ('delete', old.rowid, old.title, old.description, old.body, old.subject_name, old.grade_level); END"
+        )
+        op.execute(
+            "CREATE TRIGGER search_documents_fts_au AFTER UPDATE ON search_documents BEGIN "
+            f"INSERT INTO search_documents_fts(search_documents_fts, rowid, {DOCUMENT_COLUMNS}) "
+            "VALUES ('delete', old.rowid, old.title, old.description, old.body, old.subject_name, old.grade_level); "
+            f"INSERT INTO search_documents_fts(rowid, {DOCUMENT_COLUMNS}) "
+            "VALUES (new.rowid, new.title, new.description, new.body, new.subject_name, new.grade_level); END"
+        )
+
+    # Index the existing curriculum; lessons are compressed, so their text is extracted here
+    bind = op.get_bind()
+    first_page = sa.text(
+        "SELECT c.id, c.title, c.description, s.id, s.name, s.grade_level FROM chapters c "
+        "JOIN subjects s ON s.id = c.subject_id ORDER BY c.id LIMIT :limit"
+    )
+    next_page = sa.text(
+        "SELECT c.id, c.title, c.description, s.id, s.name, s.grade_level FROM chapters c "
+        "JOIN subjects s ON s.id = c.subject_id WHERE c.id > :last ORDER BY c.id LIMIT :limit"
+    )
+    lessons = sa.text(
+        "SELECT chapter_id, content_data FROM content_blocks "
+        "WHERE block_type = 'lesson' AND chapter_id IN :ids ORDER BY created_at DESC, id DESC"
+    ).bindparams(sa.bindparam('ids', expanding=True))
+    insert = sa.text(
+        "INSERT INTO search_documents (chapter_id, subject_id, subject_name, grade_level, title, description, body) "
+        "VALUES (:chapter_id, :subject_id, :subject_name, :grade_level, :title, :description, :body)"
+    )
+    last = None
+    while True:
+        if last is None:
+            rows = bind.execute(first_page, {"limit": BATCH_SIZE}).all()
+        else:
+            rows = bind.execute(next_page, {"last": last, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        text_by_chapter = {
+            chapter_id: _lesson_text(_decode(data))
+            for chapter_id, data in bind.execute(lessons, {"ids": [row[0] for row in rows]})
+        }
+        bind.execute(insert, [
+            {
+                "chapter_id": chapter_id, "subject_id": subject_id, "subject_name": subject_name,
+                "grade_level": grade_level, "title": title, "description": description,
+                "body": text_by_chapter.get(chapter_id, ""),
+            }
+            for chapter_id, title, description, subject_id, subject_name, grade_level in rows
+        ])
+        last = rows[-1][0]
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS search_documents_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS search_documents_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS search_documents_fts_ai')
+        op.execute('DROP TABLE IF EXISTS search_documents_fts')
+    op.drop_table('search_documents')
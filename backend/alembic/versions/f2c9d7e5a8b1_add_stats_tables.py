@@ -0,0 +1,68 @@
+"""Add incrementally maintained stats tables
+
+Revision ID: f2c9d7e5a8b1
+Revises: e4b8a1c3f5d2
+Create Date: 2026-10-19 17:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9d7e5a8b1'
+down_revision: Union[str, Sequence[str], None] = 'e4b8a1c3f5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stat_counters',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'name')
+    )
+    op.create_table('profile_activity_days',
+        sa.Column('profile_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['profile_id'], ['profiles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('profile_id', 'day')
+    )
+
+    # Start from the current totals; later changes are applied incrementally
+    op.execute(
+        "INSERT INTO stat_counters (name, value) "
+        "SELECT 'subjects', COUNT(*) FROM subjects "
+        "UNION ALL SELECT 'chapters', COUNT(*) FROM chapters "
+        "UNION ALL SELECT 'students', COUNT(*) FROM profiles "
+        "UNION ALL SELECT 'lessons_completed', COUNT(*) FROM student_progress WHERE status = 'completed'"
+    )
+    day_of = 'date({})' if op.get_bind().dialect.name == 'sqlite' else 'CAST({} AS DATE)'
+    op.execute(
+        "INSERT INTO daily_stats (day, name, value) "
+        f"SELECT {day_of.format('completed_at')}, 'lessons_completed', COUNT(*) FROM student_progress "
+        "WHERE status = 'completed' AND completed_at IS NOT NULL "
+        f"GROUP BY {day_of.format('completed_at')}"
+    )
+    op.execute(
+        "INSERT INTO daily_stats (day, name, value) "
+        f"SELECT {day_of.format('created_at')}, 'new_students', COUNT(*) FROM profiles "
+        f"WHERE created_at IS NOT NULL GROUP BY {day_of.format('created_at')}"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('profile_activity_days')
+    op.drop_table('daily_stats')
+    op.drop_table('stat_counters')
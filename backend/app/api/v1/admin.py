@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from typing import List
+from sqlalchemy.orm import defer, selectinload
+from typing import List, Optional
+from uuid import UUID
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
+from app.core.pagination import keyset_query, split_page
 from app.models.curriculum import Subject, Chapter, ContentBlock
-from app.models.user import Profile
-from app.models.progress import StudentProgress
-from app.schemas.admin import AdminStats, BulkGenerateRequest, ContentBlockUpdate
+from app.schemas.admin import (
+    AdminStats,
+    StatsTrends,
+    BulkGenerateRequest,
+    ContentBlockUpdate,
+    ContentBlockSummary,
+    ContentBlockDetail,
+    ContentBlockListResponse,
+    CurriculumImportResult
+)
 from app.schemas.curriculum import SubjectResponse
 from app.services.ai.orchestrator import ai_orchestrator
+from app.services.curriculum_cache import bump_curriculum_version
+from app.services import curriculum_transfer, quiz_service, search_service, stats_service
 from app.api.v1.admin_deps import require_admin
 
 router = APIRouter()
@@ -20,34 +35,30 @@ async def get_admin_stats(
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_admin)
 ):
-    """Get platform statistics for admin dashboard."""
+    """
+    Get platform statistics for admin dashboard.
     
-    # Count subjects
-    result = await db.execute(select(func.count(Subject.id)))
-    total_subjects = result.scalar()
-    
-    # Count chapters
-    result = await db.execute(select(func.count(Chapter.id)))
-    total_chapters = result.scalar()
-    
-    # Count students
-    result = await db.execute(select(func.count(Profile.id)))
-    total_students = result.scalar()
-    
-    # Count completed lessons
-    result = await db.execute(
-        select(func.count(StudentProgress.id))
-        .where(StudentProgress.status == 'completed')
-    )
-    total_lessons_completed = result.scalar()
+    Reads the maintained counters (one query) instead of counting tables.
+    """
+    counters = await stats_service.get_counters(db)
     
     return {
-        "total_subjects": total_subjects or 0,
-        "total_chapters": total_chapters or 0,
-        "total_students": total_students or 0,
-        "total_lessons_completed": total_lessons_completed or 0
+        "total_subjects": counters[stats_service.SUBJECTS],
+        "total_chapters": counters[stats_service.CHAPTERS],
+        "total_students": counters[stats_service.STUDENTS],
+        "total_lessons_completed": counters[stats_service.LESSONS_COMPLETED]
     }
 
+@router.get("/stats/trends", response_model=StatsTrends)
+async def get_stats_trends(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Daily lessons completed, active students and new students for the last `days` days."""
+    points = await stats_service.get_daily(db, days)
+    return {"days": days, "points": points}
+
 @router.post("/bulk-generate", response_model=List[SubjectResponse])
 async def bulk_generate_curriculum(
     request: BulkGenerateRequest,
@@ -64,6 +75,7 @@ async def bulk_generate_curriculum(
             select(Subject)
             .where(Subject.name == subject_name)
             .where(Subject.grade_level == request.grade_level)
+            .options(selectinload(Subject.chapters))
         )
         existing = result.scalars().first()
         
@@ -87,7 +99,10 @@ async def bulk_generate_curriculum(
         db.add(new_subject)
         await db.flush()
         
-        chapters_data = ai_data.get("chapters", [])
+        # Chapter titles are unique within a subject, and generated ones occasionally repeat
+        chapters_data = list({
+            chap.get("title", "Untitled Chapter"): chap for chap in ai_data.get("chapters", [])
+        }.values())
         for idx, chap in enumerate(chapters_data):
             new_chapter = Chapter(
                 subject_id=new_subject.id,
@@ -97,24 +112,120 @@ async def bulk_generate_curriculum(
             )
             db.add(new_chapter)
         
+        await search_service.reindex_subject(db, new_subject.id)
+        await stats_service.increment(db, stats_service.SUBJECTS)
+        await stats_service.increment(db, stats_service.CHAPTERS, len(chapters_data))
+        await bump_curriculum_version(db)
         await db.commit()
-        await db.refresh(new_subject)
+        # The response lists the chapters, which can't be lazy-loaded once we return
+        await db.refresh(new_subject, ["chapters"])
         generated_subjects.append(new_subject)
     
     return generated_subjects
 
-@router.get("/content-blocks")
+@router.get("/curriculum/export")
+async def export_curriculum(
+    grade: Optional[int] = Query(None, description="Only this grade; all grades by default"),
+    current_user = Depends(require_admin)
+):
+    """
+    Stream subjects, chapters, content blocks and image references as JSONL.
+    
+    See app/services/curriculum_transfer.py for the format. Feed the file to
+    POST /curriculum/import (or transfer_curriculum.py) on another environment.
+    """
+    async def lines():
+        # The request's session is closed before a streamed body is sent, so use a dedicated one
+        async with AsyncSessionLocal() as db:
+            async for line in curriculum_transfer.export_curriculum(db, grade):
+                yield line
+    
+    filename = f"curriculum-grade-{grade}.jsonl" if grade else "curriculum.jsonl"
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/curriculum/import", response_model=CurriculumImportResult)
+async def import_curriculum(
+    request: Request,
+    batch_size: int = Query(settings.CURRICULUM_IMPORT_BATCH_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """
+    Import a JSONL curriculum sent as the raw request body (application/x-ndjson).
+    
+    The body is read as a stream and written `batch_size` lines per
+    transaction. Rows are upserted by natural key, so re-running an import
+    updates instead of duplicating. Lines that can't be imported are skipped
+    and reported; batches committed before a failure stay committed.
+    """
+    started = time.perf_counter()
+    importer = curriculum_transfer.CurriculumImporter(db, batch_size)
+    try:
+        stats = await importer.import_lines(curriculum_transfer.iter_lines(request.stream()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**asdict(stats), "seconds": round(time.perf_counter() - started, 3)}
+
+@router.get("/content-blocks", response_model=ContentBlockListResponse)
 async def list_content_blocks(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    page_size: int = Query(50, ge=1, le=100),
+    block_type: Optional[str] = Query(None),
+    chapter_id: Optional[UUID] = Query(None),
+    ai_model_used: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_admin)
 ):
-    """List all generated content blocks for review."""
-    result = await db.execute(
-        select(ContentBlock)
-        .order_by(ContentBlock.created_at.desc())
-        .limit(50)
+    """
+    List generated content blocks for review, newest first.
+    
+    Returns metadata only (type, chapter, model, size, created_at); fetch
+    GET /content-blocks/{block_id} for the content itself. Pages by keyset:
+    pass the previous page's `next_cursor` to get the next one.
+    """
+    query = select(ContentBlock).options(defer(ContentBlock.content_data))
+    if block_type:
+        query = query.where(ContentBlock.block_type == block_type)
+    if chapter_id:
+        query = query.where(ContentBlock.chapter_id == chapter_id)
+    if ai_model_used:
+        query = query.where(ContentBlock.ai_model_used == ai_model_used)
+    
+    try:
+        query = keyset_query(
+            query,
+            ContentBlock.created_at,
+            ContentBlock.id,
+            cursor,
+            page_size,
+            db.get_bind().dialect.name
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await db.execute(query)
+    blocks, next_cursor = split_page(
+        result.scalars().all(),
+        page_size,
+        lambda block: (block.created_at, block.id)
     )
-    return result.scalars().all()
+    return {"blocks": blocks, "next_cursor": next_cursor, "page_size": page_size}
+
+@router.get("/content-blocks/{block_id}", response_model=ContentBlockDetail)
+async def get_content_block(
+    block_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """Get one content block including its content."""
+    block = await db.get(ContentBlock, block_id)
+    if not block:
+        raise HTTPException(status_code=404, detail="Content block not found")
+    return block
 
 @router.put("/content-blocks/{block_id}")
 async def update_content_block(
@@ -130,22 +241,35 @@ async def update_content_block(
     if not block:
         raise HTTPException(status_code=404, detail="Content block not found")
     
-    block.content_data = update.content_data
+    content_data = update.content_data
+    if block.block_type == 'quiz':
+        try:
+            content_data = quiz_service.normalize_quiz(content_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # content_version is bumped on flush if the document actually changed
+    block.content_data = content_data
+    if block.block_type == 'lesson':
+        await search_service.reindex_chapters(db, [block.chapter_id])
     await db.commit()
     
-    return {"message": "Content updated successfully"}
+    return {"message": "Content updated successfully", "content_version": block.content_version}
 
 @router.get("/chapters/{chapter_id}/content")
 async def get_chapter_content(
     chapter_id: str,
+    include_content: bool = Query(True, description="false returns metadata only, like GET /content-blocks"),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_admin)
 ):
     """Get all content blocks for a chapter (lesson, quiz, etc)."""
-    result = await db.execute(
-        select(ContentBlock)
-        .where(ContentBlock.chapter_id == chapter_id)
-    )
+    query = select(ContentBlock).where(ContentBlock.chapter_id == chapter_id)
+    if not include_content:
+        query = query.options(defer(ContentBlock.content_data))
+    result = await db.execute(query)
     blocks = result.scalars().all()
+    if not include_content:
+        return [ContentBlockSummary.model_validate(block) for block in blocks]
     return blocks
 
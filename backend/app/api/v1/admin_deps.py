@@ -1,9 +1,15 @@
+import hmac
+from typing import Optional
 from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_db
 from app.api.v1.deps import get_current_user
 from app.models.user import User
 
+metrics_bearer = HTTPBearer(auto_error=False)
+
 async def require_admin(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
@@ -15,3 +21,22 @@ async def require_admin(
             detail="Admin access required"
         )
     return current_user
+
+async def require_metrics_access(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_bearer),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Dependency for GET /metrics: a bearer token equal to METRICS_TOKEN, as
+    configured in the Prometheus scrape job, or an admin's access token.
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = credentials.credentials
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    await require_admin(await get_current_user(token, db), db)
@@ -1,15 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
+from app.core.query_budget import query_budget
 from app.models.curriculum import Subject, Chapter
-from app.schemas.chapter import ChapterCreate, ChapterUpdate
+from app.schemas.chapter import ChapterCreate, ChapterUpdate, ChapterBatchUpdate
 from app.api.v1.admin_deps import require_admin
+from app.services.curriculum_cache import bump_curriculum_version
+from app.services import search_service, stats_service
 
 router = APIRouter()
 
+async def _check_title_free(db: AsyncSession, subject_id, title: str, chapter_id=None):
+    """400 if another chapter of the subject has this title (imports and exports match chapters on it)."""
+    query = select(Chapter.id).where(Chapter.subject_id == subject_id, Chapter.title == title)
+    if chapter_id is not None:
+        query = query.where(Chapter.id != chapter_id)
+    if (await db.execute(query)).first() is not None:
+        raise HTTPException(status_code=400, detail=f"Chapter titles must be unique within a subject ({title!r} exists)")
+
 @router.get("/subjects/{subject_id}/chapters")
 async def get_subject_chapters(
     subject_id: str,
@@ -37,6 +49,7 @@ async def create_chapter(
     subject = result.scalars().first()
     if not subject:
         raise HTTPException(status_code=404, detail="Subject not found")
+    await _check_title_free(db, subject.id, chapter.title)
     
     new_chapter = Chapter(
         subject_id=subject_id,
@@ -45,6 +58,10 @@ async def create_chapter(
         order_index=chapter.order_index
     )
     db.add(new_chapter)
+    await db.flush()
+    await search_service.reindex_chapters(db, [new_chapter.id])
+    await stats_service.increment(db, stats_service.CHAPTERS)
+    await bump_curriculum_version(db)
     await db.commit()
     await db.refresh(new_chapter)
     
@@ -64,18 +81,129 @@ async def update_chapter(
     if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
     
-    if chapter_update.title is not None:
+    if chapter_update.title is not None and chapter_update.title != chapter.title:
+        await _check_title_free(db, chapter.subject_id, chapter_update.title, chapter.id)
         chapter.title = chapter_update.title
     if chapter_update.description is not None:
         chapter.description = chapter_update.description
     if chapter_update.order_index is not None:
         chapter.order_index = chapter_update.order_index
     
+    await search_service.reindex_chapters(db, [chapter.id])
+    await bump_curriculum_version(db)
     await db.commit()
     await db.refresh(chapter)
     
     return chapter
 
+@router.put("/subjects/{subject_id}/chapters/order")
+async def batch_update_chapters(
+    subject_id: str,
+    batch: ChapterBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """
+    Reorder all chapters of a subject and patch their titles and descriptions at once.
+    
+    - **chapters**: Every chapter of the subject exactly once, in the new order (order_index becomes 1..n)
+    - **title**: Optional per chapter; omit it to keep the current title
+    - **description**: Optional per chapter; omit it to keep the current one, send null to clear it
+    - Everything is applied by a single UPDATE, so the subject is never seen half reordered
+    - Returns the subject's chapters in their new order
+    """
+    chapter_ids = [item.id for item in batch.chapters]
+    if len(set(chapter_ids)) != len(chapter_ids):
+        raise HTTPException(status_code=400, detail="Each chapter can only be listed once")
+    
+    result = await db.execute(
+        select(Chapter.id, Chapter.title).where(Chapter.subject_id == subject_id)
+    )
+    current_titles = dict(result.all())
+    if not current_titles:
+        result = await db.execute(select(Subject.id).where(Subject.id == subject_id))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Subject not found")
+    
+    missing = current_titles.keys() - set(chapter_ids)
+    extra = set(chapter_ids) - current_titles.keys()
+    if missing or extra:
+        problems = []
+        if missing:
+            problems.append(f"missing: {', '.join(sorted(str(i) for i in missing))}")
+        if extra:
+            problems.append(f"not in subject: {', '.join(sorted(str(i) for i in extra))}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Order must list every chapter of the subject exactly once ({'; '.join(problems)})"
+        )
+    
+    titles = {}
+    descriptions = {}
+    for item in batch.chapters:
+        if "title" in item.model_fields_set:
+            if not (item.title or "").strip():
+                raise HTTPException(status_code=400, detail=f"Chapter {item.id} needs a title")
+            titles[item.id] = item.title
+        if "description" in item.model_fields_set:
+            descriptions[item.id] = item.description
+    
+    # Titles identify chapters within a subject (curriculum import/export matches on them), so a
+    # title the batch sets can't be any other chapter's; titles it leaves alone aren't checked
+    titles = {chapter_id: title for chapter_id, title in titles.items() if title != current_titles[chapter_id]}
+    final_titles = {chapter_id: titles.get(chapter_id, title) for chapter_id, title in current_titles.items()}
+    duplicates = sorted({
+        title for chapter_id, title in titles.items()
+        if any(other != chapter_id and other_title == title for other, other_title in final_titles.items())
+    })
+    if duplicates:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Chapter titles must be unique within a subject (duplicated: {', '.join(duplicates)})"
+        )
+    # The unique index is checked row by row, so chapters giving up their title to another one
+    # (a swap) move to a placeholder first; Postgres text can't hold NUL, so it is plain text
+    claimed = set(titles.values())
+    vacating = {chapter_id: f"__swap__{chapter_id}" for chapter_id in titles if current_titles[chapter_id] in claimed}
+    
+    if chapter_ids:
+        values = {
+            "order_index": case(
+                {chapter_id: position for position, chapter_id in enumerate(chapter_ids, start=1)},
+                value=Chapter.id,
+                else_=Chapter.order_index
+            )
+        }
+        if vacating:
+            await db.execute(
+                update(Chapter)
+                .where(Chapter.id.in_(vacating))
+                .values(title=case(vacating, value=Chapter.id))
+                .execution_options(synchronize_session=False)
+            )
+        if titles:
+            values["title"] = case(titles, value=Chapter.id, else_=Chapter.title)
+        if descriptions:
+            values["description"] = case(descriptions, value=Chapter.id, else_=Chapter.description)
+        await db.execute(
+            update(Chapter)
+            .where(Chapter.subject_id == subject_id, Chapter.id.in_(chapter_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if titles or descriptions:
+            await search_service.reindex_chapters(db, titles.keys() | descriptions.keys())
+        await bump_curriculum_version(db)
+        await db.commit()
+    
+    result = await db.execute(
+        select(Chapter)
+        .where(Chapter.subject_id == subject_id)
+        .order_by(Chapter.order_index)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all()
+
 @router.delete("/chapters/{chapter_id}")
 async def delete_chapter(
     chapter_id: str,
@@ -90,6 +218,9 @@ async def delete_chapter(
         raise HTTPException(status_code=404, detail="Chapter not found")
     
     await db.delete(chapter)
+    await search_service.reindex_chapters(db, [chapter.id])
+    await stats_service.increment(db, stats_service.CHAPTERS, -1)
+    await bump_curriculum_version(db)
     await db.commit()
     
     return {"message": "Chapter deleted successfully"}
@@ -101,6 +232,8 @@ async def delete_chapter(
 from app.schemas.image import (
     ChapterImageCreate,
     ChapterImageUpdate,
+    ChapterImageReorder,
+    ChapterImageBulkCreate,
     ChapterImageResponse,
     ChapterImageListResponse,
     ImageResponse
@@ -128,6 +261,25 @@ def _image_to_response(image) -> ImageResponse:
         url=_build_image_url(str(image.id))
     )
 
+def _chapter_images_to_response(chapter_images) -> ChapterImageListResponse:
+    """Convert a chapter's ChapterImage rows (with images loaded) to the list schema."""
+    response_items = [
+        ChapterImageResponse(
+            id=ci.id,
+            chapter_id=ci.chapter_id,
+            image_id=ci.image_id,
+            display_order=ci.display_order,
+            caption=ci.caption,
+            created_at=ci.created_at,
+            image=_image_to_response(ci.image)
+        )
+        for ci in chapter_images
+    ]
+    return ChapterImageListResponse(
+        chapter_images=response_items,
+        total=len(response_items)
+    )
+
 @router.post("/chapters/{chapter_id}/images", response_model=ChapterImageResponse)
 async def add_image_to_chapter(
     chapter_id: str,
@@ -171,6 +323,7 @@ async def add_image_to_chapter(
     )
 
 @router.get("/chapters/{chapter_id}/images", response_model=ChapterImageListResponse)
+@query_budget(3)
 async def get_chapter_images(
     chapter_id: str,
     db: AsyncSession = Depends(get_db),
@@ -182,34 +335,58 @@ async def get_chapter_images(
     - **chapter_id**: ID of the chapter
     - Returns images ordered by display_order
     """
-    # Verify chapter exists
-    result = await db.execute(select(Chapter).where(Chapter.id == chapter_id))
-    chapter = result.scalars().first()
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    
     chapter_images = await image_service.get_chapter_images(chapter_id, db)
+    return _chapter_images_to_response(chapter_images)
+
+@router.post("/chapters/{chapter_id}/images/bulk", response_model=ChapterImageListResponse)
+async def add_images_to_chapter(
+    chapter_id: str,
+    bulk_data: ChapterImageBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """
+    Associate several images with a chapter in one request.
     
-    # Load image relationships
-    response_items = []
-    for ci in chapter_images:
-        await db.refresh(ci, ["image"])
-        response_items.append(
-            ChapterImageResponse(
-                id=ci.id,
-                chapter_id=ci.chapter_id,
-                image_id=ci.image_id,
-                display_order=ci.display_order,
-                caption=ci.caption,
-                created_at=ci.created_at,
-                image=_image_to_response(ci.image)
-            )
-        )
+    - **images**: Images to add, in display order, each with an optional caption
+    - **start_order**: Display order of the first one (default: after the chapter's last image)
+    - Nothing is added unless every image exists and isn't already in the chapter
+    - Returns all of the chapter's images in display order
+    """
+    chapter_images = await image_service.associate_images_with_chapter(
+        chapter_id=chapter_id,
+        image_ids=[item.image_id for item in bulk_data.images],
+        captions={item.image_id: item.caption for item in bulk_data.images if item.caption is not None},
+        db=db,
+        start_order=bulk_data.start_order
+    )
+    return _chapter_images_to_response(chapter_images)
+
+@router.put("/chapters/{chapter_id}/images/order", response_model=ChapterImageListResponse)
+async def reorder_chapter_images(
+    chapter_id: str,
+    order_data: ChapterImageReorder,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_admin)
+):
+    """
+    Reorder all images of a chapter at once.
     
-    return ChapterImageListResponse(
-        chapter_images=response_items,
-        total=len(response_items)
+    - **images**: Every image of the chapter exactly once, in the new order
+    - **caption**: Optional per image; omit it to keep the current caption, send null to clear it
+    - Returns the chapter's images in their new order
+    """
+    chapter_images = await image_service.reorder_chapter_images(
+        chapter_id=chapter_id,
+        image_ids=[item.image_id for item in order_data.images],
+        captions={
+            item.image_id: item.caption
+            for item in order_data.images
+            if "caption" in item.model_fields_set
+        },
+        db=db
     )
+    return _chapter_images_to_response(chapter_images)
 
 @router.delete("/chapters/{chapter_id}/images/{image_id}")
 async def remove_image_from_chapter(
@@ -1,30 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from typing import List
 
 from app.core.database import get_db
+from app.core.http import etag_matches
 from app.models.curriculum import Subject, Chapter
 from app.schemas.curriculum import SubjectCreate, SubjectResponse, GenerateCurriculumRequest
 from app.services.ai.orchestrator import ai_orchestrator
+from app.services.curriculum_cache import curriculum_cache, bump_curriculum_version
+from app.services import search_service, stats_service
 from app.api.v1.deps import get_current_user
 
 router = APIRouter()
 
 @router.get("/", response_model=List[SubjectResponse])
 async def get_subjects(
+    request: Request,
     grade: int = None,
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """List all subjects, optionally filtered by grade."""
-    query = select(Subject).options(selectinload(Subject.chapters))
-    if grade:
-        query = query.where(Subject.grade_level == grade)
+    """
+    List all subjects, optionally filtered by grade.
     
-    result = await db.execute(query)
-    return result.scalars().all()
+    Served from a per-worker cache that is rebuilt when admins change the
+    curriculum. Supports If-None-Match (304).
+    """
+    tree = await curriculum_cache.get(db, grade)
+    headers = {"ETag": tree.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), tree.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=tree.body, media_type="application/json", headers=headers)
 
 @router.post("/generate", response_model=SubjectResponse)
 async def generate_curriculum(
@@ -63,7 +71,10 @@ async def generate_curriculum(
     db.add(new_subject)
     await db.flush() # Get ID
 
-    chapters_data = ai_data.get("chapters", [])
+    # Chapter titles are unique within a subject, and generated ones occasionally repeat
+    chapters_data = list({
+        chap.get("title", "Untitled Chapter"): chap for chap in ai_data.get("chapters", [])
+    }.values())
     for idx, chap in enumerate(chapters_data):
         new_chapter = Chapter(
             subject_id=new_subject.id,
@@ -73,6 +84,10 @@ async def generate_curriculum(
         )
         db.add(new_chapter)
 
+    await search_service.reindex_subject(db, new_subject.id)
+    await stats_service.increment(db, stats_service.SUBJECTS)
+    await stats_service.increment(db, stats_service.CHAPTERS, len(chapters_data))
+    await bump_curriculum_version(db)
     await db.commit()
     await db.refresh(new_subject)
     
@@ -1,3 +1,4 @@
+import uuid
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -5,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.core.config import settings
 from app.core.database import get_db
-from app.models.user import User
+from app.models.user import User, Profile
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -31,3 +32,17 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     return user
+
+async def get_owned_profile(
+    profile_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Profile:
+    """The profile named by the `profile_id` parameter, if the current user is its parent or an admin."""
+    result = await db.execute(select(Profile).where(Profile.id == profile_id))
+    profile = result.scalars().first()
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if profile.parent_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this profile")
+    return profile
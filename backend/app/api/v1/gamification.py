@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, func, insert, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
 from app.core.database import get_db
+from app.core.query_budget import query_budget
 from app.models.gamification import Badge, ProfileBadge, AvatarItem, ProfileAvatar
 from app.models.user import Profile
 from app.models.progress import StudentProgress
@@ -44,6 +46,7 @@ async def get_profile_badges(
     ]
 
 @router.post("/badges/check/{profile_id}")
+@query_budget(3)
 async def check_and_award_badges(
     profile_id: str,
     db: AsyncSession = Depends(get_db),
@@ -51,49 +54,40 @@ async def check_and_award_badges(
 ):
     """Check if profile has earned any new badges."""
     
-    # Get profile stats
-    result = await db.execute(select(Profile).where(Profile.id == profile_id))
-    profile = result.scalars().first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    
-    # Count completed lessons
-    result = await db.execute(
-        select(StudentProgress)
-        .where(StudentProgress.profile_id == profile_id)
-        .where(StudentProgress.status == 'completed')
+    # One query finds the badges the profile qualifies for and doesn't have yet: the
+    # profile outer-joined with them, so a profile row with no badge means "nothing new"
+    completed_lessons = (
+        select(func.count())
+        .where(StudentProgress.profile_id == Profile.id, StudentProgress.status == 'completed')
+        .scalar_subquery()
+    )
+    already_earned = (
+        select(ProfileBadge.id)
+        .where(ProfileBadge.profile_id == Profile.id, ProfileBadge.badge_id == Badge.id)
+        .exists()
     )
-    completed_lessons = len(result.scalars().all())
-    
-    # Get all badges
-    result = await db.execute(select(Badge))
-    all_badges = result.scalars().all()
-    
-    # Get already earned badges
     result = await db.execute(
-        select(ProfileBadge).where(ProfileBadge.profile_id == profile_id)
+        select(Profile.id, Badge)
+        .outerjoin(Badge, and_(
+            ~already_earned,
+            or_(
+                and_(Badge.requirement_type == 'xp_total', Badge.requirement_value <= Profile.xp),
+                and_(Badge.requirement_type == 'lessons_completed', Badge.requirement_value <= completed_lessons),
+            ),
+        ))
+        .where(Profile.id == profile_id)
     )
-    earned = {str(pb.badge_id) for pb in result.scalars().all()}
-    
-    newly_earned = []
-    
-    for badge in all_badges:
-        if str(badge.id) in earned:
-            continue
-            
-        should_award = False
-        
-        if badge.requirement_type == 'xp_total' and profile.xp >= badge.requirement_value:
-            should_award = True
-        elif badge.requirement_type == 'lessons_completed' and completed_lessons >= badge.requirement_value:
-            should_award = True
-        
-        if should_award:
-            new_badge = ProfileBadge(profile_id=profile_id, badge_id=badge.id)
-            db.add(new_badge)
-            newly_earned.append(badge)
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Profile not found")
     
-    await db.commit()
+    newly_earned = [badge for _, badge in rows if badge is not None]
+    if newly_earned:
+        await db.execute(
+            insert(ProfileBadge),
+            [{"profile_id": rows[0][0], "badge_id": badge.id} for badge in newly_earned]
+        )
+        await db.commit()
     
     return {"newly_earned": newly_earned, "count": len(newly_earned)}
 
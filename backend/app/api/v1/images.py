@@ -1,19 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from uuid import UUID
 import math
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.http import etag_matches
 from app.api.v1.admin_deps import require_admin
 from app.api.v1.deps import get_current_user
 from app.models.user import User
 from app.schemas.image import (
     ImageUploadResponse,
+    ImageBatchItemResult,
+    ImageBatchUploadResponse,
     ImageResponse,
     ImageListResponse
 )
 from app.services.image_service import image_service
+from app.services.image_derivatives import supported_formats
 
 router = APIRouter()
 
@@ -31,6 +37,15 @@ async def upload_image_student(
     The same validation rules as admin upload apply.
     """
     image = await image_service.save_uploaded_file(file, current_user.id, db)
+    return _image_to_upload_response(image)
+
+
+def _build_image_url(image_id: str) -> str:
+    """Build the URL for accessing an image."""
+    return f"/api/v1/images/{image_id}/file"
+
+def _image_to_upload_response(image) -> ImageUploadResponse:
+    """Convert Image model to ImageUploadResponse schema."""
     return ImageUploadResponse(
         id=image.id,
         filename=image.filename,
@@ -43,11 +58,6 @@ async def upload_image_student(
         url=_build_image_url(str(image.id))
     )
 
-
-def _build_image_url(image_id: str) -> str:
-    """Build the URL for accessing an image."""
-    return f"/api/v1/images/{image_id}/file"
-
 def _image_to_response(image) -> ImageResponse:
     """Convert Image model to ImageResponse schema."""
     return ImageResponse(
@@ -80,51 +90,98 @@ async def upload_image(
     """
     image = await image_service.save_uploaded_file(file, current_user.id, db)
     
-    return ImageUploadResponse(
-        id=image.id,
-        filename=image.filename,
-        original_filename=image.original_filename,
-        file_size=image.file_size,
-        mime_type=image.mime_type,
-        width=image.width,
-        height=image.height,
-        created_at=image.created_at,
-        url=_build_image_url(str(image.id))
+    return _image_to_upload_response(image)
+
+@router.post("/upload/batch", response_model=ImageBatchUploadResponse)
+async def upload_images_batch(
+    files: list[UploadFile] = File(...),
+    chapter_id: Optional[UUID] = Form(None),
+    start_order: Optional[int] = Form(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Upload several images in one request.
+    
+    - **files**: Image files to upload (same rules as `/upload`, max 50 per request)
+    - **chapter_id**: Optional chapter to attach the images to, in upload order
+    - **start_order**: Display order of the first image (default: after the chapter's last image)
+    - **Returns**: One result per file; rejected files don't stop the rest of the batch
+    """
+    results = await image_service.save_uploaded_files(
+        files,
+        current_user.id,
+        db,
+        chapter_id=chapter_id,
+        start_order=start_order
+    )
+    
+    items = [
+        ImageBatchItemResult(
+            original_filename=result.original_filename,
+            success=result.image is not None,
+            image=_image_to_upload_response(result.image) if result.image is not None else None,
+            display_order=result.display_order,
+            error=result.error
+        )
+        for result in results
+    ]
+    uploaded = sum(1 for item in items if item.success)
+    
+    return ImageBatchUploadResponse(
+        results=items,
+        uploaded=uploaded,
+        failed=len(items) - uploaded,
+        chapter_id=chapter_id
     )
 
 @router.get("", response_model=ImageListResponse)
 async def list_images(
-    page: int = 1,
+    cursor: Optional[str] = None,
+    page: Optional[int] = None,
     page_size: int = 20,
     search: Optional[str] = None,
+    count: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
     """
-    List all uploaded images with pagination.
+    List all uploaded images, newest first.
     
-    - **page**: Page number (default: 1)
+    - **cursor**: `next_cursor` from the previous response; omit for the first page
+    - **page**: Page number for offset paging (deprecated, use `cursor`)
     - **page_size**: Items per page (default: 20, max: 100)
     - **search**: Optional search term for filename
+    - **count**: `exact`, `estimate` or `none` (default: `none`, or `exact` with `page`)
     """
     # Validate pagination
-    if page < 1:
+    if page is not None and page < 1:
         raise HTTPException(status_code=400, detail="Page must be >= 1")
+    if page is not None and cursor:
+        raise HTTPException(status_code=400, detail="Use either cursor or page, not both")
     if page_size < 1 or page_size > 100:
         raise HTTPException(status_code=400, detail="Page size must be between 1 and 100")
+    if count is not None and count not in ("exact", "estimate", "none"):
+        raise HTTPException(status_code=400, detail="count must be one of: exact, estimate, none")
     
-    images, total = await image_service.list_images(
+    result = await image_service.list_images(
         db=db,
-        page=page,
         page_size=page_size,
-        search=search
+        cursor=cursor,
+        page=page,
+        search=search,
+        count=count
     )
     
-    total_pages = math.ceil(total / page_size) if total > 0 else 0
+    total_pages = None
+    if page is not None and result.total is not None:
+        total_pages = math.ceil(result.total / page_size) if result.total > 0 else 0
     
     return ImageListResponse(
-        images=[_image_to_response(img) for img in images],
-        total=total,
+        images=[_image_to_response(img) for img in result.images],
+        next_cursor=result.next_cursor,
+        total=result.total,
+        total_is_estimate=result.total_is_estimate,
         page=page,
         page_size=page_size,
         total_pages=total_pages
@@ -166,9 +223,40 @@ async def delete_image(
     
     return {"message": "Image deleted successfully"}
 
+def _parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end) offsets.
+    Returns None for headers we ignore (other units, multiple ranges).
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    
+    if start >= size or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
 @router.get("/{image_id}/file")
 async def serve_image(
     image_id: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096),
+    fmt: Optional[str] = Query(None, alias="format"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -176,19 +264,108 @@ async def serve_image(
     
     - This endpoint is public (no authentication required)
     - Used to display images in the frontend
+    - **w**: Optional width in pixels; snapped up to the nearest pre-defined size
+    - **format**: Optional output format (jpeg, png, webp, avif)
+    - Responses are immutable: long-lived Cache-Control plus a strong ETag
+    - Supports If-None-Match (304) and single byte ranges (206)
+    - With object storage, originals redirect (307) to a presigned URL so
+      the bytes are downloaded from the store directly
     """
-    image = await image_service.get_image_by_id(image_id, db)
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in supported_formats():
+            raise HTTPException(
+                status_code=400,
+                detail=f"Format {fmt} not supported. Supported formats: {', '.join(sorted(supported_formats()))}"
+            )
     
-    if not image:
+    info = await image_service.get_file_info(image_id, db)
+    
+    if not info:
         raise HTTPException(status_code=404, detail="Image not found")
     
-    file_path = image_service.get_image_file_path(image.filename)
+    is_derivative = w is not None or fmt is not None
+    if is_derivative:
+        width, fmt = image_service.resolve_derivative(info, w, fmt)
+        etag = info.etag(f"w{width}.{fmt}")
+    else:
+        etag = info.etag()
+    
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable",
+    }
     
-    if not file_path.exists():
+    # Revalidation: answered from the metadata cache without touching the file
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers)
+    
+    if is_derivative:
+        try:
+            file_path, media_type = await image_service.get_derivative_path(info, width, fmt)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Image file not found on disk")
+        filename = None
+    else:
+        presigned_url = await image_service.presigned_url(info)
+        if presigned_url:
+            # The redirect is only valid while the URL is; the bytes behind it stay immutable
+            return RedirectResponse(
+                presigned_url,
+                status_code=307,
+                headers={
+                    "ETag": etag,
+                    "Cache-Control": f"private, max-age={settings.IMAGE_PRESIGNED_URL_EXPIRES // 2}",
+                }
+            )
+        file_path = await image_service.storage.local_path(info.stored_name)
+        media_type = info.mime_type
+        filename = info.original_filename
+    
+    if file_path is not None:
+        try:
+            size = await image_service.file_size(file_path)
+        except FileNotFoundError:
+            size = None
+    else:
+        size = await image_service.storage.size(info.stored_name)
+    if size is None:
         raise HTTPException(status_code=404, detail="Image file not found on disk")
     
+    def read_range(start: int, end: int):
+        if file_path is not None:
+            return image_service.iter_file_range(file_path, start, end)
+        return image_service.storage.iter_range(info.stored_name, start, end)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                read_range(start, end),
+                status_code=206,
+                media_type=media_type,
+                headers={
+                    **cache_headers,
+                    "Accept-Ranges": "bytes",
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                }
+            )
+    
+    if file_path is None:
+        # Object storage without presigned redirects: relay the object
+        return StreamingResponse(
+            read_range(0, size - 1),
+            media_type=media_type,
+            headers={**cache_headers, "Accept-Ranges": "bytes", "Content-Length": str(size)}
+        )
+    
     return FileResponse(
         path=file_path,
-        media_type=image.mime_type,
-        filename=image.original_filename
+        media_type=media_type,
+        filename=filename,
+        headers={**cache_headers, "Accept-Ranges": "bytes"}
     )
@@ -1,26 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import defer
 from typing import Dict, Any
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core.http import content_etag, etag_matches
+from app.core.query_budget import query_budget
 from app.models.curriculum import Chapter, ContentBlock
 from app.models.user import Profile
 from app.models.progress import StudentProgress
 from app.services.ai.orchestrator import ai_orchestrator
-from app.api.v1.deps import get_current_user
+from app.services.image_service import image_service
+from app.services import quiz_service, search_service, stats_service
+from app.schemas.image import ChapterImageSummary, ChapterImageSummaryListResponse
+from app.api.v1.deps import get_current_user, get_owned_profile
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _progress_summary(progress: StudentProgress) -> dict:
+    return {
+        "status": progress.status,
+        "score": progress.score,
+        "total_questions": progress.total_questions
+    }
+
+def _snapshot_etag(block: ContentBlock, *parts) -> str:
+    """
+    ETag of a lesson / quiz response, computed without loading the document.
+    
+    `parts` are whatever else the body contains (chapter fields, progress).
+    """
+    key = ":".join(str(part) for part in (block.id, block.content_version, block.content_hash, *parts))
+    return content_etag(key.encode())
+
+async def _load_content(db: AsyncSession, block: ContentBlock) -> dict:
+    """content_data of a block that was loaded with it deferred."""
+    if "content_data" in inspect(block).unloaded:
+        await db.refresh(block, ["content_data"])
+    return block.content_data
+
 @router.get("/{chapter_id}/lesson")
 async def get_or_generate_lesson(
     chapter_id: str,
-    profile_id: str,
+    request: Request,
+    response: Response,
+    include_progress: bool = True,
+    profile: Profile = Depends(get_owned_profile),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    """Get lesson content for a chapter. Generates if not exists."""
+    """
+    Get lesson content for a chapter. Generates if not exists.
+    
+    Responses carry an ETag and honor If-None-Match (304), in which case the
+    lesson document isn't even read from the database. With
+    include_progress=false the body is only the lesson snapshot, which stays
+    valid until an admin edits it; clients then read the student's progress
+    from GET /{chapter_id}/progress.
+    """
     
     # 1. Get chapter
     result = await db.execute(select(Chapter).where(Chapter.id == chapter_id))
@@ -28,12 +72,14 @@ async def get_or_generate_lesson(
     if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
     
-    # 2. Check if lesson already exists
-    result = await db.execute(
+    # 2. Check if lesson already exists (the document itself is only loaded if the client needs it)
+    lesson_query = (
         select(ContentBlock)
+        .options(defer(ContentBlock.content_data))
         .where(ContentBlock.chapter_id == chapter_id)
         .where(ContentBlock.block_type == 'lesson')
     )
+    result = await db.execute(lesson_query)
     content_block = result.scalars().first()
     
     if not content_block:
@@ -47,7 +93,8 @@ async def get_or_generate_lesson(
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate lesson: {str(e)}")
         
-        # 4. Save to DB
+        # 4. Save to DB; the quiz generated with the lesson becomes the chapter's quiz block
+        quiz_data = lesson_data.pop('quiz', None)
         content_block = ContentBlock(
             chapter_id=chapter_id,
             block_type='lesson',
@@ -55,45 +102,88 @@ async def get_or_generate_lesson(
             ai_model_used='mock'
         )
         db.add(content_block)
-        await db.commit()
-        await db.refresh(content_block)
+        if quiz_data is not None:
+            await _add_generated_quiz(db, chapter_id, quiz_data)
+        await search_service.reindex_chapters(db, [chapter.id])
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another request generated this chapter's lesson first; a chapter has one of each block type
+            await db.rollback()
+            await db.refresh(chapter)
+            result = await db.execute(lesson_query)
+            content_block = result.scalars().one()
+        else:
+            await db.refresh(content_block)
     
     # 5. Get or create progress
     result = await db.execute(
         select(StudentProgress)
-        .where(StudentProgress.profile_id == profile_id)
+        .where(StudentProgress.profile_id == profile.id)
         .where(StudentProgress.chapter_id == chapter_id)
     )
     progress = result.scalars().first()
     
     if not progress:
         progress = StudentProgress(
-            profile_id=profile_id,
+            profile_id=profile.id,
             chapter_id=chapter_id,
             status='in_progress'
         )
         db.add(progress)
         await db.commit()
     
-    return {
+    if await stats_service.record_activity(db, profile.id):
+        await db.commit()
+    
+    # 6. Conditional GET
+    progress_summary = _progress_summary(progress) if include_progress else None
+    etag = _snapshot_etag(content_block, chapter.title, chapter.description, progress_summary)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    
+    body = {
         "chapter": {
             "id": str(chapter.id),
             "title": chapter.title,
             "description": chapter.description
         },
-        "lesson": content_block.content_data,
-        "progress": {
-            "status": progress.status,
-            "score": progress.score,
-            "total_questions": progress.total_questions
-        }
+        "lesson": await _load_content(db, content_block),
+        "version": content_block.content_version
     }
+    if include_progress:
+        body["progress"] = progress_summary
+    return body
+
+async def _add_generated_quiz(db: AsyncSession, chapter_id: str, quiz_data: dict):
+    """Store an AI generated quiz for a chapter that doesn't have one yet."""
+    result = await db.execute(
+        select(ContentBlock.id)
+        .where(ContentBlock.chapter_id == chapter_id)
+        .where(ContentBlock.block_type == 'quiz')
+    )
+    if result.first():
+        return
+    try:
+        quiz = quiz_service.normalize_quiz(quiz_data)
+    except ValueError as e:
+        # The lesson is still worth keeping; the quiz can be regenerated or written by an admin
+        logger.warning("Discarding generated quiz for chapter %s: %s", chapter_id, e)
+        return
+    db.add(ContentBlock(
+        chapter_id=chapter_id,
+        block_type='quiz',
+        content_data=quiz,
+        ai_model_used='mock'
+    ))
 
 @router.post("/{chapter_id}/submit-quiz")
 async def submit_quiz(
     chapter_id: str,
-    profile_id: str,
     answers: Dict[int, str],
+    profile: Profile = Depends(get_owned_profile),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
@@ -109,17 +199,14 @@ async def submit_quiz(
     if not content_block:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    # 2. Calculate score
-    # content_data is directly the quiz dict {"questions": [...]}
-    questions = content_block.content_data.get('questions', [])
+    # 2. Calculate score against the precompiled answer key
+    try:
+        answer_key = quiz_service.answer_key(content_block.content_data)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Stored quiz is malformed: {str(e)}")
     
-    correct_count = 0
-    for idx, question in enumerate(questions):
-        user_answer = answers.get(idx)
-        if user_answer == question.get('correct_answer'):
-            correct_count += 1
-    
-    total_questions = len(questions)
+    correct_count = quiz_service.score(answer_key, answers)
+    total_questions = len(answer_key)
     score_percentage = (correct_count / total_questions * 100) if total_questions > 0 else 0
     
     # 3. Calculate XP (10 XP per correct answer)
@@ -128,12 +215,15 @@ async def submit_quiz(
     # 4. Update progress
     result = await db.execute(
         select(StudentProgress)
-        .where(StudentProgress.profile_id == profile_id)
+        .where(StudentProgress.profile_id == profile.id)
         .where(StudentProgress.chapter_id == chapter_id)
     )
     progress = result.scalars().first()
     
     if progress:
+        if progress.status != 'completed':
+            await stats_service.increment(db, stats_service.LESSONS_COMPLETED)
+            await stats_service.increment_daily(db, stats_service.LESSONS_COMPLETED)
         progress.status = 'completed'
         progress.score = correct_count
         progress.total_questions = total_questions
@@ -141,11 +231,9 @@ async def submit_quiz(
         progress.completed_at = datetime.utcnow()
     
     # 5. Update profile XP
-    result = await db.execute(select(Profile).where(Profile.id == profile_id))
-    profile = result.scalars().first()
-    if profile:
-        profile.xp += xp_earned
-        profile.coins += correct_count * 5  # 5 coins per correct answer
+    profile.xp += xp_earned
+    profile.coins += correct_count * 5  # 5 coins per correct answer
+    await stats_service.record_activity(db, profile.id)
     
     await db.commit()
     
@@ -157,20 +245,47 @@ async def submit_quiz(
         "coins_earned": correct_count * 5
     }
 
+@router.get("/{chapter_id}/images", response_model=ChapterImageSummaryListResponse)
+@query_budget(3)
+async def get_chapter_images(
+    chapter_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """Images to show alongside a chapter's lesson, in display order."""
+    rows = await image_service.get_chapter_image_summaries(chapter_id, db)
+    images = [
+        ChapterImageSummary(
+            image_id=row.image_id,
+            url=f"/api/v1/images/{row.image_id}/file",
+            caption=row.caption,
+            display_order=row.display_order or 0,
+            width=row.width,
+            height=row.height
+        )
+        for row in rows
+    ]
+    return ChapterImageSummaryListResponse(images=images, total=len(images))
+
 @router.get("/{chapter_id}/quiz")
 async def get_quiz(
     chapter_id: str,
-    profile_id: str,
+    request: Request,
+    response: Response,
+    include_progress: bool = True,
+    profile: Profile = Depends(get_owned_profile),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """
     Retrieve the quiz content for a chapter.
     Returns the stored quiz JSON (questions, options, etc.) and progress info.
+    Supports If-None-Match (304) and include_progress like the lesson endpoint.
     """
     # 1️⃣ Fetch the quiz ContentBlock
     result = await db.execute(
         select(ContentBlock)
+        .options(defer(ContentBlock.content_data))
         .where(ContentBlock.chapter_id == chapter_id)
         .where(ContentBlock.block_type == "quiz")
     )
@@ -181,24 +296,54 @@ async def get_quiz(
     # 2️⃣ Ensure a StudentProgress row exists (lazy creation)
     result = await db.execute(
         select(StudentProgress)
-        .where(StudentProgress.profile_id == profile_id)
+        .where(StudentProgress.profile_id == profile.id)
         .where(StudentProgress.chapter_id == chapter_id)
     )
     progress = result.scalars().first()
     if not progress:
         progress = StudentProgress(
-            profile_id=profile_id,
+            profile_id=profile.id,
             chapter_id=chapter_id,
             status="not_started",
         )
         db.add(progress)
         await db.commit()
 
-    return {
-        "quiz": quiz_block.content_data,
-        "progress": {
-            "status": progress.status,
-            "score": progress.score,
-            "total_questions": progress.total_questions,
-        },
+    # 3️⃣ Conditional GET
+    progress_summary = _progress_summary(progress) if include_progress else None
+    etag = _snapshot_etag(quiz_block, progress_summary)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    body = {
+        "quiz": await _load_content(db, quiz_block),
+        "version": quiz_block.content_version,
     }
+    if include_progress:
+        body["progress"] = progress_summary
+    return body
+
+@router.get("/{chapter_id}/progress")
+async def get_chapter_progress(
+    chapter_id: str,
+    profile: Profile = Depends(get_owned_profile),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    A student's progress on a chapter, on its own.
+    
+    Lets clients that keep lesson and quiz snapshots cached (include_progress=false)
+    refresh progress without re-downloading the content.
+    """
+    result = await db.execute(
+        select(StudentProgress)
+        .where(StudentProgress.profile_id == profile.id)
+        .where(StudentProgress.chapter_id == chapter_id)
+    )
+    progress = result.scalars().first()
+    if not progress:
+        return {"status": "not_started", "score": 0, "total_questions": 0}
+    return _progress_summary(progress)
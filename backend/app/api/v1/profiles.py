@@ -8,6 +8,7 @@ from app.core.security import create_access_token
 from app.models.user import User, Profile
 from app.schemas.profile import ProfileCreate, ProfileResponse
 from app.api.v1.deps import get_current_user
+from app.services import stats_service
 
 router = APIRouter()
 
@@ -34,6 +35,8 @@ async def create_profile(
         avatar_url=profile_in.avatar_url or "default_avatar.png"
     )
     db.add(new_profile)
+    await stats_service.increment(db, stats_service.STUDENTS)
+    await stats_service.increment_daily(db, stats_service.NEW_STUDENTS)
     await db.commit()
     await db.refresh(new_profile)
     return new_profile
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import get_current_user
+from app.core.config import settings
+from app.core.database import get_db
+from app.schemas.search import SearchResponse
+from app.services import search_service
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    grade: Optional[int] = None,
+    limit: int = Query(settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Search chapter titles, descriptions and lesson text.
+    
+    - **q**: Words to find; every word must match, the last one also as a prefix
+    - **grade**: Only chapters of this grade
+    - **limit**: Maximum number of results
+    - Results are ranked best first, each with a snippet whose matched words are **bold**
+    """
+    results = await search_service.search(db, q, grade, limit)
+    return SearchResponse(query=q, grade=grade, results=results)
@@ -0,0 +1,152 @@
+"""
+Compressed JSON storage for large document columns (content_blocks.content_data).
+
+`CompressedJSON` is a column type that serializes a value to JSON and stores
+it as bytes, compressed with the codec chosen by CONTENT_COMPRESSION:
+
+- "zlib": always available.
+- "zstd": needs the `zstandard` package. With CONTENT_ZSTD_DICT_ID set,
+  frames are compressed against a dictionary trained on our own lessons
+  (see train_content_dictionary.py), which matters because most blocks
+  are only a few KB and share a lot of phrasing and markup.
+- "none": plain JSON bytes.
+
+Stored values start with a two-byte header naming their codec. Anything
+without one is plain JSON, which is how rows written before compression
+(and payloads below CONTENT_COMPRESSION_MIN_BYTES) are stored, so old and
+new rows can be read side by side and the codec can be changed at any
+time; existing rows keep decoding with whatever they were written with.
+"""
+import json
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app.core.config import settings
+
+ZLIB_HEADER = b"\x00z"
+ZSTD_HEADER = b"\x00s"
+
+_local = threading.local()
+_zstd_dicts: dict[int, object] = {}
+
+
+def require_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("CONTENT_COMPRESSION is 'zstd' but the zstandard package is not installed") from e
+    return zstandard
+
+
+def dictionary_path(dict_id: int) -> Path:
+    """Where the zstd dictionary with this id is kept."""
+    return Path(settings.CONTENT_ZSTD_DICT_DIR) / f"{dict_id}.zdict"
+
+
+def load_dictionary(dict_id: int):
+    """
+    The zstd dictionary with this id, read from CONTENT_ZSTD_DICT_DIR once per process.
+
+    Raises:
+        FileNotFoundError: If the dictionary file is missing
+    """
+    dictionary = _zstd_dicts.get(dict_id)
+    if dictionary is None:
+        zstandard = require_zstandard()
+        dictionary = zstandard.ZstdCompressionDict(dictionary_path(dict_id).read_bytes())
+        _zstd_dicts[dict_id] = dictionary
+    return dictionary
+
+
+def _zstd_compressor():
+    # Compressor objects are not thread safe; keep one per thread for the configured dictionary
+    key = (settings.CONTENT_ZSTD_DICT_ID, settings.CONTENT_COMPRESSION_LEVEL)
+    if getattr(_local, "zstd_key", None) != key:
+        zstandard = require_zstandard()
+        level = settings.CONTENT_COMPRESSION_LEVEL or 3
+        if settings.CONTENT_ZSTD_DICT_ID:
+            dictionary = load_dictionary(settings.CONTENT_ZSTD_DICT_ID)
+            _local.zstd_compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        else:
+            _local.zstd_compressor = zstandard.ZstdCompressor(level=level)
+        _local.zstd_key = key
+    return _local.zstd_compressor
+
+
+def _zstd_decompress(frame: bytes) -> bytes:
+    zstandard = require_zstandard()
+    dict_id = zstandard.get_frame_parameters(frame).dict_id
+    if dict_id:
+        return zstandard.ZstdDecompressor(dict_data=load_dictionary(dict_id)).decompress(frame)
+    return zstandard.ZstdDecompressor().decompress(frame)
+
+
+def compress(raw: bytes, codec: Optional[str] = None) -> bytes:
+    """
+    Compress serialized JSON with `codec` (CONTENT_COMPRESSION by default).
+
+    Payloads below CONTENT_COMPRESSION_MIN_BYTES, and those that don't get
+    smaller, are returned unchanged.
+    """
+    codec = (codec or settings.CONTENT_COMPRESSION).lower()
+    if codec == "none" or len(raw) < settings.CONTENT_COMPRESSION_MIN_BYTES:
+        return raw
+    if codec == "zlib":
+        packed = ZLIB_HEADER + zlib.compress(raw, settings.CONTENT_COMPRESSION_LEVEL or 6)
+    elif codec == "zstd":
+        packed = ZSTD_HEADER + _zstd_compressor().compress(raw)
+    else:
+        raise ValueError(f"Unknown CONTENT_COMPRESSION {codec!r}; use 'zlib', 'zstd' or 'none'")
+    return packed if len(packed) < len(raw) else raw
+
+
+def decompress(stored: bytes) -> bytes:
+    """The serialized JSON of a stored value, whatever it was written with."""
+    header = stored[:2]
+    if header == ZLIB_HEADER:
+        return zlib.decompress(stored[2:])
+    if header == ZSTD_HEADER:
+        return _zstd_decompress(stored[2:])
+    return stored
+
+
+def is_compressed(stored: bytes) -> bool:
+    return stored[:2] in (ZLIB_HEADER, ZSTD_HEADER)
+
+
+def encode(value) -> bytes:
+    """Serialize and compress a JSON value for storage."""
+    return compress(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode())
+
+
+def decode(stored):
+    """Inverse of `encode`; also reads legacy uncompressed rows."""
+    # SQLite hands back rows written by the old JSON column as text
+    if isinstance(stored, str):
+        return json.loads(stored)
+    return json.loads(decompress(bytes(stored)))
+
+
+class CompressedJSON(TypeDecorator):
+    """
+    A JSON document stored as (usually compressed) bytes.
+
+    Values are decoded as rows are loaded, so queries that don't need the
+    document should leave the column out (e.g. with `defer`).
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return encode(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode(value)
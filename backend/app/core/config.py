@@ -7,6 +7,7 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./learnivo.db"
+    DATABASE_ECHO: bool = True  # Log every SQL statement (turn off for load tests)
     
     # Security
     SECRET_KEY: str = "CHANGE_THIS_TO_A_SECURE_SECRET_KEY_IN_PRODUCTION"
@@ -27,6 +28,72 @@ class Settings(BaseSettings):
         "image/gif",
         "image/webp"
     }
+    # Threads used for blocking image work (disk writes, PIL probing)
+    IMAGE_WORKERS: int = 4
+    
+    # Upload optimization: re-encode uploads without metadata, upright and size-capped
+    IMAGE_OPTIMIZE_UPLOADS: bool = False
+    IMAGE_MAX_DIMENSION: int = 2048  # Longest side in pixels; larger uploads are downscaled
+    IMAGE_OPTIMIZE_QUALITY: int = 85  # JPEG / WebP quality of the re-encoded file
+    
+    # Multi-file uploads (POST /images/upload/batch)
+    MAX_BATCH_UPLOAD_FILES: int = 50
+    IMAGE_BATCH_CONCURRENCY: int = 8  # Files of one batch streamed and hashed at the same time
+    
+    # Image listing: estimated totals count at most this many matching rows
+    IMAGE_COUNT_ESTIMATE_CAP: int = 10000
+    
+    # Image derivatives (resized / transcoded variants served by /images/{id}/file)
+    IMAGE_PROCESS_WORKERS: int = 2  # Processes used to render derivatives
+    IMAGE_DERIVATIVE_WIDTHS: list[int] = [160, 320, 480, 640, 960, 1280]  # Requested widths snap up to these
+    IMAGE_PREGENERATE_WIDTHS: list[int] = [320, 640]  # Rendered right after upload
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_DERIVATIVE_CACHE_BYTES: int = 1024 * 1024 * 1024  # 1GB
+    
+    # Seconds between checks of the curriculum cache version (how stale GET /curriculum/ may be on other workers)
+    CURRICULUM_CACHE_CHECK_INTERVAL: float = 1.0
+    
+    # Rows written per transaction by curriculum imports (POST /admin/curriculum/import, transfer_curriculum.py)
+    CURRICULUM_IMPORT_BATCH_SIZE: int = 1000
+    
+    # Content search (GET /search)
+    SEARCH_DEFAULT_LIMIT: int = 20
+    SEARCH_MAX_LIMIT: int = 100
+    
+    # Request, database and LLM metrics served on GET /metrics (Prometheus text format)
+    METRICS_ENABLED: bool = True
+    # Bearer token for scraping /metrics; without it only admins' access tokens are accepted
+    METRICS_TOKEN: Optional[str] = None
+    # Warn when a request issues more queries than this (0: no limit; @query_budget sets one per route)...
+    SQL_QUERY_BUDGET: int = 30
+    # ...or runs the same statement this many times, e.g. a query per row (N+1). Both need METRICS_ENABLED
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10
+    
+    # Storage of content_blocks.content_data: "zlib", "zstd" (needs zstandard) or "none"
+    CONTENT_COMPRESSION: str = "zlib"
+    CONTENT_COMPRESSION_LEVEL: Optional[int] = None  # None uses the codec's default (zlib 6, zstd 3)
+    CONTENT_COMPRESSION_MIN_BYTES: int = 256  # Smaller documents are stored uncompressed
+    CONTENT_ZSTD_DICT_DIR: str = "backend/content_dicts"  # Trained dictionaries, <dict id>.zdict
+    CONTENT_ZSTD_DICT_ID: Optional[int] = None  # Dictionary new zstd rows are compressed with
+    
+    # HTTP caching for served images (bytes for a given image id never change)
+    IMAGE_CACHE_MAX_AGE: int = 365 * 24 * 60 * 60  # 1 year
+    IMAGE_METADATA_CACHE_SIZE: int = 10000  # Image ids kept in the in-memory LRU
+
+    # Where original uploads are stored: "local" (UPLOAD_DIR) or "s3" (any S3-compatible store)
+    IMAGE_STORAGE_BACKEND: str = "local"
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO; None for AWS
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None  # None uses the standard AWS credential chain
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_KEY_PREFIX: str = "images/"
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024  # Larger uploads are sent in parts
+    S3_MULTIPART_CHUNK_SIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4  # Parts of one upload sent at the same time
+    # Serve originals by redirecting to a presigned URL when the backend supports it
+    IMAGE_PRESIGNED_REDIRECTS: bool = True
+    IMAGE_PRESIGNED_URL_EXPIRES: int = 60 * 60  # 1 hour
 
     class Config:
         env_file = ".env"
@@ -1,11 +1,15 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.types import TypeDecorator
 from app.core.config import settings
 
 # Create Async Engine
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True, # Log SQL for debugging
+    echo=settings.DATABASE_ECHO, # Log SQL for debugging
     future=True
 )
 
@@ -19,6 +23,32 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+class UUID(TypeDecorator):
+    """
+    Postgres UUID column that also takes the string form as a parameter.
+
+    Ids arrive from paths, query strings and tokens as str; asyncpg accepts
+    those, but SQLAlchemy's non-native UUID (SQLite) only takes uuid.UUID.
+    """
+    impl = postgresql.UUID
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return uuid.UUID(value)
+        return value
+
+def dialect_insert(db: AsyncSession, table):
+    """
+    INSERT construct for the session's backend, so callers can use
+    on_conflict_do_update / on_conflict_do_nothing on both Postgres and SQLite.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 # Dependency for FastAPI endpoints
 async def get_db():
     async with AsyncSessionLocal() as session:
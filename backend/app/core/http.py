@@ -0,0 +1,17 @@
+"""Helpers for HTTP caching headers."""
+import hashlib
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag derived from a response body, so every worker computes the same one."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
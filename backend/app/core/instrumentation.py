@@ -0,0 +1,164 @@
+"""
+Request, database and LLM instrumentation feeding the metrics served on
+GET /metrics.
+
+- MetricsMiddleware (pure ASGI) times every HTTP request by route template
+  and status, and tracks requests in flight.
+- Queries and database time per request come from the tracking in
+  app/core/query_budget.py, which also enforces per-route query budgets.
+- llm_call() wraps one provider call, timing it and collecting the token
+  counts the provider reports through record_llm_tokens().
+- record_upload_optimized() counts uploads replaced by their optimized
+  re-encode (IMAGE_OPTIMIZE_UPLOADS) and the bytes that saved.
+"""
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.metrics import Registry, Counter, Gauge, Histogram
+from app.core.query_budget import track_queries, check_query_budget
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter(
+    "learnivo_http_requests_total", "HTTP requests by method, route template and status code.",
+    ["method", "route", "status"], registry=REGISTRY,
+)
+HTTP_LATENCY = Histogram(
+    "learnivo_http_request_duration_seconds", "HTTP request latency by method and route template.",
+    ["method", "route"], registry=REGISTRY,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "learnivo_http_requests_in_flight", "HTTP requests currently being served.", registry=REGISTRY,
+)
+DB_QUERIES = Histogram(
+    "learnivo_http_request_db_queries", "Database queries issued per HTTP request, by route template.",
+    ["method", "route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89), registry=REGISTRY,
+)
+DB_TIME = Histogram(
+    "learnivo_http_request_db_seconds", "Time spent in database queries per HTTP request, by route template.",
+    ["method", "route"], registry=REGISTRY,
+)
+LLM_LATENCY = Histogram(
+    "learnivo_llm_request_duration_seconds", "LLM call latency by provider, call type and outcome.",
+    ["provider", "call", "outcome"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120), registry=REGISTRY,
+)
+LLM_TOKENS = Counter(
+    "learnivo_llm_tokens_total", "LLM tokens by provider, call type and kind (prompt or completion).",
+    ["provider", "call", "kind"], registry=REGISTRY,
+)
+LLM_IN_FLIGHT = Gauge(
+    "learnivo_llm_requests_in_flight", "LLM calls currently waiting on a provider.", ["provider"], registry=REGISTRY,
+)
+
+IMAGE_UPLOADS_OPTIMIZED = Counter(
+    "learnivo_image_uploads_optimized_total", "Uploads stored as their optimized re-encode.", registry=REGISTRY,
+)
+IMAGE_UPLOAD_BYTES_SAVED = Counter(
+    "learnivo_image_upload_bytes_saved_total",
+    "Bytes saved by upload optimization (re-encodes that only strip metadata and grow count as 0).",
+    registry=REGISTRY,
+)
+
+# Requests that matched no route share one label, so scanners can't blow up the series count
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class LLMCall:
+    provider: str
+    call: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+_current_llm_call: ContextVar[Optional[LLMCall]] = ContextVar("learnivo_llm_call", default=None)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task or body buffering)
+    recording latency, status and database usage of every HTTP request,
+    and checking its query budget.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                elapsed = time.perf_counter() - started
+                HTTP_IN_FLIGHT.dec()
+                path = _route_template(scope)
+                method = scope["method"]
+                HTTP_REQUESTS.inc(method, path, str(status))
+                HTTP_LATENCY.observe(elapsed, method, path)
+                DB_QUERIES.observe(queries.queries, method, path)
+                DB_TIME.observe(queries.db_seconds, method, path)
+        check_query_budget(f"{method} {path}", scope.get("endpoint"), queries)
+
+
+def _route_template(scope) -> str:
+    """Path template of the route that served the request, e.g. /api/v1/learning/{chapter_id}/lesson."""
+    # The router stores the match in the (shared) scope. FastAPI versions that include routers
+    # lazily keep the router-local route there and the prefixed one under scope["fastapi"].
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(effective, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+@asynccontextmanager
+async def llm_call(provider: str, call: str):
+    """
+    Time one LLM call. Providers report usage inside the block with
+    record_llm_tokens(); the outcome is "error" when the block raises.
+    """
+    record = LLMCall(provider, call)
+    token = _current_llm_call.set(record)
+    outcome = "error"
+    started = time.perf_counter()
+    LLM_IN_FLIGHT.inc(provider)
+    try:
+        yield record
+        outcome = "ok"
+    finally:
+        LLM_IN_FLIGHT.dec(provider)
+        _current_llm_call.reset(token)
+        LLM_LATENCY.observe(time.perf_counter() - started, provider, call, outcome)
+        if record.prompt_tokens:
+            LLM_TOKENS.inc(provider, call, "prompt", amount=record.prompt_tokens)
+        if record.completion_tokens:
+            LLM_TOKENS.inc(provider, call, "completion", amount=record.completion_tokens)
+
+
+def record_llm_tokens(prompt_tokens: int, completion_tokens: int):
+    """Attribute token usage to the enclosing llm_call(), if any."""
+    record = _current_llm_call.get()
+    if record is not None:
+        record.prompt_tokens += prompt_tokens or 0
+        record.completion_tokens += completion_tokens or 0
+
+
+def record_upload_optimized(bytes_before: int, bytes_after: int):
+    """Count one upload replaced by its optimized re-encode."""
+    IMAGE_UPLOADS_OPTIMIZED.inc()
+    IMAGE_UPLOAD_BYTES_SAVED.inc(amount=max(0, bytes_before - bytes_after))
@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination.
+
+Lists are ordered newest first by (created_at, id). A page is fetched with
+`WHERE (created_at, id) < (cursor)` instead of OFFSET, so every page costs
+the same index range scan no matter how deep it is, and rows inserted
+while a client is paging don't shift it onto duplicates.
+
+The cursor handed to clients is the (created_at, id) of the last row of
+the page, base64 encoded; clients treat it as opaque.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence
+
+from sqlalchemy import String, literal, tuple_
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """
+    Raises:
+        ValueError: If the cursor was not produced by `encode_cursor`
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _bind_timestamp(value: datetime, dialect_name: str):
+    """
+    Bind a cursor timestamp so it compares correctly with stored values.
+
+    SQLite keeps timestamps as text and `server_default=func.now()` writes
+    them as 'YYYY-MM-DD HH:MM:SS', while SQLAlchemy would bind microseconds
+    too; '...:05' < '...:05.000000' as strings, which would repeat rows.
+    """
+    if dialect_name != "sqlite":
+        return value
+    text = value.strftime("%Y-%m-%d %H:%M:%S")
+    if value.microsecond:
+        text += value.strftime(".%f")
+    return literal(text, String)
+
+
+def keyset_query(
+    query: Select,
+    created_col,
+    id_col,
+    cursor: Optional[str],
+    page_size: int,
+    dialect_name: str
+) -> Select:
+    """
+    Order `query` newest first and restrict it to the page after `cursor`.
+
+    One extra row is fetched so `split_page` can tell whether another page
+    follows without a separate COUNT.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(created_col, id_col) < tuple_(_bind_timestamp(created_at, dialect_name), literal(row_id, id_col.type))
+        )
+    return query.order_by(created_col.desc(), id_col.desc()).limit(page_size + 1)
+
+
+def split_page(
+    rows: Sequence[Any],
+    page_size: int,
+    key: Callable[[Any], tuple[datetime, uuid.UUID]]
+) -> tuple[list[Any], Optional[str]]:
+    """Drop the look-ahead row fetched by `keyset_query` and build the next cursor."""
+    rows = list(rows)
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*key(rows[-1]))
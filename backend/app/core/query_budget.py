@@ -0,0 +1,215 @@
+"""
+Per-request SQL query tracking, budgets and N+1 detection.
+
+SQLAlchemy engine events count every statement (and its time) into the
+QueryStats of the enclosing track_queries() block. MetricsMiddleware opens
+one per HTTP request and, when the request ends, check_query_budget() logs
+a warning if the route issued more queries than its budget or ran the same
+statement shape SQL_REPEATED_STATEMENT_THRESHOLD times or more (the
+signature of a per-row query, N+1).
+
+Budgets default to SQL_QUERY_BUDGET; @query_budget(n) pins one on an
+endpoint. Tests pin counts with assert_max_queries() or the fixtures in
+backend/conftest.py, and strict mode turns budget warnings into
+QueryBudgetExceeded errors.
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.database import engine as app_engine
+
+logger = logging.getLogger(__name__)
+
+# Longest statement quoted in a warning
+STATEMENT_PREVIEW = 200
+
+# A parenthesised list of bind parameters (IN lists, multi-row VALUES) in any paramstyle
+_PARAM = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)(?:\s*,\s*\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode, and by assert_max_queries(), when a block issues too many queries."""
+
+
+@dataclass
+class QueryStats:
+    """Statements issued inside one track_queries() block (e.g. one HTTP request)."""
+    queries: int = 0
+    db_seconds: float = 0.0
+    # Raw statement text -> times run; shapes are only worked out when a report needs them
+    statements: dict = field(default_factory=dict)
+    parent: Optional["QueryStats"] = field(default=None, repr=False)
+
+    def record(self, statement: str, seconds: float):
+        stats = self
+        while stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats = stats.parent
+
+    def shapes(self) -> dict[str, int]:
+        """Times each statement shape ran, most frequent first."""
+        counts: dict[str, int] = {}
+        for statement, count in self.statements.items():
+            shape = statement_shape(statement)
+            counts[shape] = counts.get(shape, 0) + count
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statement shapes run at least `threshold` times."""
+        return {shape: count for shape, count in self.shapes().items() if count >= threshold}
+
+    def report(self) -> str:
+        return "\n".join(f"{count:>5} x {_preview(shape)}" for shape, count in self.shapes().items())
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("learnivo_query_stats", default=None)
+
+# Strict mode (tests): budget violations raise instead of only logging
+_strict = False
+
+
+def statement_shape(statement: str) -> str:
+    """A statement with whitespace normalised and bind parameter lists collapsed, so IN (?, ?) == IN (?)."""
+    return _PARAM_LIST.sub("(…)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _preview(statement: str) -> str:
+    return statement if len(statement) <= STATEMENT_PREVIEW else statement[:STATEMENT_PREVIEW] + "…"
+
+
+def current_queries() -> Optional[QueryStats]:
+    """Stats of the innermost track_queries() block, None outside of one (CLIs, startup)."""
+    return _current.get()
+
+
+@contextmanager
+def track_queries():
+    """
+    Count the statements run inside the block (in this task and the tasks
+    and threads it starts). Blocks nest: outer blocks count inner ones too.
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("learnivo_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["learnivo_query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("learnivo_query_started"):
+        conn.info["learnivo_query_started"].pop()
+
+
+def install_db_hooks(engine: Engine) -> bool:
+    """Track the statements run on this (sync) engine; idempotent. False if they already were."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return False
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    return True
+
+
+def remove_db_hooks(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(engine, "handle_error", _handle_error)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Pin the number of queries an endpoint may issue per request (dependencies
+    such as authentication included), overriding SQL_QUERY_BUDGET:
+
+        @router.get("/{chapter_id}/images")
+        @query_budget(3)
+        async def get_chapter_images(...):
+    """
+    def decorate(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorate
+
+
+def budget_for(endpoint) -> int:
+    """Query budget of an endpoint; 0 means unlimited."""
+    return getattr(endpoint, "__query_budget__", settings.SQL_QUERY_BUDGET)
+
+
+def set_strict(strict: bool):
+    """In strict mode check_query_budget() raises QueryBudgetExceeded (used by tests)."""
+    global _strict
+    _strict = strict
+
+
+def check_query_budget(label: str, endpoint, stats: QueryStats) -> list[str]:
+    """
+    Log (or in strict mode raise) what's wrong with the queries a request
+    issued: over budget, or a statement repeated like an N+1. Returns the problems.
+    """
+    problems = []
+    budget = budget_for(endpoint) if endpoint is not None else settings.SQL_QUERY_BUDGET
+    if budget and stats.queries > budget:
+        problems.append(f"{label} issued {stats.queries} queries (budget {budget})")
+    threshold = settings.SQL_REPEATED_STATEMENT_THRESHOLD
+    if threshold and stats.queries >= threshold:
+        for shape, count in stats.repeated(threshold).items():
+            problems.append(f"{label} ran the same statement {count} times (N+1?): {_preview(shape)}")
+    for problem in problems:
+        logger.warning(problem)
+    if problems and _strict:
+        raise QueryBudgetExceeded("\n".join(problems) + "\n\nStatements:\n" + stats.report())
+    return problems
+
+
+@contextmanager
+def assert_max_queries(max_queries: int):
+    """
+    Fail with QueryBudgetExceeded if the block runs more than `max_queries`
+    statements; the message lists them by shape. Counts statements on the
+    app's engine, whether or not METRICS_ENABLED installed the hooks.
+
+        with assert_max_queries(3):
+            await client.get(f"/api/v1/learning/{chapter_id}/images")
+    """
+    installed = install_db_hooks(app_engine.sync_engine)
+    try:
+        with track_queries() as stats:
+            yield stats
+    finally:
+        # Leave the app's own hooks (METRICS_ENABLED) in place
+        if installed:
+            remove_db_hooks(app_engine.sync_engine)
+    if stats.queries > max_queries:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} queries, got {stats.queries}:\n{stats.report()}"
+        )
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
+from app.core.database import engine
+from app.core.instrumentation import REGISTRY, MetricsMiddleware
+from app.core.query_budget import install_db_hooks
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+
 app = FastAPI(
     title="Learnivo API",
     description="AI-Powered Learning Platform Backend",
@@ -22,7 +28,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from app.api.v1 import auth, profiles, curriculum, learning, admin, gamification, seed, dev, content_management, images
+if settings.METRICS_ENABLED:
+    # Added last so it wraps everything else, CORS preflights included
+    app.add_middleware(MetricsMiddleware)
+    install_db_hooks(engine.sync_engine)
+
+from app.api.v1.admin_deps import require_metrics_access
+from app.api.v1 import auth, profiles, curriculum, learning, admin, gamification, seed, dev, content_management, images, search
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["profiles"])
@@ -31,6 +43,7 @@ app.include_router(learning.router, prefix="/api/v1/learning", tags=["learning"]
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 app.include_router(content_management.router, prefix="/api/v1/admin", tags=["content-management"])
 app.include_router(images.router, prefix="/api/v1/images", tags=["images"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
 app.include_router(gamification.router, prefix="/api/v1/gamification", tags=["gamification"])
 app.include_router(seed.router, prefix="/api/v1/seed", tags=["seed"])
 app.include_router(dev.router, prefix="/api/v1/dev", tags=["dev"])
@@ -42,3 +55,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """Prometheus metrics of this worker process; needs METRICS_TOKEN or an admin token."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
@@ -4,4 +4,7 @@ from app.models.user import User, Profile
 from app.models.curriculum import Subject, Chapter, ContentBlock
 from app.models.progress import StudentProgress
 from app.models.gamification import Badge, ProfileBadge, AvatarItem, ProfileAvatar
-from app.models.image import Image, ChapterImage
+from app.models.image import Image, ImageBlob, ChapterImage
+from app.models.cache import CacheVersion
+from app.models.stats import StatCounter, DailyStat, ProfileActivityDay
+from app.models.search import SearchDocument
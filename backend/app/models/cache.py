@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CacheVersion(Base):
+    """
+    Version counter of a process-local cache.
+    
+    Writers bump it in the same transaction as the data the cache covers;
+    every worker compares it with the version its cached copy was built from.
+    """
+    __tablename__ = "cache_versions"
+    
+    name = Column(String, primary_key=True)  # e.g., "curriculum"
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,9 +1,11 @@
+import hashlib
+import json
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime, event, inspect
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.compression import CompressedJSON
+from app.core.database import Base, UUID
 
 class Subject(Base):
     __tablename__ = "subjects"
@@ -14,7 +16,7 @@ class Subject(Base):
     description = Column(Text, nullable=True)
     icon_name = Column(String, nullable=True) # For UI icon mapping
     
-    chapters = relationship("Chapter", back_populates="subject", cascade="all, delete-orphan")
+    chapters = relationship("Chapter", back_populates="subject", cascade="all, delete-orphan", order_by="Chapter.order_index")
 
 class Chapter(Base):
     __tablename__ = "chapters"
@@ -40,9 +42,43 @@ class ContentBlock(Base):
     # The actual AI generated content. 
     # For a lesson: {"markdown": "..."}
     # For a quiz: {"questions": [...]}
-    content_data = Column(JSON, nullable=False)
+    # Stored compressed (see app/core/compression.py); defer it when only metadata is needed
+    content_data = Column(CompressedJSON, nullable=False)
+    
+    # Serialized size of content_data in bytes, so listings can show it without loading it
+    content_size = Column(Integer, nullable=True)
+    
+    # Bumped whenever content_data actually changes; content_hash identifies the exact document
+    content_version = Column(Integer, nullable=False, default=1, server_default="1")
+    content_hash = Column(String(64), nullable=True)
     
     ai_model_used = Column(String, nullable=True) # e.g., "gpt-4-turbo"
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     chapter = relationship("Chapter", back_populates="content_blocks")
+
+def content_hash(content_data) -> str:
+    """SHA-256 of a document's canonical JSON, independent of key order and storage encoding."""
+    return hashlib.sha256(json.dumps(content_data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def content_metadata(content_data) -> dict:
+    """content_size and content_hash of a document, for Core inserts that skip the ORM listener below."""
+    return {
+        "content_size": len(json.dumps(content_data).encode()),
+        "content_hash": content_hash(content_data),
+    }
+
+@event.listens_for(ContentBlock, "before_insert")
+@event.listens_for(ContentBlock, "before_update")
+def _set_content_metadata(mapper, connection, block):
+    """Keep content_size, content_hash and content_version in step with content_data on every ORM write."""
+    # Checking history never loads a deferred content_data
+    if not inspect(block).attrs.content_data.history.has_changes() or block.content_data is None:
+        return
+    metadata = content_metadata(block.content_data)
+    block.content_size = metadata["content_size"]
+    new_hash = metadata["content_hash"]
+    # Saving an identical document again doesn't invalidate clients' cached copies
+    if block.content_hash is not None and new_hash != block.content_hash:
+        block.content_version = (block.content_version or 1) + 1
+    block.content_hash = new_hash
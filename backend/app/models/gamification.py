@@ -1,8 +1,7 @@
 import uuid
 from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DateTime
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, UUID
 
 class Badge(Base):
     __tablename__ = "badges"
@@ -1,17 +1,27 @@
 import uuid
 from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, UUID
+
+class ImageBlob(Base):
+    """Stored image bytes, shared by every Image row with identical content."""
+    __tablename__ = "image_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex of the uploaded bytes
+    filename = Column(String, nullable=False, unique=True)  # Storage filename: <content_hash><ext>
+    file_size = Column(Integer, nullable=False)  # Size in bytes
+    ref_count = Column(Integer, nullable=False, default=0)  # Number of Image rows using this blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Image(Base):
     __tablename__ = "images"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    filename = Column(String, nullable=False, unique=True)  # Unique storage filename
+    filename = Column(String, nullable=False, unique=True)  # Unique per-upload name
     original_filename = Column(String, nullable=False)  # Original upload filename
-    file_path = Column(String, nullable=False)  # Relative path from upload directory
+    file_path = Column(String, nullable=False)  # Relative path of the stored blob from upload directory
+    content_hash = Column(String(64), ForeignKey("image_blobs.content_hash"), nullable=True, index=True)  # NULL for pre-dedup uploads
     file_size = Column(Integer, nullable=False)  # Size in bytes
     mime_type = Column(String, nullable=False)  # e.g., "image/jpeg"
     width = Column(Integer, nullable=True)  # Image width in pixels
@@ -22,6 +32,7 @@ class Image(Base):
     
     # Relationships
     uploader = relationship("User", backref="uploaded_images")
+    blob = relationship("ImageBlob")
     chapter_associations = relationship("ChapterImage", back_populates="image", cascade="all, delete-orphan")
 
 class ChapterImage(Base):
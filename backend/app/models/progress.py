@@ -1,9 +1,8 @@
 import uuid
 from sqlalchemy import Column, String, Integer, ForeignKey, Text, JSON, DateTime, Boolean
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, UUID
 
 class StudentProgress(Base):
     __tablename__ = "student_progress"
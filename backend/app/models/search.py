@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base, UUID
+
+class SearchDocument(Base):
+    """
+    Searchable text of one chapter: its title, description and lesson, with
+    the subject denormalized so results need no joins.
+    
+    Rows are written by app/services/search_service.py; the full-text index
+    over them (FTS5 table on SQLite, generated tsvector column on Postgres)
+    is created and kept in sync by the database, see the search migration.
+    """
+    __tablename__ = "search_documents"
+    
+    chapter_id = Column(UUID(as_uuid=True), ForeignKey("chapters.id", ondelete="CASCADE"), primary_key=True)
+    subject_id = Column(UUID(as_uuid=True), nullable=False)
+    subject_name = Column(String, nullable=False)
+    grade_level = Column(Integer, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    body = Column(Text, nullable=False, default="")  # Lesson text with the markdown syntax stripped
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
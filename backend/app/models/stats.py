@@ -0,0 +1,26 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base, UUID
+
+class StatCounter(Base):
+    """A platform-wide total (subjects, chapters, students, lessons completed)."""
+    __tablename__ = "stat_counters"
+    
+    name = Column(String, primary_key=True)  # e.g., "lessons_completed"
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DailyStat(Base):
+    """One day's value of a time series (e.g. lessons completed that day)."""
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)  # UTC date
+    name = Column(String, primary_key=True)  # e.g., "active_students"
+    value = Column(BigInteger, nullable=False, default=0)
+
+class ProfileActivityDay(Base):
+    """A profile was active on a day; makes the daily active-student count exact."""
+    __tablename__ = "profile_activity_days"
+    
+    profile_id = Column(UUID(as_uuid=True), ForeignKey("profiles.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC date
@@ -1,10 +1,9 @@
 import uuid
 from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, Enum
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from app.core.database import Base
+from app.core.database import Base, UUID
 
 class UserRole(str, enum.Enum):
     SUPER_ADMIN = "super_admin"
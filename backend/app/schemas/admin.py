@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import List, Optional
 from uuid import UUID
+from datetime import date, datetime
 
 class AdminStats(BaseModel):
     total_subjects: int
@@ -8,9 +9,52 @@ class AdminStats(BaseModel):
     total_students: int
     total_lessons_completed: int
 
+class StatsTrendPoint(BaseModel):
+    day: date
+    lessons_completed: int
+    active_students: int
+    new_students: int
+
+class StatsTrends(BaseModel):
+    days: int
+    points: List[StatsTrendPoint]  # Oldest first, one per day
+
 class BulkGenerateRequest(BaseModel):
     grade_level: int
     subject_names: List[str]
 
 class ContentBlockUpdate(BaseModel):
     content_data: dict
+
+class ContentBlockSummary(BaseModel):
+    id: UUID
+    chapter_id: UUID
+    block_type: str
+    ai_model_used: Optional[str] = None
+    content_size: Optional[int] = None  # Bytes of serialized content_data
+    content_version: int = 1  # Bumped on every edit that changes content_data
+    content_hash: Optional[str] = None  # SHA-256 of content_data's canonical JSON
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class ContentBlockDetail(ContentBlockSummary):
+    content_data: dict
+
+class ContentBlockListResponse(BaseModel):
+    blocks: List[ContentBlockSummary]
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; null on the last page
+    page_size: int
+
+class CurriculumImportResult(BaseModel):
+    lines: int
+    subjects: int  # Records written per type, created or updated
+    chapters: int
+    content_blocks: int
+    chapter_images: int
+    created: int  # Rows that didn't exist before the import
+    skipped: int
+    batches: int  # Transactions committed
+    errors: List[str]  # Why lines were skipped (first 100)
+    seconds: float
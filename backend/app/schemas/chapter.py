@@ -11,3 +11,11 @@ class ChapterUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     order_index: Optional[int] = None
+
+class ChapterOrderItem(BaseModel):
+    id: UUID
+    title: Optional[str] = None  # Omit to keep the current title
+    description: Optional[str] = None  # Omit to keep the current description, send null to clear it
+
+class ChapterBatchUpdate(BaseModel):
+    chapters: list[ChapterOrderItem]  # Every chapter of the subject, in the new order
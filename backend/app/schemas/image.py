@@ -18,6 +18,19 @@ class ImageUploadResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ImageBatchItemResult(BaseModel):
+    original_filename: str
+    success: bool
+    image: Optional[ImageUploadResponse] = None
+    display_order: Optional[int] = None  # Position in the chapter, when one was given
+    error: Optional[str] = None  # Why this file was rejected
+
+class ImageBatchUploadResponse(BaseModel):
+    results: list[ImageBatchItemResult]  # One per file, in upload order
+    uploaded: int
+    failed: int
+    chapter_id: Optional[UUID] = None
+
 class ImageResponse(BaseModel):
     id: UUID
     filename: str
@@ -37,10 +50,12 @@ class ImageResponse(BaseModel):
 
 class ImageListResponse(BaseModel):
     images: list[ImageResponse]
-    total: int
-    page: int
+    next_cursor: Optional[str] = None  # Pass as `cursor` for the next page; null on the last page
+    total: Optional[int] = None  # Only when a count was requested
+    total_is_estimate: bool = False
+    page: Optional[int] = None  # Offset paging only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None  # Offset paging only
 
 # Chapter-Image Association Schemas
 class ChapterImageCreate(BaseModel):
@@ -52,6 +67,17 @@ class ChapterImageUpdate(BaseModel):
     caption: Optional[str] = None
     display_order: Optional[int] = None
 
+class ChapterImageItem(BaseModel):
+    image_id: UUID
+    caption: Optional[str] = None  # When reordering, omit to keep the current caption
+
+class ChapterImageReorder(BaseModel):
+    images: list[ChapterImageItem]  # Every image of the chapter, in the new order
+
+class ChapterImageBulkCreate(BaseModel):
+    images: list[ChapterImageItem]  # In display order
+    start_order: Optional[int] = None  # Default: after the chapter's last image
+
 class ChapterImageResponse(BaseModel):
     id: UUID
     chapter_id: UUID
@@ -67,3 +93,16 @@ class ChapterImageResponse(BaseModel):
 class ChapterImageListResponse(BaseModel):
     chapter_images: list[ChapterImageResponse]
     total: int
+
+# Student-facing chapter images: just what a lesson page needs to render them
+class ChapterImageSummary(BaseModel):
+    image_id: UUID
+    url: str  # Add ?w=...&format=webp for a resized variant
+    caption: Optional[str] = None
+    display_order: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+class ChapterImageSummaryListResponse(BaseModel):
+    images: list[ChapterImageSummary]
+    total: int
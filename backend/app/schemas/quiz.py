@@ -0,0 +1,35 @@
+import string
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
+
+# Option labels, in order: a question with three options uses A, B and C
+OPTION_LETTERS = string.ascii_uppercase
+
+# Canonical quiz format stored in ContentBlock.content_data for block_type 'quiz'
+class QuizQuestion(BaseModel):
+    question: str = Field(min_length=1)
+    options: Dict[str, str]  # {"A": "...", "B": "...", ...}
+    correct_answer: str  # Letter of the correct option
+    explanation: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_options(self):
+        if len(self.options) < 2:
+            raise ValueError("a question needs at least two options")
+        expected = list(OPTION_LETTERS[:len(self.options)])
+        if list(self.options) != expected:
+            raise ValueError(f"options must be labelled {', '.join(expected)} in order")
+        if self.correct_answer not in self.options:
+            raise ValueError(f"correct_answer {self.correct_answer!r} is not one of the options")
+        return self
+
+class Quiz(BaseModel):
+    questions: List[QuizQuestion] = Field(min_length=1)
+    # correct_answer of every question, in order ("BCA..."), so scoring never walks the questions
+    answer_key: str
+
+    @model_validator(mode="after")
+    def check_answer_key(self):
+        if self.answer_key != "".join(q.correct_answer for q in self.questions):
+            raise ValueError("answer_key does not match the questions' correct answers")
+        return self
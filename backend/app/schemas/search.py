@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from uuid import UUID
+
+class SearchResult(BaseModel):
+    chapter_id: UUID
+    subject_id: UUID
+    subject_name: str
+    grade_level: int
+    title: str
+    snippet: str  # Best matching passage, matched terms wrapped in **bold** markdown
+    score: float  # Higher is more relevant; only comparable within one response
+
+class SearchResponse(BaseModel):
+    query: str
+    grade: Optional[int] = None
+    results: List[SearchResult]
@@ -3,7 +3,10 @@ from typing import Any, Dict, List
 
 class LLMProvider(ABC):
     """Abstract base class for AI providers."""
-    
+
+    # Label of this provider in the LLM metrics
+    name: str = "unknown"
+
     @abstractmethod
     async def generate_text(self, prompt: str, system_prompt: str = None) -> str:
         """Generate simple text response."""
@@ -3,6 +3,7 @@ from app.services.ai.base import LLMProvider
 
 class MockProvider(LLMProvider):
     """Used when no API keys are present or for testing."""
+    name = "mock"
     
     async def generate_text(self, prompt: str, system_prompt: str = None) -> str:
         if "lesson" in prompt.lower():
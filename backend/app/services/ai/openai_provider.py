@@ -2,9 +2,12 @@ import json
 from typing import Any, Dict
 import openai
 from app.core.config import settings
+from app.core.instrumentation import record_llm_tokens
 from app.services.ai.base import LLMProvider
 
 class OpenAIProvider(LLMProvider):
+    name = "openai"
+
     def __init__(self):
         self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-3.5-turbo" # Default cost-effective model
@@ -20,6 +23,7 @@ class OpenAIProvider(LLMProvider):
             messages=messages,
             temperature=0.7
         )
+        self._record_usage(response)
         return response.choices[0].message.content
 
     async def generate_json(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
@@ -38,6 +42,12 @@ class OpenAIProvider(LLMProvider):
             response_format={"type": "json_object"},
             temperature=0.3
         )
+        self._record_usage(response)
         
         content = response.choices[0].message.content
         return json.loads(content)
+
+    @staticmethod
+    def _record_usage(response):
+        if response.usage is not None:
+            record_llm_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
@@ -1,4 +1,5 @@
 from app.core.config import settings
+from app.core.instrumentation import llm_call
 from app.services.ai.base import LLMProvider
 from app.services.ai.openai_provider import OpenAIProvider
 from app.services.ai.mock_provider import MockProvider
@@ -47,7 +48,8 @@ class AIOrchestrator:
             }
         }
         
-        return await provider.generate_json(prompt, schema)
+        async with llm_call(provider.name, "curriculum"):
+            return await provider.generate_json(prompt, schema)
 
     async def generate_lesson(self, chapter_title: str, chapter_description: str, grade: int) -> dict:
         """Generate lesson content and quiz for a chapter."""
@@ -57,7 +59,8 @@ class AIOrchestrator:
         
         # 1. Generate lesson text
         lesson_prompt = PromptManager.lesson_prompt(chapter_title, chapter_description, grade)
-        lesson_text = await provider.generate_text(lesson_prompt)
+        async with llm_call(provider.name, "lesson"):
+            lesson_text = await provider.generate_text(lesson_prompt)
         
         # 2. Generate quiz based on lesson
         quiz_prompt = PromptManager.quiz_prompt(chapter_title, lesson_text, grade)
@@ -79,7 +82,8 @@ class AIOrchestrator:
             }
         }
         
-        quiz_data = await provider.generate_json(quiz_prompt, quiz_schema)
+        async with llm_call(provider.name, "quiz"):
+            quiz_data = await provider.generate_json(quiz_prompt, quiz_schema)
         
         return {
             "lesson_text": lesson_text,
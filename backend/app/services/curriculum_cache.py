@@ -0,0 +1,132 @@
+"""
+Process-local cache of the subject / chapter tree served by GET /curriculum/.
+
+The tree only changes when admins edit it, so each worker keeps the
+serialized response body per grade and serves it without touching the
+subjects and chapters tables. Every write that changes the tree calls
+`bump_curriculum_version` inside its transaction; workers read the
+version (one primary-key lookup) at most once per
+CURRICULUM_CACHE_CHECK_INTERVAL seconds and rebuild an entry when it was
+built from an older version.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.http import content_etag
+from app.models.cache import CacheVersion
+from app.models.curriculum import Subject
+from app.schemas.curriculum import SubjectResponse
+
+CURRICULUM = "curriculum"
+
+# Entries are keyed by grade (None for all grades), so this is plenty
+MAX_CACHED_GRADES = 64
+
+# session.info flag: the open transaction bumped the curriculum version
+VERSION_BUMPED = "curriculum_version_bumped"
+
+_subjects_adapter = TypeAdapter(List[SubjectResponse])
+
+
+@dataclass(frozen=True)
+class CachedTree:
+    """Serialized subject list for one grade."""
+    version: int
+    body: bytes
+    etag: str
+
+
+async def bump_curriculum_version(db: AsyncSession):
+    """
+    Invalidate every worker's cached curriculum tree.
+
+    Call it before committing a transaction that changes subjects or
+    chapters, so the new version becomes visible together with the data.
+    """
+    stmt = dialect_insert(db, CacheVersion).values(name=CURRICULUM, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={"version": CacheVersion.version + 1}
+    )
+    await db.execute(stmt)
+    # This worker must not serve the old tree to the admin who made the change
+    db.info[VERSION_BUMPED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _expire_after_bump(session):
+    if session.info.pop(VERSION_BUMPED, False):
+        curriculum_cache.expire_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_bump(session):
+    session.info.pop(VERSION_BUMPED, None)
+
+
+class CurriculumCache:
+    """Versioned per-grade cache of serialized `SubjectResponse` lists."""
+
+    def __init__(self):
+        self._entries = LRUCache(MAX_CACHED_GRADES)
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def expire_version(self):
+        """Make the next request re-read the version from the database."""
+        self._checked_at = 0.0
+
+    async def _current_version(self, db: AsyncSession) -> int:
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= settings.CURRICULUM_CACHE_CHECK_INTERVAL:
+            result = await db.execute(select(CacheVersion.version).where(CacheVersion.name == CURRICULUM))
+            self._version = result.scalar() or 0
+            self._checked_at = now
+        return self._version
+
+    async def _build(self, db: AsyncSession, grade: Optional[int]) -> bytes:
+        query = select(Subject).options(selectinload(Subject.chapters))
+        if grade:
+            query = query.where(Subject.grade_level == grade)
+        result = await db.execute(query)
+        subjects = _subjects_adapter.validate_python(result.scalars().all(), from_attributes=True)
+        return _subjects_adapter.dump_json(subjects)
+
+    async def get(self, db: AsyncSession, grade: Optional[int]) -> CachedTree:
+        """The serialized subject list for `grade` (None or 0 for every grade)."""
+        grade = grade or None
+        version = await self._current_version(db)
+        entry = self._entries.get(grade)
+        if entry is not None and entry.version >= version:
+            return entry
+
+        # One rebuild at a time, so a version bump doesn't send every waiting request to the database
+        async with self._lock:
+            entry = self._entries.get(grade)
+            if entry is not None and entry.version >= version:
+                return entry
+            # The version was read before the data, so the data is at least that new
+            body = await self._build(db, grade)
+            entry = CachedTree(version=version, body=body, etag=content_etag(body))
+            self._entries.set(grade, entry)
+            return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.expire_version()
+
+
+# Create singleton instance
+curriculum_cache = CurriculumCache()
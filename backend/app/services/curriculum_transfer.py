@@ -0,0 +1,485 @@
+"""
+Streaming curriculum export and import in JSONL.
+
+One JSON object per line, parents before children, every reference by
+natural key instead of database id so a file moves between environments:
+
+    {"type": "meta", "format": "learnivo-curriculum", "version": 1}
+    {"type": "subject", "grade_level": 4, "name": "Maths", "description": ..., "icon_name": ...}
+    {"type": "chapter", "grade_level": 4, "subject": "Maths", "title": "Fractions", "order_index": 2, ...}
+    {"type": "content_block", "grade_level": 4, "subject": "Maths", "chapter": "Fractions",
+     "block_type": "lesson", "content_data": {...}, "ai_model_used": ...}
+    {"type": "chapter_image", "grade_level": 4, "subject": "Maths", "chapter": "Fractions",
+     "image_hash": "<sha256>", "image_id": "<uuid>", "display_order": 0, "caption": ...}
+
+Natural keys: a subject is (grade_level, name), a chapter its title within
+the subject, a content block its block_type within the chapter and an image
+association the image within the chapter. Images themselves are not
+exported; they are matched by content hash (or id) among the images
+already uploaded to the target.
+
+The importer buffers lines and writes each batch as multi-row upserts in
+one transaction. Subjects, chapters and content blocks upsert on the
+unique index of their natural key, so re-running an import, or two
+overlapping imports, update rows in place instead of duplicating them.
+"""
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import and_, case, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_insert
+from app.models.curriculum import Subject, Chapter, ContentBlock, content_metadata
+from app.models.image import Image, ChapterImage
+from app.services import quiz_service, search_service, stats_service
+from app.services.curriculum_cache import bump_curriculum_version
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "learnivo-curriculum"
+FORMAT_VERSION = 1
+
+RECORD_TYPES = ("subject", "chapter", "content_block", "chapter_image")
+
+# Rows fetched per round trip while exporting content blocks
+EXPORT_YIELD_PER = 500
+
+# Problems listed in the import result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def _line(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+async def export_curriculum(db: AsyncSession, grade: Optional[int] = None) -> AsyncIterator[bytes]:
+    """
+    Yield the curriculum (one grade, or all of it) as JSONL lines.
+
+    Content blocks are streamed from the database, so memory use doesn't
+    grow with the size of the curriculum.
+    """
+    yield _line({
+        "type": "meta",
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "exported_at": datetime.utcnow().isoformat() + "Z"
+    })
+
+    query = select(Subject).order_by(Subject.grade_level, Subject.name)
+    if grade:
+        query = query.where(Subject.grade_level == grade)
+    subjects = (await db.execute(query)).scalars().all()
+
+    for subject in subjects:
+        key = {"grade_level": subject.grade_level, "subject": subject.name}
+        yield _line({
+            "type": "subject",
+            "grade_level": subject.grade_level,
+            "name": subject.name,
+            "description": subject.description,
+            "icon_name": subject.icon_name
+        })
+
+        result = await db.execute(
+            select(Chapter).where(Chapter.subject_id == subject.id).order_by(Chapter.order_index, Chapter.title)
+        )
+        for chapter in result.scalars():
+            yield _line({
+                "type": "chapter",
+                **key,
+                "title": chapter.title,
+                "order_index": chapter.order_index,
+                "description": chapter.description
+            })
+
+        blocks = await db.stream(
+            select(Chapter.title, ContentBlock.block_type, ContentBlock.content_data, ContentBlock.ai_model_used)
+            .join(Chapter, ContentBlock.chapter_id == Chapter.id)
+            .where(Chapter.subject_id == subject.id)
+            .order_by(Chapter.order_index, ContentBlock.created_at, ContentBlock.id)
+            .execution_options(yield_per=EXPORT_YIELD_PER)
+        )
+        async for title, block_type, content_data, ai_model_used in blocks:
+            yield _line({
+                "type": "content_block",
+                **key,
+                "chapter": title,
+                "block_type": block_type,
+                "content_data": content_data,
+                "ai_model_used": ai_model_used
+            })
+
+        images = await db.execute(
+            select(Chapter.title, Image.id, Image.content_hash, ChapterImage.display_order, ChapterImage.caption)
+            .join(Chapter, ChapterImage.chapter_id == Chapter.id)
+            .join(Image, ChapterImage.image_id == Image.id)
+            .where(Chapter.subject_id == subject.id)
+            .order_by(Chapter.order_index, ChapterImage.display_order)
+        )
+        for title, image_id, image_hash, display_order, caption in images:
+            yield _line({
+                "type": "chapter_image",
+                **key,
+                "chapter": title,
+                "image_hash": image_hash,
+                "image_id": str(image_id),
+                "display_order": display_order,
+                "caption": caption
+            })
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of byte chunks into lines, without holding more than one line in memory."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+@dataclass
+class ImportStats:
+    lines: int = 0
+    subjects: int = 0
+    chapters: int = 0
+    content_blocks: int = 0
+    chapter_images: int = 0
+    created: int = 0  # Rows that didn't exist yet; the rest were updated in place
+    skipped: int = 0
+    batches: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def skip(self, line_no: int, reason: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_no}: {reason}")
+
+
+class CurriculumImporter:
+    """
+    Buffers import records and writes them in batches of `batch_size`, one
+    transaction per batch.
+
+    Usage:
+        importer = CurriculumImporter(db, batch_size)
+        for line_no, record in ...:
+            await importer.add(line_no, record)
+        stats = await importer.finish()
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.stats = ImportStats()
+        self._pending: dict[str, list[tuple[int, dict]]] = {t: [] for t in RECORD_TYPES}
+        self._pending_count = 0
+        # Natural key -> id of everything seen so far; a curriculum has far fewer chapters than blocks
+        self._subject_ids: dict[tuple, uuid.UUID] = {}
+        self._chapter_ids: dict[tuple, uuid.UUID] = {}
+        # Chapters whose search document is out of date once the batch is written
+        self._reindex: set[uuid.UUID] = set()
+
+    async def add(self, line_no: int, record: dict):
+        record_type = record.get("type") if isinstance(record, dict) else None
+        if record_type == "meta":
+            if record.get("format") != FORMAT or (record.get("version") or 0) > FORMAT_VERSION:
+                raise ValueError(f"Unsupported export format {record.get('format')!r} version {record.get('version')!r}")
+            return
+        if record_type not in RECORD_TYPES:
+            self.stats.skip(line_no, f"unknown record type {record_type!r}")
+            return
+        self._pending[record_type].append((line_no, record))
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            await self.flush()
+
+    async def import_lines(self, lines: AsyncIterator[bytes]) -> ImportStats:
+        """Parse and import a JSONL stream."""
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            self.stats.lines = line_no
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self.stats.skip(line_no, f"invalid JSON ({e})")
+                continue
+            await self.add(line_no, record)
+        return await self.finish()
+
+    async def finish(self) -> ImportStats:
+        await self.flush()
+        return self.stats
+
+    async def flush(self):
+        """Write everything buffered, parents first, and commit."""
+        if not self._pending_count:
+            return
+        created_subjects = await self._flush_subjects(self._pending["subject"])
+        created_chapters = await self._flush_chapters(self._pending["chapter"])
+        await self._flush_content_blocks(self._pending["content_block"])
+        await self._flush_chapter_images(self._pending["chapter_image"])
+        await search_service.reindex_chapters(self.db, self._reindex)
+        if created_subjects:
+            await stats_service.increment(self.db, stats_service.SUBJECTS, created_subjects)
+        if created_chapters:
+            await stats_service.increment(self.db, stats_service.CHAPTERS, created_chapters)
+        await bump_curriculum_version(self.db)
+        await self.db.commit()
+
+        self.stats.batches += 1
+        self._pending = {t: [] for t in RECORD_TYPES}
+        self._pending_count = 0
+        self._reindex = set()
+        logger.info("Imported batch %d (%d lines so far)", self.stats.batches, self.stats.lines)
+
+    # Natural key resolution
+
+    async def _resolve_subjects(self, keys: set[tuple]):
+        missing = {key for key in keys if key not in self._subject_ids}
+        if missing:
+            result = await self.db.execute(
+                select(Subject.grade_level, Subject.name, Subject.id)
+                .where(_key_filter(Subject.grade_level, Subject.name, missing))
+                .order_by(Subject.id)
+            )
+            for grade_level, name, subject_id in result:
+                if (grade_level, name) in missing:
+                    self._subject_ids.setdefault((grade_level, name), subject_id)
+
+    async def _lookup_chapters(self, keys: set[tuple]):
+        missing = {key for key in keys if key not in self._chapter_ids}
+        if missing:
+            result = await self.db.execute(
+                select(Chapter.subject_id, Chapter.title, Chapter.id)
+                .where(_key_filter(Chapter.subject_id, Chapter.title, missing))
+                .order_by(Chapter.id)
+            )
+            for subject_id, title, chapter_id in result:
+                if (subject_id, title) in missing:
+                    self._chapter_ids.setdefault((subject_id, title), chapter_id)
+
+    async def _resolve_chapters(self, records: list[tuple[int, dict]]) -> list[tuple[int, dict, uuid.UUID]]:
+        """Records whose chapter exists (in the database or an earlier line), with its id."""
+        await self._resolve_subjects({_subject_key(record) for _, record in records})
+        keys = {
+            (self._subject_ids[_subject_key(record)], record.get("chapter"))
+            for _, record in records
+            if _subject_key(record) in self._subject_ids
+        }
+        await self._lookup_chapters(keys)
+
+        resolved = []
+        for line_no, record in records:
+            subject_id = self._subject_ids.get(_subject_key(record))
+            chapter_id = self._chapter_ids.get((subject_id, record.get("chapter")))
+            if chapter_id is None:
+                self.stats.skip(line_no, f"unknown chapter {record.get('chapter')!r} in {_subject_key(record)}")
+                continue
+            resolved.append((line_no, record, chapter_id))
+        return resolved
+
+    # Upserts, one multi-row statement per type
+
+    async def _flush_subjects(self, records: list[tuple[int, dict]]) -> int:
+        rows = {}
+        for line_no, record in records:
+            if not isinstance(record.get("name"), str) or not isinstance(record.get("grade_level"), int):
+                self.stats.skip(line_no, "subject needs a name and an integer grade_level")
+                continue
+            rows[(record["grade_level"], record["name"])] = {
+                "grade_level": record["grade_level"],
+                "name": record["name"],
+                "description": record.get("description"),
+                "icon_name": record.get("icon_name")
+            }
+        if not rows:
+            return 0
+        for row in rows.values():
+            row["id"] = uuid.uuid4()
+
+        stmt = dialect_insert(self.db, Subject)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Subject.grade_level, Subject.name],
+            set_={"description": stmt.excluded.description, "icon_name": stmt.excluded.icon_name}
+        ).returning(Subject.grade_level, Subject.name, Subject.id)
+        created = 0
+        for grade_level, name, subject_id in await self.db.execute(stmt, list(rows.values())):
+            key = (grade_level, name)
+            # A row that already existed keeps its id
+            created += subject_id == rows[key]["id"]
+            self._subject_ids[key] = subject_id
+        self.stats.subjects += len(rows)
+        self.stats.created += created
+        return created
+
+    async def _flush_chapters(self, records: list[tuple[int, dict]]) -> int:
+        await self._resolve_subjects({_subject_key(record) for _, record in records})
+        rows = {}
+        for line_no, record in records:
+            if not isinstance(record.get("title"), str) or not record["title"]:
+                self.stats.skip(line_no, "chapter needs a title")
+                continue
+            subject_id = self._subject_ids.get(_subject_key(record))
+            if subject_id is None:
+                self.stats.skip(line_no, f"unknown subject {_subject_key(record)}")
+                continue
+            rows[(subject_id, record["title"])] = {
+                "subject_id": subject_id,
+                "title": record["title"],
+                "order_index": record.get("order_index") or 0,
+                "description": record.get("description")
+            }
+        if not rows:
+            return 0
+        for row in rows.values():
+            row["id"] = uuid.uuid4()
+
+        stmt = dialect_insert(self.db, Chapter)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Chapter.subject_id, Chapter.title],
+            set_={"order_index": stmt.excluded.order_index, "description": stmt.excluded.description}
+        ).returning(Chapter.subject_id, Chapter.title, Chapter.id)
+        created = 0
+        for subject_id, title, chapter_id in await self.db.execute(stmt, list(rows.values())):
+            key = (subject_id, title)
+            created += chapter_id == rows[key]["id"]
+            self._chapter_ids[key] = chapter_id
+            self._reindex.add(chapter_id)
+        self.stats.chapters += len(rows)
+        self.stats.created += created
+        return created
+
+    async def _flush_content_blocks(self, records: list[tuple[int, dict]]):
+        rows = {}
+        for line_no, record, chapter_id in await self._resolve_chapters(records):
+            block_type, content_data = record.get("block_type"), record.get("content_data")
+            if not isinstance(block_type, str) or not isinstance(content_data, dict):
+                self.stats.skip(line_no, "content block needs a block_type and a content_data object")
+                continue
+            if block_type == "quiz":
+                try:
+                    content_data = quiz_service.normalize_quiz(content_data)
+                except ValueError as e:
+                    self.stats.skip(line_no, str(e))
+                    continue
+            rows[(chapter_id, block_type)] = {
+                "id": uuid.uuid4(),
+                "chapter_id": chapter_id,
+                "block_type": block_type,
+                "content_data": content_data,
+                **content_metadata(content_data),
+                "ai_model_used": record.get("ai_model_used")
+            }
+        if not rows:
+            return
+
+        # A chapter has one block of each type
+        stmt = dialect_insert(self.db, ContentBlock)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ContentBlock.chapter_id, ContentBlock.block_type],
+            set_={
+                "content_data": stmt.excluded.content_data,
+                "content_size": stmt.excluded.content_size,
+                "content_hash": stmt.excluded.content_hash,
+                "ai_model_used": stmt.excluded.ai_model_used,
+                # Same rule as ORM edits: only a changed document gets a new version
+                "content_version": case(
+                    (ContentBlock.content_hash == stmt.excluded.content_hash, ContentBlock.content_version),
+                    else_=ContentBlock.content_version + 1
+                )
+            }
+        ).returning(ContentBlock.chapter_id, ContentBlock.block_type, ContentBlock.id)
+        for chapter_id, block_type, block_id in await self.db.execute(stmt, list(rows.values())):
+            self.stats.created += block_id == rows[(chapter_id, block_type)]["id"]
+        self._reindex.update(chapter_id for chapter_id, block_type in rows if block_type == "lesson")
+        self.stats.content_blocks += len(rows)
+
+    async def _flush_chapter_images(self, records: list[tuple[int, dict]]):
+        resolved = await self._resolve_chapters(records)
+        if not resolved:
+            return
+
+        # Images are matched by content hash, falling back to the exported id (pre-dedup uploads)
+        hashes = {record["image_hash"] for _, record, _ in resolved if record.get("image_hash")}
+        image_ids = set()
+        for _, record, _ in resolved:
+            try:
+                image_ids.add(uuid.UUID(str(record.get("image_id"))))
+            except ValueError:
+                pass
+        by_hash, by_id = {}, {}
+        if hashes:
+            result = await self.db.execute(
+                select(Image.content_hash, Image.id).where(Image.content_hash.in_(hashes)).order_by(Image.created_at)
+            )
+            for image_hash, image_id in result:
+                by_hash.setdefault(image_hash, image_id)
+        if image_ids:
+            result = await self.db.execute(select(Image.id).where(Image.id.in_(image_ids)))
+            by_id = {str(image_id): image_id for image_id in result.scalars()}
+
+        rows = {}
+        for line_no, record, chapter_id in resolved:
+            image_id = by_hash.get(record.get("image_hash"))
+            if image_id is None:
+                image_id = by_id.get(str(record.get("image_id")))
+            if image_id is None:
+                self.stats.skip(line_no, f"image {record.get('image_hash') or record.get('image_id')} is not uploaded here")
+                continue
+            rows[(chapter_id, image_id)] = {
+                "chapter_id": chapter_id,
+                "image_id": image_id,
+                "display_order": record.get("display_order") or 0,
+                "caption": record.get("caption")
+            }
+        if not rows:
+            return
+
+        result = await self.db.execute(
+            select(ChapterImage.chapter_id, ChapterImage.image_id, ChapterImage.id)
+            .where(_key_filter(ChapterImage.chapter_id, ChapterImage.image_id, rows))
+        )
+        existing = {
+            (chapter_id, image_id): association_id
+            for chapter_id, image_id, association_id in result
+            if (chapter_id, image_id) in rows
+        }
+        for key, row in rows.items():
+            if key in existing:
+                row["id"] = existing[key]
+            else:
+                row["id"] = uuid.uuid4()
+                self.stats.created += 1
+
+        stmt = dialect_insert(self.db, ChapterImage)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChapterImage.id],
+            set_={"display_order": stmt.excluded.display_order, "caption": stmt.excluded.caption}
+        )
+        await self.db.execute(stmt, list(rows.values()))
+        self.stats.chapter_images += len(rows)
+
+
+def _key_filter(first, second, keys) -> object:
+    """
+    Narrow a lookup to the (first, second) pairs in `keys`; callers still
+    check the exact pair. Two IN lists use the composite index on every
+    backend, where a row-value IN is a full table scan on SQLite.
+    """
+    return and_(first.in_({a for a, _ in keys}), second.in_({b for _, b in keys}))
+
+
+def _subject_key(record: dict) -> tuple:
+    return (record.get("grade_level"), record.get("subject"))
@@ -0,0 +1,268 @@
+"""
+Resized / transcoded variants of uploaded images.
+
+Derivatives are rendered once in a process pool and kept in a disk cache
+under a deterministic key, so every worker and every restart reuses the
+same files. The cache is bounded by `IMAGE_DERIVATIVE_CACHE_BYTES` and
+evicts least-recently-served files first (a hit bumps the file's mtime).
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image as PILImage, ImageOps, features
+
+from app.core.config import settings
+from app.services.image_processing import ORIENTATION_TAG, shard_relpath
+
+logger = logging.getLogger(__name__)
+
+# Output format name -> (PIL format, mime type, file extension)
+OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+    "png": ("PNG", "image/png", ".png"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "avif": ("AVIF", "image/avif", ".avif"),
+}
+
+# Mime type of an original upload -> output format name used when none is requested
+MIME_TO_FORMAT = {
+    "image/jpeg": "jpeg",
+    "image/jpg": "jpeg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/gif": "png",
+}
+
+
+def supported_formats() -> set[str]:
+    """Output formats this Pillow build can encode."""
+    formats = {"jpeg", "png"}
+    if features.check("webp"):
+        formats.add("webp")
+    if features.check("avif"):
+        formats.add("avif")
+    return formats
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest configured width."""
+    for allowed in sorted(settings.IMAGE_DERIVATIVE_WIDTHS):
+        if width <= allowed:
+            return allowed
+    return max(settings.IMAGE_DERIVATIVE_WIDTHS)
+
+
+def derivative_key(source_name: str, width: int, fmt: str) -> str:
+    """Deterministic cache filename for a derivative of `source_name`."""
+    stem = Path(source_name).stem
+    return f"{stem}_w{width}{OUTPUT_FORMATS[fmt][2]}"
+
+
+def render_derivative(source: str, dest: str, width: int, fmt: str, quality: int) -> int:
+    """
+    Resize `source` to at most `width` pixels wide and encode it as `fmt`.
+
+    Runs inside the process pool. Writes to a temp file and renames it into
+    place so readers never see a half-written derivative. Returns the size
+    of the written file.
+    """
+    pil_format = OUTPUT_FORMATS[fmt][0]
+    with PILImage.open(source) as img:
+        # Only decode what we need: JPEG can downscale while decoding. Orientations 5-8 rotate by
+        # 90 degrees, so the stored width becomes the displayed height
+        if img.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+            img.draft("RGB", (width * 4, width))
+        else:
+            img.draft("RGB", (width, width * 4))
+        # Originals keep their EXIF orientation unless IMAGE_OPTIMIZE_UPLOADS applied it; derivatives
+        # carry no EXIF, so the rotation is baked into their pixels
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+        if pil_format == "JPEG" and has_alpha:
+            # JPEG has no alpha channel and dropping it turns transparent pixels black; flatten onto white
+            rgba = img.convert("RGBA")
+            img = PILImage.new("RGB", rgba.size, "white")
+            img.paste(rgba, mask=rgba.getchannel("A"))
+        else:
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "PA", "P") and pil_format != "JPEG" else "RGB")
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), PILImage.Resampling.LANCZOS)
+
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        save_kwargs = {"optimize": True} if pil_format in ("JPEG", "PNG") else {}
+        if pil_format != "PNG":
+            save_kwargs["quality"] = quality
+        img.save(tmp, pil_format, **save_kwargs)
+
+    os.replace(tmp, dest)
+    return os.path.getsize(dest)
+
+
+def _scan_files(directory: str):
+    """Yield every file entry below `directory`."""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _touch(path: Path) -> bool:
+    """Mark a cached derivative as recently used. Returns False if it is gone."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _evict(cache_dir: Path, budget: int) -> tuple[int, int]:
+    """
+    Delete least-recently-used derivatives until the cache fits in 90% of
+    `budget`. Returns (bytes remaining, files removed).
+    """
+    entries = []
+    total = 0
+    for entry in _scan_files(cache_dir):
+        if entry.name.endswith(".tmp"):
+            continue
+        stat = entry.stat()
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    removed = 0
+    target = int(budget * 0.9)
+    if total > budget:
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return total, removed
+
+
+class DerivativeCache:
+    """Disk cache of image derivatives backed by a process pool."""
+
+    def __init__(self, cache_dir: Path, io_executor):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.budget = settings.IMAGE_DERIVATIVE_CACHE_BYTES
+        self._io_executor = io_executor
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        # Bytes written since the last eviction pass; None until the first scan
+        self._approx_size: Optional[int] = None
+
+    def process_pool(self) -> ProcessPoolExecutor:
+        """Pool for CPU-bound PIL work; upload optimization runs here too."""
+        # Created lazily so importing the app never forks
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+        return self._pool
+
+    def path_for(self, key: str) -> Path:
+        # Same ab/cd/ sharding as the originals; keys start with the source's stem
+        return self.cache_dir / shard_relpath(key)
+
+    async def lookup(self, source_name: str, width: int, fmt: str) -> Optional[Path]:
+        """Path of a derivative if it is already cached (counts as a hit), else None."""
+        loop = asyncio.get_running_loop()
+        path = self.path_for(derivative_key(source_name, width, fmt))
+        if await loop.run_in_executor(self._io_executor, _touch, path):
+            return path
+        return None
+
+    async def get_or_create(
+        self,
+        source: Path,
+        source_name: str,
+        width: int,
+        fmt: str
+    ) -> Path:
+        """
+        Return the path of a derivative, rendering it if it isn't cached yet.
+        Concurrent requests for the same derivative share one render.
+        """
+        loop = asyncio.get_running_loop()
+        key = derivative_key(source_name, width, fmt)
+        path = self.path_for(key)
+
+        if await loop.run_in_executor(self._io_executor, _touch, path):
+            return path
+
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = loop.create_future()
+            self._inflight[key] = pending
+            try:
+                size = await loop.run_in_executor(
+                    self.process_pool(),
+                    render_derivative,
+                    str(source), str(path), width, fmt, settings.IMAGE_DERIVATIVE_QUALITY
+                )
+            except Exception as e:
+                pending.set_exception(e)
+                # Nobody else may be waiting; don't leave an unretrieved exception behind
+                pending.exception()
+                raise
+            except BaseException:
+                pending.cancel()
+                raise
+            else:
+                pending.set_result(path)
+            finally:
+                del self._inflight[key]
+            await self._account(size)
+            return path
+
+        return await asyncio.shield(pending)
+
+    async def _account(self, size: int):
+        """Track bytes written and run an eviction pass when over budget."""
+        loop = asyncio.get_running_loop()
+        if self._approx_size is not None:
+            self._approx_size += size
+            if self._approx_size <= self.budget:
+                return
+        total, removed = await loop.run_in_executor(
+            self._io_executor, _evict, self.cache_dir, self.budget
+        )
+        self._approx_size = total
+        if removed:
+            logger.info("Evicted %d image derivatives, cache now %d bytes", removed, total)
+
+    async def pregenerate(self, source: Path, source_name: str, mime_type: str):
+        """Render the configured common sizes for a freshly uploaded image."""
+        fmt = "webp" if "webp" in supported_formats() else MIME_TO_FORMAT.get(mime_type, "jpeg")
+        for width in settings.IMAGE_PREGENERATE_WIDTHS:
+            try:
+                await self.get_or_create(source, source_name, width, fmt)
+            except Exception:
+                logger.exception("Failed to pre-generate %dpx derivative of %s", width, source_name)
+
+    def remove_for(self, source_name: str):
+        """Delete every cached derivative of an image. Blocking; run on an executor."""
+        prefix = f"{Path(source_name).stem}_w"
+        shard_dir = self.path_for(prefix).parent
+        if not shard_dir.is_dir():
+            return
+        with os.scandir(shard_dir) as it:
+            for entry in it:
+                if entry.name.startswith(prefix):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
@@ -0,0 +1,170 @@
+"""
+Blocking image helpers.
+
+Everything in this module does disk or PIL work and must not be called
+directly from a request handler; `ImageService` dispatches these onto its
+bounded executor.
+"""
+import io
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from PIL import Image as PILImage, ImageOps, UnidentifiedImageError
+
+# PIL format name -> (mime type, file extension)
+FORMAT_INFO = {
+    "JPEG": ("image/jpeg", ".jpg"),
+    "PNG": ("image/png", ".png"),
+    "GIF": ("image/gif", ".gif"),
+    "WEBP": ("image/webp", ".webp"),
+}
+
+# EXIF tag holding the camera orientation
+ORIENTATION_TAG = 0x0112
+
+# Image.info keys that only describe how to decode or display the pixels. Anything else (EXIF,
+# XMP, comments, text chunks, ...) is metadata that optimize_image must not keep
+DECODING_INFO_KEYS = frozenset({
+    "icc_profile", "dpi", "jfif", "jfif_version", "jfif_unit", "jfif_density", "adobe",
+    "adobe_transform", "progressive", "progression", "gamma", "srgb", "chromaticity",
+    "transparency", "aspect", "interlace", "background", "duration", "loop", "version",
+})
+
+
+@dataclass(frozen=True)
+class ImageProbe:
+    """What we learned about an upload from its header."""
+    format: str
+    mime_type: str
+    extension: str
+    width: Optional[int]
+    height: Optional[int]
+
+
+def probe_image(source: Union[bytes, Path]) -> ImageProbe:
+    """
+    Sniff the real type and dimensions of an image from its bytes or a file.
+
+    `PILImage.open` only parses the header; pixel data is never decoded
+    because we never call `load()`, so this stays cheap for large uploads.
+
+    Raises:
+        ValueError: If the bytes are not an image in a supported format
+    """
+    try:
+        with PILImage.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            fmt = img.format
+            width, height = img.size
+    except (UnidentifiedImageError, OSError, PILImage.DecompressionBombError) as e:
+        # A decompression bomb is an Exception, not an OSError, and must not become a 500
+        raise ValueError("File is not a valid image") from e
+
+    if fmt not in FORMAT_INFO:
+        raise ValueError(f"Unsupported image format: {fmt}")
+
+    mime_type, extension = FORMAT_INFO[fmt]
+    return ImageProbe(
+        format=fmt,
+        mime_type=mime_type,
+        extension=extension,
+        width=width,
+        height=height
+    )
+
+
+@dataclass(frozen=True)
+class OptimizedImage:
+    """Result of `optimize_image` when the optimized file should replace the upload."""
+    width: int
+    height: int
+    file_size: int
+
+
+def optimize_image(source: str, dest: str, max_dimension: int, quality: int) -> Optional[OptimizedImage]:
+    """
+    Re-encode an upload without metadata, upright and at most `max_dimension` pixels on its longest side.
+
+    Runs inside the process pool. The format is kept, so the file keeps its
+    type and extension. EXIF (including GPS) and text chunks are dropped;
+    the ICC profile is kept because colours depend on it.
+
+    Returns None if the upload should be stored as is: animated images, and
+    files without metadata that needed no rotation or resize and would not
+    get smaller. A file with metadata is always replaced, even by a larger
+    re-encode, so its EXIF (GPS included) is never stored.
+    """
+    with PILImage.open(source) as img:
+        fmt = img.format
+        if getattr(img, "n_frames", 1) > 1:
+            return None
+        icc_profile = img.info.get("icc_profile")
+        exif = img.getexif()
+        orientation = exif.get(ORIENTATION_TAG, 1)
+        has_metadata = len(exif) > 0 or any(key not in DECODING_INFO_KEYS for key in img.info)
+        img = ImageOps.exif_transpose(img)
+        resized = max(img.size) > max_dimension
+        if resized:
+            # thumbnail() keeps the aspect ratio and lets JPEG downscale while decoding
+            img.thumbnail((max_dimension, max_dimension), PILImage.Resampling.LANCZOS)
+
+        save_kwargs = {}
+        if icc_profile:
+            save_kwargs["icc_profile"] = icc_profile
+        if fmt == "JPEG":
+            save_kwargs.update(quality=quality, optimize=True, progressive=True)
+        elif fmt == "WEBP":
+            save_kwargs["quality"] = quality
+        elif fmt == "PNG":
+            save_kwargs["optimize"] = True
+        img.save(dest, fmt, **save_kwargs)
+        width, height = img.size
+
+    file_size = os.path.getsize(dest)
+    if not resized and orientation == 1 and not has_metadata and file_size >= os.path.getsize(source):
+        os.unlink(dest)
+        return None
+    return OptimizedImage(width=width, height=height, file_size=file_size)
+
+
+def shard_relpath(filename: str) -> str:
+    """
+    Location of a stored file relative to the images directory.
+
+    Names are hex hashes (or uuids for old uploads), so their first two
+    byte pairs spread files evenly: `ab/cd/abcd...png`.
+    """
+    return f"{filename[0:2]}/{filename[2:4]}/{filename}"
+
+
+def write_chunk(f: BinaryIO, hasher, chunk: bytes) -> None:
+    """Append a chunk of a streamed upload to its temp file and fold it into the hash."""
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def place_blob(tmp_path: Path, dest: Path) -> bool:
+    """
+    Move a fully written temp file to its content-addressed location.
+
+    Returns True if the blob is new. If a blob with the same name already
+    exists it holds identical bytes, so the temp file is simply discarded.
+    """
+    if dest.exists():
+        tmp_path.unlink(missing_ok=True)
+        return False
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, dest)
+    return True
+
+
+def remove_file(path: Path) -> None:
+    """Remove a file if it exists."""
+    path.unlink(missing_ok=True)
+
+
+def copy_file(src: Path, dest: Path) -> None:
+    """Copy a stored file to a local working location."""
+    shutil.copyfile(src, dest)
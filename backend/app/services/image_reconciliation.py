@@ -0,0 +1,356 @@
+"""
+Reconcile stored image files with the database.
+
+Walks the sharded images/ tree in name order and merge-joins it against one
+ordered stream of the file names the database references (blob filenames
+plus the own files of pre-dedup images). Neither side is ever loaded into
+memory as a whole. Two kinds of mismatch come out of the join:
+
+- orphan files: on disk but referenced by no row (an upload that failed
+  between writing its file and committing, or a delete whose unlink
+  failed). Reported, moved to the quarantine directory, or deleted.
+- missing files: referenced by a row but not on disk. Reported together
+  with the ids of the affected images.
+
+Both are re-checked against the database right before they are acted on,
+so uploads and deletes running concurrently are never misjudged, and files
+younger than `min_age` are left alone because an upload writes its file
+before committing its row.
+
+Progress is checkpointed after every batch, so an interrupted run resumes
+where it stopped. Run it with reconcile_images.py; it needs IMAGE_STORAGE_BACKEND=local.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import collate, select, union_all
+
+from app.core.database import AsyncSessionLocal
+from app.models.image import Image, ImageBlob
+from app.services.image_processing import shard_relpath
+from app.services.image_service import image_service
+from app.services.image_storage import SHARDED_LAYOUT_MARKER
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = ".reconcile-state.json"
+ACTIONS = ("report", "quarantine", "delete")
+
+
+@dataclass
+class ReconcileStats:
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    orphan_files: int = 0
+    orphan_bytes: int = 0
+    young_files_skipped: int = 0  # Orphan candidates newer than min_age
+    files_quarantined: int = 0
+    files_deleted: int = 0
+    bytes_reclaimed: int = 0
+    missing_files: int = 0
+    images_missing_files: int = 0
+    tmp_files_removed: int = 0
+    quarantine_files_purged: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class DiskEntry:
+    name: str
+    path: str
+    size: int
+    mtime: float
+
+
+def _scan_shard(shard_dir: str, after: str) -> list[DiskEntry]:
+    """Sorted files of one first-level shard (images/ab/*/*) with names > `after`."""
+    entries = []
+    with os.scandir(shard_dir) as leaves:
+        for leaf in leaves:
+            if not leaf.is_dir(follow_symlinks=False):
+                continue
+            with os.scandir(leaf.path) as files:
+                for entry in files:
+                    if entry.name > after and entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        entries.append(DiskEntry(entry.name, entry.path, stat.st_size, stat.st_mtime))
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+
+def _list_shards(images_dir: Path) -> list[str]:
+    with os.scandir(images_dir) as it:
+        return sorted(e.name for e in it if e.is_dir(follow_symlinks=False) and len(e.name) == 2)
+
+
+def _remove_old_files(directory: Path, max_age: float) -> int:
+    """Delete files in `directory` last modified more than `max_age` seconds ago."""
+    if not directory.is_dir():
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                try:
+                    os.unlink(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+    return removed
+
+
+def _purge_quarantine(quarantine_dir: Path, max_age: float) -> int:
+    """Delete quarantined files older than `max_age` seconds. Returns how many were removed."""
+    if not quarantine_dir.is_dir():
+        return 0
+    removed = 0
+    for shard in sorted(os.listdir(quarantine_dir)):
+        shard_dir = quarantine_dir / shard
+        if not shard_dir.is_dir():
+            continue
+        for leaf in sorted(os.listdir(shard_dir)):
+            removed += _remove_old_files(shard_dir / leaf, max_age)
+    return removed
+
+
+def _quarantine_file(path: str, dest: Path):
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(path, dest)
+    # Age in quarantine is measured from now, not from the upload
+    os.utime(dest)
+
+
+class ImageReconciler:
+    """One reconciliation run over the upload directory."""
+
+    def __init__(
+        self,
+        action: str = "report",
+        min_age: float = 3600,
+        batch_size: int = 1000,
+        purge_quarantine_after: Optional[float] = None
+    ):
+        if action not in ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(ACTIONS)}")
+        self.action = action
+        self.min_age = min_age
+        self.batch_size = batch_size
+        self.purge_quarantine_after = purge_quarantine_after
+
+        self.storage = image_service.local_storage()
+        self.images_dir = self.storage.root
+        root = self.images_dir.parent
+        self.quarantine_dir = root / "quarantine"
+        self.report_dir = root / "reconcile"
+        self.state_path = self.report_dir / STATE_FILE
+
+        self.stats = ReconcileStats()
+        self.position = ""  # Every name <= position has been reconciled
+        self.report_path: Optional[Path] = None
+
+
+    def _load_state(self):
+        try:
+            state = json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            return
+        self.position = state["position"]
+        self.stats = ReconcileStats(**state["stats"])
+        self.report_path = Path(state["report"])
+        logger.info("Resuming reconciliation after %s", self.position)
+
+    def _save_state(self):
+        state = {"position": self.position, "stats": asdict(self.stats), "report": str(self.report_path)}
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, self.state_path)
+
+    def _report(self, records: list[dict]):
+        with open(self.report_path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+
+    async def _disk_entries(self) -> AsyncIterator[DiskEntry]:
+        shards = await asyncio.to_thread(_list_shards, self.images_dir)
+        for shard in shards:
+            # Whole shards before the checkpoint need not be scanned at all
+            if shard < self.position[:2]:
+                continue
+            entries = await asyncio.to_thread(_scan_shard, str(self.images_dir / shard), self.position)
+            for entry in entries:
+                yield entry
+
+    async def _referenced_names(self, db) -> AsyncIterator[str]:
+        """Every stored file name the database references, in byte order."""
+        names = union_all(
+            select(ImageBlob.filename.label("name")),
+            select(Image.filename.label("name")).where(Image.content_hash.is_(None))
+        ).subquery()
+        # Compare and sort by code point like Python does, whatever the database locale
+        binary = "C" if db.get_bind().dialect.name == "postgresql" else "BINARY"
+        name = collate(names.c.name, binary)
+        query = select(names.c.name).where(name > self.position).order_by(name)
+
+        result = await db.stream(query.execution_options(yield_per=self.batch_size))
+        async for (value,) in result:
+            yield value
+
+
+    async def _still_referenced(self, names: list[str]) -> dict[str, list[str]]:
+        """Of `names`, those referenced right now, each with the ids of its images."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ImageBlob.filename, Image.id)
+                .join(Image, Image.content_hash == ImageBlob.content_hash, isouter=True)
+                .where(ImageBlob.filename.in_(names))
+            )
+            referenced: dict[str, list[str]] = {}
+            for filename, image_id in result.all():
+                ids = referenced.setdefault(filename, [])
+                if image_id is not None:
+                    ids.append(str(image_id))
+
+            result = await db.execute(
+                select(Image.filename, Image.id)
+                .where(Image.filename.in_(names), Image.content_hash.is_(None))
+            )
+            for filename, image_id in result.all():
+                referenced.setdefault(filename, []).append(str(image_id))
+        return referenced
+
+    async def _handle_orphans(self, orphans: list[DiskEntry]):
+        cutoff = time.time() - self.min_age
+        candidates = []
+        for entry in orphans:
+            if entry.mtime > cutoff:
+                self.stats.young_files_skipped += 1
+            else:
+                candidates.append(entry)
+        if not candidates:
+            return
+
+        # A row may have been committed since the name stream passed this point
+        referenced = await self._still_referenced([e.name for e in candidates])
+        records = []
+        for entry in candidates:
+            if entry.name in referenced:
+                continue
+            self.stats.orphan_files += 1
+            self.stats.orphan_bytes += entry.size
+            action = self.action
+            try:
+                if action == "quarantine":
+                    await asyncio.to_thread(
+                        _quarantine_file, entry.path, self.quarantine_dir / shard_relpath(entry.name)
+                    )
+                    self.stats.files_quarantined += 1
+                elif action == "delete":
+                    await asyncio.to_thread(os.unlink, entry.path)
+                    self.stats.files_deleted += 1
+                    self.stats.bytes_reclaimed += entry.size
+                if action != "report":
+                    await asyncio.to_thread(image_service.derivatives.remove_for, entry.name)
+            except FileNotFoundError:
+                action = "gone"
+            except OSError as e:
+                logger.warning("Could not %s orphan %s: %s", action, entry.path, e)
+                action = "failed"
+            records.append({"kind": "orphan_file", "name": entry.name, "size": entry.size, "action": action})
+        self._report(records)
+
+    async def _handle_missing(self, names: list[str]):
+        # The image may have been deleted since the name stream read it
+        referenced = await self._still_referenced(names)
+        still_missing = await asyncio.to_thread(
+            lambda: [n for n in names if n in referenced and not self.storage.path_for(n).exists()]
+        )
+        records = []
+        for name in still_missing:
+            self.stats.missing_files += 1
+            self.stats.images_missing_files += len(referenced[name])
+            records.append({"kind": "missing_file", "name": name, "image_ids": referenced[name]})
+        self._report(records)
+
+
+    async def run(self) -> ReconcileStats:
+        if not (self.images_dir / SHARDED_LAYOUT_MARKER).exists():
+            raise RuntimeError("Uploads are not in the sharded layout yet; run shard_uploads.py first")
+
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        self._load_state()
+        if self.report_path is None:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.report_path = self.report_dir / f"report-{stamp}.jsonl"
+        started = time.perf_counter() - self.stats.seconds
+
+        orphans: list[DiskEntry] = []
+        missing: list[str] = []
+
+        async def flush(position: str):
+            if orphans:
+                await self._handle_orphans(orphans)
+                orphans.clear()
+            if missing:
+                await self._handle_missing(missing)
+                missing.clear()
+            self.position = position
+            self.stats.seconds = time.perf_counter() - started
+            await asyncio.to_thread(self._save_state)
+
+        async with AsyncSessionLocal() as db:
+            disk_it = self._disk_entries()
+            names_it = self._referenced_names(db)
+            disk = await anext(disk_it, None)
+            name = await anext(names_it, None)
+            processed = 0
+
+            while disk is not None or name is not None:
+                if name is None or (disk is not None and disk.name < name):
+                    orphans.append(disk)
+                    current = disk.name
+                elif disk is None or name < disk.name:
+                    missing.append(name)
+                    current = name
+                else:
+                    current = name
+                if disk is not None and disk.name == current:
+                    self.stats.files_scanned += 1
+                    self.stats.bytes_scanned += disk.size
+                    disk = await anext(disk_it, None)
+                if name is not None and name == current:
+                    name = await anext(names_it, None)
+
+                processed += 1
+                if processed % self.batch_size == 0 or len(orphans) + len(missing) >= self.batch_size:
+                    await flush(current)
+                    logger.info("Reconciled up to %s (%d files)", current, self.stats.files_scanned)
+
+            await flush(self.position)
+
+        # Failed uploads also leave partial files in tmp/
+        self.stats.tmp_files_removed += await asyncio.to_thread(
+            _remove_old_files, image_service.tmp_dir, self.min_age
+        )
+        if self.purge_quarantine_after is not None:
+            self.stats.quarantine_files_purged += await asyncio.to_thread(
+                _purge_quarantine, self.quarantine_dir, self.purge_quarantine_after
+            )
+
+        self.stats.seconds = time.perf_counter() - started
+        (self.report_dir / "last-run.json").write_text(json.dumps(
+            {"finished_at": datetime.now(timezone.utc).isoformat(), "report": str(self.report_path), **asdict(self.stats)},
+            indent=2
+        ))
+        # Finished: the next run starts from the beginning with a new report
+        self.state_path.unlink(missing_ok=True)
+        return self.stats
+
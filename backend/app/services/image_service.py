@@ -1,29 +1,121 @@
 import os
 import uuid
 import shutil
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional, BinaryIO
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
-from PIL import Image as PILImage
+from sqlalchemy.orm import joinedload
+from sqlalchemy import func, or_, update, delete, insert, text, column, literal_column, case
 
 from app.core.config import settings
-from app.models.image import Image, ChapterImage
+from app.core.cache import LRUCache
+from app.core.database import dialect_insert
+from app.core.instrumentation import record_upload_optimized
+from app.core.pagination import keyset_query, split_page
+from app.models.image import Image, ImageBlob, ChapterImage
+from app.models.curriculum import Chapter
 from app.models.user import User
+from app.services import image_processing
+from app.services.image_processing import ImageProbe
+from app.services.image_derivatives import DerivativeCache, MIME_TO_FORMAT, OUTPUT_FORMATS, snap_width
+from app.services.image_storage import LocalStorage, StorageBackend, create_storage
+
+# Size of each read from an incoming upload stream
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# FTS5's trigram tokenizer can't match shorter search terms
+FTS_MIN_TERM_LENGTH = 3
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StagedUpload:
+    """An upload that has been streamed to a temp file, hashed and validated."""
+    tmp_path: Path
+    content_hash: str
+    file_size: int
+    probe: ImageProbe
+    bytes_saved: int = 0  # By upload optimization; file_size is the size after it
+    
+    @property
+    def blob_filename(self) -> str:
+        return f"{self.content_hash}{self.probe.extension}"
+
+@dataclass
+class BatchUploadResult:
+    """Outcome of one file in a batch upload."""
+    original_filename: str
+    image: Optional[Image] = None
+    display_order: Optional[int] = None  # Set when the image was attached to a chapter
+    error: Optional[str] = None
+
+@dataclass
+class ImagePage:
+    """One page of `list_images`."""
+    images: list[Image]
+    next_cursor: Optional[str]  # None on the last page
+    total: Optional[int]  # None unless a count was requested
+    total_is_estimate: bool = False
+
+@dataclass(frozen=True)
+class ImageFileInfo:
+    """Immutable facts about an image's stored bytes, cached per image id."""
+    stored_name: str
+    original_filename: str
+    mime_type: str
+    width: Optional[int]
+    content_tag: str  # Content hash, used to build ETags
+    
+    def etag(self, variant: Optional[str] = None) -> str:
+        """Strong ETag for the original or for a derivative variant."""
+        return f'"{self.content_tag}-{variant}"' if variant else f'"{self.content_tag}"'
 
 class ImageService:
     """Service for handling image uploads and management."""
     
     def __init__(self):
         self.upload_dir = Path(settings.UPLOAD_DIR) / "images"
-        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir = Path(settings.UPLOAD_DIR) / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        # Bounded pool for blocking disk and PIL work so it never runs on the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix="image-io"
+        )
+        self.derivatives = DerivativeCache(Path(settings.UPLOAD_DIR) / "derivatives", self._executor)
+        # Original uploads: local disk or an S3-compatible bucket
+        self.storage: StorageBackend = create_storage(self.upload_dir, self._executor)
+        # stored name -> (presigned URL, time after which a fresh one is signed)
+        self._presigned_cache = LRUCache(settings.IMAGE_METADATA_CACHE_SIZE)
+        # Strong references to fire-and-forget tasks so they aren't garbage collected
+        self._background_tasks: set[asyncio.Task] = set()
+        # image id -> ImageFileInfo for serve_image
+        self._file_info_cache = LRUCache(settings.IMAGE_METADATA_CACHE_SIZE)
+        # Whether the SQLite FTS5 search table exists; checked on first search
+        self._fts_available: Optional[bool] = None
+    
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking function on the image executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
     
-    def _generate_unique_filename(self, original_filename: str) -> str:
-        """Generate a unique filename using UUID while preserving extension."""
-        ext = Path(original_filename).suffix.lower()
-        return f"{uuid.uuid4()}{ext}"
+    def _generate_unique_filename(self, extension: str) -> str:
+        """Generate a unique filename using UUID with the given extension."""
+        return f"{uuid.uuid4()}{extension}"
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background without awaiting it."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
     def _validate_file_type(self, mime_type: str) -> bool:
         """Validate if the file type is allowed."""
@@ -33,13 +125,213 @@ class ImageService:
         """Validate if the file size is within limits."""
         return file_size <= settings.MAX_FILE_SIZE
     
-    def _get_image_dimensions(self, file_path: Path) -> tuple[Optional[int], Optional[int]]:
-        """Get image dimensions using PIL."""
+    async def _stage_upload(self, file: UploadFile) -> StagedUpload:
+        """
+        Stream an upload to a temp file, hashing it as it arrives.
+        
+        Raises:
+            HTTPException: If the file is too large or not an allowed image
+        """
+        tmp_path = self.tmp_dir / f"{uuid.uuid4()}.part"
+        hasher = hashlib.sha256()
+        file_size = 0
+        
+        try:
+            f = await self._run_blocking(open, tmp_path, "wb")
+            try:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    file_size += len(chunk)
+                    # Validate file size before buffering any more of it
+                    if not self._validate_file_size(file_size):
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+                        )
+                    await self._run_blocking(image_processing.write_chunk, f, hasher, chunk)
+            finally:
+                await self._run_blocking(f.close)
+            
+            # Sniff the real type and dimensions from the bytes rather than trusting file.content_type
+            try:
+                probe = await self._run_blocking(image_processing.probe_image, tmp_path)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            # Validate file type
+            if not self._validate_file_type(probe.mime_type):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File type {probe.mime_type} not allowed. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
+                )
+        except BaseException:
+            await self._run_blocking(image_processing.remove_file, tmp_path)
+            raise
+        
+        return StagedUpload(
+            tmp_path=tmp_path,
+            content_hash=hasher.hexdigest(),
+            file_size=file_size,
+            probe=probe
+        )
+    
+    async def _optimize_upload(self, staged: StagedUpload) -> StagedUpload:
+        """
+        Strip metadata, apply EXIF orientation, cap the size and recompress a staged upload.
+        
+        Runs in the derivative process pool. The content hash stays that of
+        the uploaded bytes, so uploading the same original again still finds
+        the existing blob; such uploads are never optimized (see
+        _stored_blobs). If optimizing fails the upload is stored as it came
+        in.
+        """
+        out_path = self.tmp_dir / f"{uuid.uuid4()}.opt"
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self.derivatives.process_pool(),
+                image_processing.optimize_image,
+                str(staged.tmp_path),
+                str(out_path),
+                settings.IMAGE_MAX_DIMENSION,
+                settings.IMAGE_OPTIMIZE_QUALITY
+            )
+        except Exception:
+            logger.exception("Failed to optimize upload %s; storing it unchanged", staged.content_hash)
+            await self._run_blocking(image_processing.remove_file, out_path)
+            return staged
+        except BaseException:
+            await self._run_blocking(image_processing.remove_file, out_path)
+            await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+            raise
+        
+        if result is None:
+            return staged
+        
+        await self._run_blocking(os.replace, out_path, staged.tmp_path)
+        bytes_saved = staged.file_size - result.file_size
+        record_upload_optimized(staged.file_size, result.file_size)
+        logger.info(
+            "Optimized upload %s: %d -> %d bytes (%d saved)",
+            staged.content_hash, staged.file_size, result.file_size, bytes_saved
+        )
+        return replace(
+            staged,
+            file_size=result.file_size,
+            probe=replace(staged.probe, width=result.width, height=result.height),
+            bytes_saved=bytes_saved
+        )
+    
+    async def _stored_blobs(self, content_hashes: set[str], db: AsyncSession) -> dict:
+        """
+        Size and dimensions of the blobs already stored for some content hashes.
+        
+        An upload of bytes that are already stored is described by the
+        stored file rather than by optimizing its own copy, which would be
+        discarded and, if the optimize settings changed since, wouldn't
+        match. Dimensions come from the blob's first image.
+        """
+        first_image = (
+            select(Image.id)
+            .where(Image.content_hash == ImageBlob.content_hash)
+            .order_by(Image.created_at, Image.id)
+            .limit(1)
+            .correlate(ImageBlob)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(ImageBlob.content_hash, ImageBlob.file_size, Image.width, Image.height)
+            .outerjoin(Image, Image.id == first_image)
+            .where(ImageBlob.content_hash.in_(content_hashes))
+        )
+        return {row.content_hash: row for row in result}
+    
+    def _as_stored(self, staged: StagedUpload, blob) -> StagedUpload:
+        """A staged upload described by the blob already stored for its bytes."""
+        return replace(
+            staged,
+            file_size=blob.file_size,
+            probe=replace(staged.probe, width=blob.width, height=blob.height),
+            bytes_saved=0
+        )
+    
+    async def _optimize_limited(self, staged: StagedUpload, limit: asyncio.Semaphore) -> StagedUpload:
+        async with limit:
+            return await self._optimize_upload(staged)
+    
+    async def _store_blob(self, staged: StagedUpload):
+        """Move a staged upload into content-addressed storage."""
+        try:
+            await self.storage.put(staged.blob_filename, staged.tmp_path, staged.probe.mime_type)
+        except Exception as e:
+            await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    
+    async def _acquire_blob(self, staged: StagedUpload, db: AsyncSession) -> bool:
+        """
+        Create the blob row or take another reference on it, atomically.
+        Returns True if the row was created.
+        """
+        stmt = dialect_insert(db, ImageBlob).values(
+            content_hash=staged.content_hash,
+            filename=staged.blob_filename,
+            file_size=staged.file_size,
+            ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.content_hash],
+            set_={"ref_count": ImageBlob.ref_count + 1}
+        ).returning(ImageBlob.ref_count)
+        result = await db.execute(stmt)
+        return result.scalar_one() == 1
+    
+    async def _claim_blob(self, staged: StagedUpload, db: AsyncSession) -> bool:
+        """
+        Take a reference on a staged upload's blob, then store its file if the blob is new.
+        
+        The reference comes first so a concurrent delete can't remove the
+        file in between: while the blob row exists the file does, and a
+        delete that drops the last reference unlinks the file before its
+        row is gone (see delete_image). Returns True if the blob is new.
+        """
         try:
-            with PILImage.open(file_path) as img:
-                return img.width, img.height
+            is_new_blob = await self._acquire_blob(staged, db)
+        except BaseException:
+            await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+            raise
+        if is_new_blob:
+            await self._store_blob(staged)
+        else:
+            await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+        return is_new_blob
+    
+    def _image_values(self, staged: StagedUpload, original_filename: str, user_id: uuid.UUID) -> dict:
+        """Column values of the Image row for a stored upload."""
+        return {
+            "filename": self._generate_unique_filename(staged.probe.extension),
+            "original_filename": original_filename,
+            "file_path": f"images/{image_processing.shard_relpath(staged.blob_filename)}",
+            "content_hash": staged.content_hash,
+            "file_size": staged.file_size,
+            "mime_type": staged.probe.mime_type,
+            "width": staged.probe.width,
+            "height": staged.probe.height,
+            "uploaded_by": user_id
+        }
+    
+    def _new_image(self, staged: StagedUpload, original_filename: str, user_id: uuid.UUID) -> Image:
+        """Build the Image row for a stored upload."""
+        return Image(**self._image_values(staged, original_filename, user_id))
+    
+    async def _pregenerate_stored(self, stored_name: str, mime_type: str):
+        try:
+            async with self.storage.local_copy(stored_name, self.tmp_dir) as source:
+                await self.derivatives.pregenerate(source, stored_name, mime_type)
         except Exception:
-            return None, None
+            logger.exception("Failed to pre-generate derivatives of %s", stored_name)
+    
+    def _pregenerate(self, staged: StagedUpload):
+        """Render the common thumbnail sizes now so the first page view is already cached."""
+        self._spawn(self._pregenerate_stored(staged.blob_filename, staged.probe.mime_type))
     
     async def save_uploaded_file(
         self,
@@ -50,6 +342,12 @@ class ImageService:
         """
         Save an uploaded file to disk and create database record.
         
+        Files are stored by the SHA-256 of their content, so uploading the
+        same bytes again only adds a reference to the existing blob. With
+        IMAGE_OPTIMIZE_UPLOADS the stored file is the optimized version and
+        width, height and file_size describe it; uploads of bytes that are
+        already stored skip optimizing and copy them from the stored blob.
+        
         Args:
             file: The uploaded file
             user_id: ID of the user uploading the file
@@ -61,55 +359,229 @@ class ImageService:
         Raises:
             HTTPException: If validation fails
         """
-        # Validate file type
-        if not self._validate_file_type(file.content_type):
-            raise HTTPException(
-                status_code=400,
-                detail=f"File type {file.content_type} not allowed. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
-            )
+        staged = await self._stage_upload(file)
+        stored = await self._stored_blobs({staged.content_hash}, db)
+        if not stored and settings.IMAGE_OPTIMIZE_UPLOADS:
+            staged = await self._optimize_upload(staged)
+        
+        is_new_blob = await self._claim_blob(staged, db)
+        if not is_new_blob:
+            # Stored by a concurrent upload if the lookup above didn't find it
+            stored = stored or await self._stored_blobs({staged.content_hash}, db)
+            staged = self._as_stored(staged, stored[staged.content_hash])
+        
+        image = self._new_image(staged, file.filename, user_id)
+        db.add(image)
+        await db.commit()
+        await db.refresh(image)
         
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
+        if is_new_blob:
+            self._pregenerate(staged)
         
-        # Validate file size
-        if not self._validate_file_size(file_size):
+        return image
+    
+    async def _stage_limited(self, file: UploadFile, limit: asyncio.Semaphore) -> StagedUpload:
+        """Stage one file of a batch, holding a slot of the batch's concurrency limit."""
+        async with limit:
+            return await self._stage_upload(file)
+    
+    async def _store_limited(self, staged: StagedUpload, limit: asyncio.Semaphore):
+        async with limit:
+            await self._store_blob(staged)
+    
+    async def save_uploaded_files(
+        self,
+        files: list[UploadFile],
+        user_id: uuid.UUID,
+        db: AsyncSession,
+        chapter_id: Optional[uuid.UUID] = None,
+        start_order: Optional[int] = None
+    ) -> list[BatchUploadResult]:
+        """
+        Save several uploaded files at once.
+        
+        Files are streamed, hashed, validated and, unless their bytes are
+        already stored, optimized concurrently (at most
+        IMAGE_BATCH_CONCURRENCY at a time). A file that fails validation, or
+        fails to stage at all, is reported in its result and does not affect
+        the others. Every
+        accepted file is then recorded in a single transaction: one upsert
+        for the blobs, one bulk insert for the Image rows and, when
+        `chapter_id` is given, one bulk insert attaching them to the chapter
+        in upload order.
+        
+        Args:
+            files: The uploaded files
+            user_id: ID of the user uploading the files
+            db: Database session
+            chapter_id: Optional chapter to attach the images to
+            start_order: Display order of the first attached image; defaults
+                to after the chapter's current last image
+            
+        Returns:
+            list[BatchUploadResult]: One result per file, in request order
+            
+        Raises:
+            HTTPException: If the batch is too large or the chapter doesn't exist
+        """
+        if len(files) > settings.MAX_BATCH_UPLOAD_FILES:
             raise HTTPException(
                 status_code=400,
-                detail=f"File size {file_size} bytes exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+                detail=f"At most {settings.MAX_BATCH_UPLOAD_FILES} files can be uploaded at once"
             )
         
-        # Generate unique filename
-        unique_filename = self._generate_unique_filename(file.filename)
-        file_path = self.upload_dir / unique_filename
+        if chapter_id is not None:
+            await self._require_chapter(chapter_id, db)
+            if start_order is None:
+                start_order = await self._next_display_order(chapter_id, db)
+        
+        limit = asyncio.Semaphore(settings.IMAGE_BATCH_CONCURRENCY)
+        outcomes = await asyncio.gather(
+            *(self._stage_limited(file, limit) for file in files),
+            return_exceptions=True
+        )
         
-        # Save file to disk
+        results: list[BatchUploadResult] = []
+        stored: list[tuple[BatchUploadResult, StagedUpload]] = []
+        fatal: Optional[BaseException] = None
+        for file, outcome in zip(files, outcomes):
+            result = BatchUploadResult(original_filename=file.filename)
+            results.append(result)
+            if isinstance(outcome, HTTPException):
+                result.error = outcome.detail
+            elif isinstance(outcome, Exception):
+                # An unexpected failure is this file's error too; the rest of the batch goes on
+                logger.error("Failed to stage upload %s", file.filename, exc_info=outcome)
+                result.error = "Failed to process file"
+            elif isinstance(outcome, BaseException):
+                fatal = fatal or outcome
+            else:
+                stored.append((result, outcome))
+        
+        if fatal is not None:
+            # Cancelled or interrupted: drop the files that did stage before giving up
+            for _, staged in stored:
+                await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+            raise fatal
+        
+        if not stored:
+            return results
+        
+        known = await self._stored_blobs({staged.content_hash for _, staged in stored}, db)
+        if settings.IMAGE_OPTIMIZE_UPLOADS:
+            # Only the first copy of new bytes can end up stored; the others are described by it below
+            to_optimize: dict[str, int] = {}
+            for i, (_, staged) in enumerate(stored):
+                if staged.content_hash not in known:
+                    to_optimize.setdefault(staged.content_hash, i)
+            optimized = await asyncio.gather(
+                *(self._optimize_limited(stored[i][1], limit) for i in to_optimize.values())
+            )
+            for i, staged in zip(to_optimize.values(), optimized):
+                stored[i] = (stored[i][0], staged)
+        
+        # One upsert per distinct blob; identical files in the same batch add all their references at once
+        blob_refs: dict[str, dict] = {}
+        for _, staged in stored:
+            blob = blob_refs.setdefault(staged.content_hash, {
+                "content_hash": staged.content_hash,
+                "filename": staged.blob_filename,
+                "file_size": staged.file_size,
+                "ref_count": 0
+            })
+            blob["ref_count"] += 1
+        stmt = dialect_insert(db, ImageBlob)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlob.content_hash],
+            set_={"ref_count": ImageBlob.ref_count + stmt.excluded.ref_count}
+        ).returning(ImageBlob.content_hash, ImageBlob.ref_count)
         try:
-            with open(file_path, "wb") as f:
-                f.write(content)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+            acquired = await db.execute(stmt, list(blob_refs.values()))
+        except BaseException:
+            for _, staged in stored:
+                await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+            raise
+        # A blob is new if its row holds only this batch's references
+        new_hashes = {
+            content_hash for content_hash, ref_count in acquired.all()
+            if ref_count == blob_refs[content_hash]["ref_count"]
+        }
         
-        # Get image dimensions
-        width, height = self._get_image_dimensions(file_path)
+        # With the references held, store one file per new blob (see _claim_blob) and drop the rest
+        new_blobs: dict[str, StagedUpload] = {}
+        for _, staged in stored:
+            if staged.content_hash in new_hashes and staged.content_hash not in new_blobs:
+                new_blobs[staged.content_hash] = staged
+            else:
+                await self._run_blocking(image_processing.remove_file, staged.tmp_path)
+        await asyncio.gather(*(self._store_limited(staged, limit) for staged in new_blobs.values()))
         
-        # Create database record
-        image = Image(
-            filename=unique_filename,
-            original_filename=file.filename,
-            file_path=f"images/{unique_filename}",
-            file_size=file_size,
-            mime_type=file.content_type,
-            width=width,
-            height=height,
-            uploaded_by=user_id
-        )
+        # Every other file is described by the blob it references
+        missing = {staged.content_hash for _, staged in stored} - new_blobs.keys() - known.keys()
+        if missing:
+            known.update(await self._stored_blobs(missing, db))
+        for i, (result, staged) in enumerate(stored):
+            if staged.content_hash in new_blobs:
+                written = new_blobs[staged.content_hash]
+                stored[i] = (result, replace(staged, file_size=written.file_size, probe=written.probe))
+            else:
+                stored[i] = (result, self._as_stored(staged, known[staged.content_hash]))
+        
+        rows = []
+        for result, staged in stored:
+            values = self._image_values(staged, result.original_filename, user_id)
+            values["id"] = uuid.uuid4()
+            rows.append(values)
+        inserted = await db.execute(insert(Image).returning(Image), rows)
+        images = {image.id: image for image in inserted.scalars()}
+        for (result, _), values in zip(stored, rows):
+            result.image = images[values["id"]]
+        
+        if chapter_id is not None:
+            associations = []
+            for offset, (result, _) in enumerate(stored):
+                result.display_order = start_order + offset
+                associations.append({
+                    "chapter_id": chapter_id,
+                    "image_id": result.image.id,
+                    "display_order": result.display_order
+                })
+            await db.execute(insert(ChapterImage), associations)
         
-        db.add(image)
         await db.commit()
-        await db.refresh(image)
         
-        return image
+        for staged in new_blobs.values():
+            self._pregenerate(staged)
+        
+        return results
+    
+    async def _release_blob(self, content_hash: str, db: AsyncSession) -> Optional[str]:
+        """
+        Drop one reference to a blob. Returns the blob's filename if that was
+        the last reference and this call deleted its row, so the caller can
+        remove the file.
+        """
+        await db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.content_hash == content_hash)
+            .values(ref_count=ImageBlob.ref_count - 1)
+        )
+        result = await db.execute(
+            delete(ImageBlob)
+            .where(ImageBlob.content_hash == content_hash, ImageBlob.ref_count <= 0)
+            .returning(ImageBlob.filename)
+        )
+        return result.scalar_one_or_none()
+    
+    async def _remove_stored_file(self, filename: str):
+        """Delete a stored file and its derivatives, logging rather than failing."""
+        self._presigned_cache.pop(filename)
+        try:
+            await self.storage.delete(filename)
+        except Exception as e:
+            # The row is deleted either way; reconcile_images.py picks the file up later
+            logger.warning("Failed to delete file %s: %s", filename, e)
+        await self._run_blocking(self.derivatives.remove_for, filename)
     
     async def delete_image(
         self,
@@ -121,6 +593,8 @@ class ImageService:
         """
         Delete an image from disk and database.
         
+        The stored file is only removed when no other image shares its content.
+        
         Args:
             image_id: ID of the image to delete
             user_id: ID of the user requesting deletion
@@ -143,18 +617,24 @@ class ImageService:
         if not is_admin and image.uploaded_by != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this image")
         
-        # Delete file from disk
-        file_path = self.upload_dir / image.filename
-        try:
-            if file_path.exists():
-                file_path.unlink()
-        except Exception as e:
-            # Log error but continue with database deletion
-            print(f"Warning: Failed to delete file {file_path}: {str(e)}")
-        
         # Delete from database (cascade will handle chapter_images)
+        self._file_info_cache.pop(image.id)
+        content_hash = image.content_hash
+        stored_name = self.storage_name(image)
         await db.delete(image)
-        await db.commit()
+        await db.flush()
+        
+        if content_hash:
+            orphaned_blob = await self._release_blob(content_hash, db)
+            if orphaned_blob:
+                # Unlink while the deleted row is still locked: an upload of the same
+                # bytes waits on it, then finds no blob and writes the file again
+                await self._remove_stored_file(orphaned_blob)
+            await db.commit()
+        else:
+            await db.commit()
+            # Uploaded before deduplication: the file belongs to this image alone
+            await self._remove_stored_file(stored_name)
         
         return True
     
@@ -167,56 +647,142 @@ class ImageService:
         result = await db.execute(select(Image).where(Image.id == image_id))
         return result.scalars().first()
     
+    async def _has_search_index(self, db: AsyncSession) -> bool:
+        """Whether the SQLite FTS5 table from the image search migration exists."""
+        if self._fts_available is None:
+            result = await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'images_fts'")
+            )
+            self._fts_available = result.first() is not None
+        return self._fts_available
+    
+    async def _search_clause(self, db: AsyncSession, search: str):
+        """
+        Filename filter that can use an index.
+        
+        On Postgres the trigram GIN indexes serve ILIKE '%term%' directly. On
+        SQLite the term is matched against the FTS5 trigram table instead;
+        terms shorter than a trigram can't use it and fall back to a scan.
+        """
+        if (
+            db.get_bind().dialect.name == "sqlite"
+            and len(search) >= FTS_MIN_TERM_LENGTH
+            and await self._has_search_index(db)
+        ):
+            phrase = '"' + search.replace('"', '""') + '"'
+            matches = text(
+                "SELECT rowid FROM images_fts WHERE images_fts MATCH :phrase"
+            ).bindparams(phrase=phrase).columns(column("rowid"))
+            return literal_column("images.rowid").in_(matches)
+        
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return or_(
+            Image.original_filename.ilike(pattern, escape="\\"),
+            Image.filename.ilike(pattern, escape="\\")
+        )
+    
+    async def _count_images(self, db: AsyncSession, query, mode: str, filtered: bool) -> tuple[Optional[int], bool]:
+        """
+        Count the rows `query` matches. Returns (total, is_estimate).
+        
+        "estimate" reads the planner's row count on Postgres for the whole
+        table; otherwise it counts at most IMAGE_COUNT_ESTIMATE_CAP rows, so
+        large results come back as "at least N".
+        """
+        if mode == "none":
+            return None, False
+        
+        if mode == "exact":
+            result = await db.execute(select(func.count()).select_from(query.subquery()))
+            return result.scalar(), False
+        
+        if not filtered and db.get_bind().dialect.name == "postgresql":
+            result = await db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'images'::regclass")
+            )
+            estimate = result.scalar()
+            # -1 until the table has been vacuumed or analyzed for the first time
+            if estimate is not None and estimate >= 0:
+                return estimate, True
+        
+        cap = settings.IMAGE_COUNT_ESTIMATE_CAP
+        capped = query.with_only_columns(Image.id).limit(cap)
+        result = await db.execute(select(func.count()).select_from(capped.subquery()))
+        total = result.scalar()
+        return total, total >= cap
+    
     async def list_images(
         self,
         db: AsyncSession,
-        page: int = 1,
         page_size: int = 20,
+        cursor: Optional[str] = None,
+        page: Optional[int] = None,
         search: Optional[str] = None,
-        user_id: Optional[uuid.UUID] = None
-    ) -> tuple[list[Image], int]:
+        user_id: Optional[uuid.UUID] = None,
+        count: Optional[str] = None
+    ) -> ImagePage:
         """
-        List images with pagination and optional filtering.
+        List images, newest first, with optional filtering.
+        
+        Pages are fetched by keyset on (created_at, id): pass the previous
+        page's `next_cursor` to get the next one. `page` selects the old
+        OFFSET paging and is only kept for existing clients.
         
         Args:
             db: Database session
-            page: Page number (1-indexed)
             page_size: Number of items per page
+            cursor: Cursor returned with the previous page
+            page: Page number (1-indexed) for offset paging
             search: Optional search term for filename
             user_id: Optional filter by uploader
+            count: "exact", "estimate" or "none" (default: "exact" for offset
+                paging, "none" for cursor paging)
             
         Returns:
-            tuple: (list of images, total count)
+            ImagePage: The images, the next cursor and the requested total
+            
+        Raises:
+            HTTPException: If the cursor is invalid
         """
         # Build query
         query = select(Image)
         
         # Apply filters
         if search:
-            query = query.where(
-                or_(
-                    Image.original_filename.ilike(f"%{search}%"),
-                    Image.filename.ilike(f"%{search}%")
-                )
-            )
+            query = query.where(await self._search_clause(db, search))
         
         if user_id:
             query = query.where(Image.uploaded_by == user_id)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        if count is None:
+            count = "exact" if page is not None else "none"
+        total, total_is_estimate = await self._count_images(db, query, count, bool(search or user_id))
         
-        # Apply pagination and ordering
-        query = query.order_by(Image.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        if page is not None:
+            query = query.order_by(Image.created_at.desc(), Image.id.desc())
+            query = query.offset((page - 1) * page_size).limit(page_size)
+            result = await db.execute(query)
+            return ImagePage(result.scalars().all(), None, total, total_is_estimate)
         
-        # Execute query
-        result = await db.execute(query)
-        images = result.scalars().all()
+        try:
+            query = keyset_query(
+                query,
+                Image.created_at,
+                Image.id,
+                cursor,
+                page_size,
+                db.get_bind().dialect.name
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return images, total
+        result = await db.execute(query)
+        images, next_cursor = split_page(
+            result.scalars().all(),
+            page_size,
+            lambda image: (image.created_at, image.id)
+        )
+        return ImagePage(images, next_cursor, total, total_is_estimate)
     
     async def associate_image_with_chapter(
         self,
@@ -307,6 +873,20 @@ class ImageService:
         
         return True
     
+    async def _require_chapter(self, chapter_id: uuid.UUID, db: AsyncSession):
+        """Raise 404 unless the chapter exists."""
+        result = await db.execute(select(Chapter.id).where(Chapter.id == chapter_id))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+    
+    async def _next_display_order(self, chapter_id: uuid.UUID, db: AsyncSession) -> int:
+        """Display order that places an image after the chapter's current last one."""
+        result = await db.execute(
+            select(func.max(ChapterImage.display_order)).where(ChapterImage.chapter_id == chapter_id)
+        )
+        last_order = result.scalar()
+        return 0 if last_order is None else last_order + 1
+    
     async def get_chapter_images(
         self,
         chapter_id: uuid.UUID,
@@ -315,19 +895,68 @@ class ImageService:
         """
         Get all images associated with a chapter.
         
+        The images are joined into the same query, so `ci.image` is loaded
+        for every row without further round trips.
+        
         Args:
             chapter_id: ID of the chapter
             db: Database session
             
         Returns:
             list[ChapterImage]: List of chapter image associations
+            
+        Raises:
+            HTTPException: If the chapter doesn't exist
         """
         result = await db.execute(
             select(ChapterImage)
+            .options(joinedload(ChapterImage.image))
+            .where(ChapterImage.chapter_id == chapter_id)
+            .order_by(ChapterImage.display_order)
+        )
+        chapter_images = result.scalars().all()
+        # Only an empty result needs a second look to tell "no images" from "no chapter"
+        if not chapter_images:
+            await self._require_chapter(chapter_id, db)
+        return chapter_images
+    
+    async def get_chapter_image_summaries(
+        self,
+        chapter_id: uuid.UUID,
+        db: AsyncSession
+    ) -> list:
+        """
+        Get the display fields of a chapter's images, for students.
+        
+        Selects just the columns a lesson page needs in a single query
+        instead of loading full ChapterImage and Image rows.
+        
+        Args:
+            chapter_id: ID of the chapter
+            db: Database session
+            
+        Returns:
+            list: Rows of (image_id, caption, display_order, width, height)
+            
+        Raises:
+            HTTPException: If the chapter doesn't exist
+        """
+        result = await db.execute(
+            select(
+                ChapterImage.image_id,
+                ChapterImage.caption,
+                ChapterImage.display_order,
+                Image.width,
+                Image.height
+            )
+            .join(Image, ChapterImage.image_id == Image.id)
             .where(ChapterImage.chapter_id == chapter_id)
             .order_by(ChapterImage.display_order)
         )
-        return result.scalars().all()
+        rows = result.all()
+        if not rows:
+            await self._require_chapter(chapter_id, db)
+        return rows
     
     async def update_image_order(
         self,
@@ -368,9 +997,284 @@ class ImageService:
         
         return chapter_image
     
-    def get_image_file_path(self, filename: str) -> Path:
-        """Get the full file path for an image."""
-        return self.upload_dir / filename
+    async def associate_images_with_chapter(
+        self,
+        chapter_id: uuid.UUID,
+        image_ids: list[uuid.UUID],
+        captions: dict[uuid.UUID, Optional[str]],
+        db: AsyncSession,
+        start_order: Optional[int] = None
+    ) -> list[ChapterImage]:
+        """
+        Associate several images with a chapter at once.
+        
+        The whole list is validated before anything is written, then all
+        associations are inserted in one statement, in list order.
+        
+        Args:
+            chapter_id: ID of the chapter
+            image_ids: IDs of the images, in display order
+            captions: Caption per image id, for the images that have one
+            db: Database session
+            start_order: Display order of the first image; defaults to after
+                the chapter's current last image
+            
+        Returns:
+            list[ChapterImage]: All of the chapter's associations, in display order
+            
+        Raises:
+            HTTPException: If the chapter or an image doesn't exist, or an image
+                is listed twice or already associated
+        """
+        if len(set(image_ids)) != len(image_ids):
+            raise HTTPException(status_code=400, detail="Each image can only be listed once")
+        
+        await self._require_chapter(chapter_id, db)
+        
+        result = await db.execute(select(Image.id).where(Image.id.in_(image_ids)))
+        unknown = set(image_ids) - set(result.scalars().all())
+        if unknown:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Images not found: {', '.join(sorted(str(i) for i in unknown))}"
+            )
+        
+        result = await db.execute(
+            select(ChapterImage.image_id).where(
+                ChapterImage.chapter_id == chapter_id,
+                ChapterImage.image_id.in_(image_ids)
+            )
+        )
+        already = set(result.scalars().all())
+        if already:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Images already associated with this chapter: {', '.join(sorted(str(i) for i in already))}"
+            )
+        
+        if start_order is None:
+            start_order = await self._next_display_order(chapter_id, db)
+        
+        # render_nulls keeps rows with and without a caption in one INSERT batch
+        await db.execute(insert(ChapterImage).execution_options(render_nulls=True), [
+            {
+                "chapter_id": chapter_id,
+                "image_id": image_id,
+                "caption": captions.get(image_id),
+                "display_order": start_order + offset
+            }
+            for offset, image_id in enumerate(image_ids)
+        ])
+        await db.commit()
+        
+        return await self.get_chapter_images(chapter_id, db)
+    
+    async def reorder_chapter_images(
+        self,
+        chapter_id: uuid.UUID,
+        image_ids: list[uuid.UUID],
+        captions: dict[uuid.UUID, Optional[str]],
+        db: AsyncSession
+    ) -> list[ChapterImage]:
+        """
+        Set the order (and optionally captions) of all of a chapter's images.
+        
+        `image_ids` must list every image of the chapter exactly once; the
+        new display orders are 0..n-1 in list order. Everything is applied
+        by a single UPDATE, so the chapter is never seen half reordered.
+        
+        Args:
+            chapter_id: ID of the chapter
+            image_ids: IDs of the chapter's images, in the new order
+            captions: New caption per image id; images not in it keep theirs
+            db: Database session
+            
+        Returns:
+            list[ChapterImage]: The chapter's associations in the new order
+            
+        Raises:
+            HTTPException: If the chapter doesn't exist or the list doesn't
+                match the chapter's images
+        """
+        if len(set(image_ids)) != len(image_ids):
+            raise HTTPException(status_code=400, detail="Each image can only be listed once")
+        
+        result = await db.execute(
+            select(ChapterImage.image_id).where(ChapterImage.chapter_id == chapter_id)
+        )
+        current = set(result.scalars().all())
+        if not current:
+            await self._require_chapter(chapter_id, db)
+        
+        missing = current - set(image_ids)
+        extra = set(image_ids) - current
+        if missing or extra:
+            problems = []
+            if missing:
+                problems.append(f"missing: {', '.join(sorted(str(i) for i in missing))}")
+            if extra:
+                problems.append(f"not in chapter: {', '.join(sorted(str(i) for i in extra))}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Order must list every image of the chapter exactly once ({'; '.join(problems)})"
+            )
+        
+        if image_ids:
+            values = {
+                "display_order": case(
+                    {image_id: position for position, image_id in enumerate(image_ids)},
+                    value=ChapterImage.image_id,
+                    else_=ChapterImage.display_order
+                )
+            }
+            if captions:
+                values["caption"] = case(captions, value=ChapterImage.image_id, else_=ChapterImage.caption)
+            await db.execute(
+                update(ChapterImage)
+                .where(ChapterImage.chapter_id == chapter_id, ChapterImage.image_id.in_(image_ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        
+        return await self.get_chapter_images(chapter_id, db)
+    
+    def storage_name(self, image: Image) -> str:
+        """Name of the stored file backing an image (shared between duplicates)."""
+        return Path(image.file_path).name
+    
+    def local_storage(self) -> LocalStorage:
+        """
+        The storage backend, for maintenance scripts that work on the upload directory.
+        
+        Raises:
+            RuntimeError: If images are not stored on local disk
+        """
+        if not isinstance(self.storage, LocalStorage):
+            raise RuntimeError(
+                f"This only works with IMAGE_STORAGE_BACKEND=local (currently {settings.IMAGE_STORAGE_BACKEND})"
+            )
+        return self.storage
+    
+    async def presigned_url(self, info: "ImageFileInfo") -> Optional[str]:
+        """
+        URL the client can fetch the original from directly, or None to serve it ourselves.
+        
+        A URL is reused for the first half of its lifetime so browsers and
+        CDNs see the same URL for repeat requests and can cache the bytes.
+        """
+        if not settings.IMAGE_PRESIGNED_REDIRECTS:
+            return None
+        now = time.monotonic()
+        cached = self._presigned_cache.get(info.stored_name)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        url = await self.storage.presigned_url(info.stored_name, info.mime_type, info.original_filename)
+        if url is not None:
+            self._presigned_cache.set(info.stored_name, (url, now + settings.IMAGE_PRESIGNED_URL_EXPIRES / 2))
+        return url
+    
+    async def get_file_info(
+        self,
+        image_id: str,
+        db: AsyncSession
+    ) -> Optional["ImageFileInfo"]:
+        """
+        Get what serve_image needs to know about an image.
+        
+        Stored bytes never change for a given image id, so the result is
+        kept in an in-memory LRU and repeat requests cost no database query.
+        """
+        try:
+            key = uuid.UUID(str(image_id))
+        except ValueError:
+            return None
+        
+        info = self._file_info_cache.get(key)
+        if info is None:
+            image = await self.get_image_by_id(key, db)
+            if not image:
+                return None
+            stored_name = self.storage_name(image)
+            info = ImageFileInfo(
+                stored_name=stored_name,
+                original_filename=image.original_filename,
+                mime_type=image.mime_type,
+                width=image.width,
+                # Pre-dedup uploads have no hash, but their uuid filename is just as unique
+                content_tag=image.content_hash or Path(stored_name).stem
+            )
+            self._file_info_cache.set(key, info)
+        return info
+    
+    def resolve_derivative(
+        self,
+        info: "ImageFileInfo",
+        width: Optional[int],
+        fmt: Optional[str]
+    ) -> tuple[int, str]:
+        """
+        Work out which derivative a request maps to.
+        
+        Args:
+            info: The source image
+            width: Requested width in pixels, snapped up to a configured width
+            fmt: Output format name; defaults to the format of the original
+            
+        Returns:
+            tuple: (snapped width, format name)
+        """
+        fmt = fmt or MIME_TO_FORMAT.get(info.mime_type, "jpeg")
+        if width is None:
+            width = info.width or max(settings.IMAGE_DERIVATIVE_WIDTHS)
+        return snap_width(width), fmt
+    
+    async def get_derivative_path(
+        self,
+        info: "ImageFileInfo",
+        width: int,
+        fmt: str
+    ) -> tuple[Path, str]:
+        """
+        Get a resized / transcoded variant of an image, rendering it on first use.
+        
+        Args:
+            info: The source image
+            width: Width from resolve_derivative
+            fmt: Format from resolve_derivative
+            
+        Returns:
+            tuple: (location of the cached derivative, its mime type)
+            
+        Raises:
+            FileNotFoundError: If the original is missing from storage
+        """
+        path = await self.derivatives.lookup(info.stored_name, width, fmt)
+        if path is None:
+            # Only fetch the original (possibly from a remote store) on a cache miss
+            async with self.storage.local_copy(info.stored_name, self.tmp_dir) as source:
+                path = await self.derivatives.get_or_create(source, info.stored_name, width, fmt)
+        return path, OUTPUT_FORMATS[fmt][1]
+    
+    async def file_size(self, path: Path) -> int:
+        """Size of a stored file, without blocking the event loop."""
+        stat = await self._run_blocking(os.stat, path)
+        return stat.st_size
+    
+    async def iter_file_range(self, path: Path, start: int, end: int):
+        """Yield the bytes of `path` from `start` to `end` inclusive, in chunks."""
+        f = await self._run_blocking(open, path, "rb")
+        try:
+            await self._run_blocking(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await self._run_blocking(f.read, min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await self._run_blocking(f.close)
 
 # Create singleton instance
 image_service = ImageService()
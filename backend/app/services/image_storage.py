@@ -0,0 +1,196 @@
+"""
+Where the original bytes of uploaded images live.
+
+ImageService talks to a `StorageBackend` chosen by IMAGE_STORAGE_BACKEND:
+
+- "local": files under UPLOAD_DIR/images in the sharded ab/cd/ layout.
+- "s3": objects in an S3-compatible bucket (AWS, MinIO, ...), see
+  image_storage_s3.py. Originals can then be served by redirecting the
+  client to a presigned URL so the bytes never pass through the API.
+
+Objects are addressed by their stored file name (`<sha256><ext>`, or a uuid
+name for pre-dedup uploads). Derivatives are not stored here: they always
+live in the local disk cache of image_derivatives.py.
+"""
+import asyncio
+import os
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services import image_processing
+
+# Size of each read when streaming a stored file
+READ_CHUNK_SIZE = 256 * 1024
+
+# Written into the images directory once shard_uploads.py has moved every flat file
+SHARDED_LAYOUT_MARKER = ".sharded"
+
+
+class StorageBackend(ABC):
+    """Abstract base class for image storage backends."""
+
+    @abstractmethod
+    async def put(self, name: str, source: Path, content_type: str) -> bool:
+        """
+        Store the fully written file `source` under `name`, consuming it.
+
+        Names are content addressed, so if `name` already exists it holds
+        the same bytes and `source` is simply discarded.
+
+        Returns:
+            bool: True if the object did not exist yet
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, name: str):
+        """Delete a stored object; deleting a missing one is not an error."""
+        pass
+
+    @abstractmethod
+    async def size(self, name: str) -> Optional[int]:
+        """Size of a stored object in bytes, or None if it doesn't exist."""
+        pass
+
+    @abstractmethod
+    def iter_range(self, name: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield the bytes of a stored object from `start` to `end` inclusive, in chunks."""
+        pass
+
+    @abstractmethod
+    async def download(self, name: str, dest: Path):
+        """
+        Copy a stored object to the local file `dest`.
+
+        Raises:
+            FileNotFoundError: If the object doesn't exist
+        """
+        pass
+
+    async def local_path(self, name: str) -> Optional[Path]:
+        """Path of the object on the local filesystem, if the backend keeps it there."""
+        return None
+
+    async def presigned_url(
+        self,
+        name: str,
+        content_type: str,
+        filename: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        A time-limited URL clients can fetch the object from directly.
+        None if the backend can't hand out such URLs.
+        """
+        return None
+
+    @asynccontextmanager
+    async def local_copy(self, name: str, tmp_dir: Path):
+        """
+        Make the object available as a local file for the duration of the block.
+
+        Backends that keep files locally yield their own path; others
+        download to a temp file in `tmp_dir` that is removed afterwards.
+        """
+        path = await self.local_path(name)
+        if path is not None:
+            yield path
+            return
+
+        tmp_path = tmp_dir / f"{uuid.uuid4()}{Path(name).suffix}"
+        try:
+            await self.download(name, tmp_path)
+            yield tmp_path
+        finally:
+            await asyncio.to_thread(image_processing.remove_file, tmp_path)
+
+
+class LocalStorage(StorageBackend):
+    """Files on local disk, sharded by the first two byte pairs of their name."""
+
+    def __init__(self, root: Path, executor):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._executor = executor
+        # Until the flat -> sharded migration has finished, reads also look in the old flat layout
+        self.layout_migrated = (self.root / SHARDED_LAYOUT_MARKER).exists()
+
+    async def _run_blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def path_for(self, name: str) -> Path:
+        """Where a file lives in the sharded layout (and where new files are written)."""
+        return self.root / image_processing.shard_relpath(name)
+
+    def locate(self, name: str) -> Path:
+        """
+        Get the full path of a stored file.
+
+        While shard_uploads.py is still running, a file that hasn't been
+        moved yet is found at its old flat path. Touches the disk, so call
+        it through local_path from async code.
+        """
+        path = self.path_for(name)
+        if not self.layout_migrated and not path.exists():
+            legacy_path = self.root / name
+            if legacy_path.exists():
+                return legacy_path
+        return path
+
+    async def put(self, name: str, source: Path, content_type: str) -> bool:
+        return await self._run_blocking(image_processing.place_blob, source, self.path_for(name))
+
+    async def delete(self, name: str):
+        path = await self.local_path(name)
+        await self._run_blocking(image_processing.remove_file, path)
+
+    async def size(self, name: str) -> Optional[int]:
+        path = await self.local_path(name)
+        try:
+            stat = await self._run_blocking(os.stat, path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size
+
+    async def iter_range(self, name: str, start: int, end: int) -> AsyncIterator[bytes]:
+        path = await self.local_path(name)
+        f = await self._run_blocking(open, path, "rb")
+        try:
+            await self._run_blocking(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await self._run_blocking(f.read, min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await self._run_blocking(f.close)
+
+    async def download(self, name: str, dest: Path):
+        path = await self.local_path(name)
+        await self._run_blocking(image_processing.copy_file, path, dest)
+
+    async def local_path(self, name: str) -> Optional[Path]:
+        return await self._run_blocking(self.locate, name)
+
+
+def create_storage(upload_dir: Path, executor) -> StorageBackend:
+    """
+    Build the backend selected by IMAGE_STORAGE_BACKEND.
+
+    Raises:
+        ValueError: If the setting names an unknown backend
+    """
+    backend = settings.IMAGE_STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalStorage(upload_dir, executor)
+    if backend == "s3":
+        # Imported here so boto3 is only needed when S3 storage is used
+        from app.services.image_storage_s3 import S3Storage
+        return S3Storage.from_settings(executor)
+    raise ValueError(f"Unknown IMAGE_STORAGE_BACKEND {settings.IMAGE_STORAGE_BACKEND!r}; use 'local' or 's3'")
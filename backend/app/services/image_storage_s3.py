@@ -0,0 +1,159 @@
+"""
+S3-compatible image storage (AWS S3, MinIO, ...).
+
+Keys are S3_KEY_PREFIX plus the same ab/cd/<name> path the local backend
+uses, so an existing upload directory can be copied into a bucket as is
+(e.g. `aws s3 sync uploads/images s3://bucket/images`).
+
+boto3 is blocking; every call runs on the image executor. Uploads go
+through boto3's transfer manager, which switches to a multipart upload
+sending S3_MULTIPART_CONCURRENCY parts at a time for files above
+S3_MULTIPART_THRESHOLD.
+"""
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.services import image_processing
+from app.services.image_storage import READ_CHUNK_SIZE, StorageBackend
+
+# Error codes S3 (and MinIO) use for a missing key
+NOT_FOUND_CODES = {"404", "NoSuchKey", "NotFound"}
+
+
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in NOT_FOUND_CODES
+
+
+class S3Storage(StorageBackend):
+    """Objects in an S3 bucket, read and written through boto3."""
+
+    def __init__(self, client, bucket: str, prefix: str, executor):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self._executor = executor
+        self._transfer_config = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.S3_MULTIPART_CONCURRENCY
+        )
+
+    @classmethod
+    def from_settings(cls, executor) -> "S3Storage":
+        """
+        Raises:
+            ValueError: If S3_BUCKET is not set
+        """
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET must be set when IMAGE_STORAGE_BACKEND is 's3'")
+        client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            # Enough pooled connections for every executor thread plus multipart part uploads
+            config=BotoConfig(
+                signature_version="s3v4",
+                max_pool_connections=settings.IMAGE_WORKERS * settings.S3_MULTIPART_CONCURRENCY
+            )
+        )
+        return cls(client, settings.S3_BUCKET, settings.S3_KEY_PREFIX, executor)
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    def key_for(self, name: str) -> str:
+        return f"{self.prefix}{image_processing.shard_relpath(name)}"
+
+    async def _head(self, name: str) -> Optional[dict]:
+        try:
+            return await self._run_blocking(self.client.head_object, Bucket=self.bucket, Key=self.key_for(name))
+        except ClientError as e:
+            if _is_not_found(e):
+                return None
+            raise
+
+    async def put(self, name: str, source: Path, content_type: str) -> bool:
+        try:
+            if await self._head(name) is not None:
+                return False
+            await self._run_blocking(
+                self.client.upload_file,
+                str(source),
+                self.bucket,
+                self.key_for(name),
+                ExtraArgs={
+                    "ContentType": content_type,
+                    # Objects are content addressed and never change
+                    "CacheControl": f"public, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable"
+                },
+                Config=self._transfer_config
+            )
+            return True
+        finally:
+            await self._run_blocking(image_processing.remove_file, source)
+
+    async def delete(self, name: str):
+        await self._run_blocking(self.client.delete_object, Bucket=self.bucket, Key=self.key_for(name))
+
+    async def size(self, name: str) -> Optional[int]:
+        head = await self._head(name)
+        return head["ContentLength"] if head is not None else None
+
+    async def iter_range(self, name: str, start: int, end: int) -> AsyncIterator[bytes]:
+        response = await self._run_blocking(
+            self.client.get_object,
+            Bucket=self.bucket,
+            Key=self.key_for(name),
+            Range=f"bytes={start}-{end}"
+        )
+        body = response["Body"]
+        try:
+            while chunk := await self._run_blocking(body.read, READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await self._run_blocking(body.close)
+
+    async def download(self, name: str, dest: Path):
+        try:
+            await self._run_blocking(
+                self.client.download_file,
+                self.bucket,
+                self.key_for(name),
+                str(dest),
+                Config=self._transfer_config
+            )
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(name) from e
+            raise
+
+    async def presigned_url(
+        self,
+        name: str,
+        content_type: str,
+        filename: Optional[str] = None
+    ) -> Optional[str]:
+        params = {
+            "Bucket": self.bucket,
+            "Key": self.key_for(name),
+            "ResponseContentType": content_type,
+        }
+        if filename:
+            params["ResponseContentDisposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        # Signing is local computation; no request is made
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params=params,
+            ExpiresIn=settings.IMAGE_PRESIGNED_URL_EXPIRES
+        )
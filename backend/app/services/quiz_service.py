@@ -0,0 +1,131 @@
+"""
+Quiz normalization and scoring.
+
+Quizzes reach the database from the seed script (options as a list, the
+correct option's text under "answer"), from the AI providers (options keyed
+by letter, the letter under "correct_answer", not always in that exact
+shape) and from admins editing content. `normalize_quiz` turns any of
+these into the canonical format of app/schemas/quiz.py and validates it,
+so every write stores the same shape plus a precompiled `answer_key`: the
+correct letters of all questions as one string. Scoring a submission is
+then a single comparison against that key.
+"""
+import operator
+from typing import Dict, Optional
+
+from pydantic import ValidationError
+
+from app.schemas.quiz import OPTION_LETTERS, Quiz
+
+# Stands in for unanswered questions, never equal to a key letter
+UNANSWERED = "-"
+
+
+def _normalize_options(options) -> tuple[dict[str, str], dict[str, str]]:
+    """Letter-keyed options, plus a map from the original keys to the new letters."""
+    if isinstance(options, list):
+        values = list(options)
+        relabel = {}
+    elif isinstance(options, dict):
+        keys = [str(k).strip().upper() for k in options]
+        if sorted(keys) == list(OPTION_LETTERS[:len(keys)]):
+            # Already lettered (perhaps "a", "b" or out of order); keep each text on its letter
+            by_letter = dict(zip(keys, options.values()))
+            return {letter: str(by_letter[letter]) for letter in sorted(by_letter)}, {}
+        values = list(options.values())
+        relabel = {str(k): OPTION_LETTERS[i] for i, k in enumerate(options) if i < len(OPTION_LETTERS)}
+    else:
+        raise ValueError("options must be a list or an object keyed by letter")
+    if len(values) > len(OPTION_LETTERS):
+        raise ValueError(f"a question can have at most {len(OPTION_LETTERS)} options")
+    return {OPTION_LETTERS[i]: str(value) for i, value in enumerate(values)}, relabel
+
+
+def _answer_letter(answer, options: dict[str, str], relabel: dict[str, str]) -> Optional[str]:
+    """Resolve a letter, index, original key or option text to the option's letter."""
+    if answer is None:
+        return None
+    if isinstance(answer, int) and not isinstance(answer, bool):
+        return OPTION_LETTERS[answer] if 0 <= answer < len(options) else None
+    answer = str(answer)
+    if answer in relabel:
+        return relabel[answer]
+    letter = answer.strip().upper()
+    if letter in options:
+        return letter
+    # "B) 4" or "B. 4"
+    if len(letter) > 1 and letter[0] in options and letter[1] in ").:":
+        return letter[0]
+    for letter, text in options.items():
+        if text.strip() == answer.strip():
+            return letter
+    return None
+
+
+def normalize_quiz(data: dict) -> dict:
+    """
+    Convert a quiz in any of the accepted shapes to the canonical format.
+
+    Idempotent: normalizing a canonical quiz returns it unchanged.
+
+    Raises:
+        ValueError: If the quiz is malformed (no questions, fewer than two
+            options, an answer that isn't one of the options, ...)
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list):
+        raise ValueError("a quiz must be an object with a list of questions")
+
+    questions = []
+    for index, raw in enumerate(data["questions"]):
+        if not isinstance(raw, dict):
+            raise ValueError(f"question {index + 1} must be an object")
+        options, relabel = _normalize_options(raw.get("options"))
+        answer = raw.get("correct_answer", raw.get("answer"))
+        question = {
+            "question": str(raw.get("question") or "").strip(),
+            "options": options,
+            "correct_answer": _answer_letter(answer, options, relabel) or str(answer),
+        }
+        if raw.get("explanation"):
+            question["explanation"] = str(raw["explanation"])
+        questions.append(question)
+
+    return validate_quiz({
+        "questions": questions,
+        "answer_key": "".join(q["correct_answer"] for q in questions)
+    })
+
+
+def validate_quiz(data: dict) -> dict:
+    """
+    Check a quiz against the canonical schema.
+
+    Raises:
+        ValueError: Listing every problem found
+    """
+    try:
+        return Quiz.model_validate(data).model_dump(exclude_none=True)
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'quiz'}: {error['msg']}"
+            for error in e.errors()
+        )
+        raise ValueError(f"Invalid quiz: {problems}") from None
+
+
+def answer_key(content_data: dict) -> str:
+    """The precompiled answer key of a stored quiz, compiling it for rows written before normalization."""
+    key = content_data.get("answer_key")
+    if isinstance(key, str) and len(key) == len(content_data.get("questions") or ()):
+        return key
+    return normalize_quiz(content_data)["answer_key"]
+
+
+def score(key: str, answers: Dict[int, str]) -> int:
+    """Number of `answers` (question index -> option letter) that match `key`."""
+    submitted = "".join(
+        letter if len(letter := str(answers.get(index) or "").strip().upper()) == 1 else UNANSWERED
+        for index in range(len(key))
+    )
+    # One C-level pass over both strings instead of a Python loop over the questions
+    return sum(map(operator.eq, key, submitted))
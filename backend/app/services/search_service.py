@@ -0,0 +1,320 @@
+"""
+Full-text search over chapters: titles, descriptions and lesson text.
+
+Each chapter has one row in `search_documents` holding its plain text with
+the subject denormalized. The database indexes those rows itself: an
+external-content FTS5 table kept in sync by triggers on SQLite, a
+generated, weighted tsvector column with a GIN index on Postgres (see the
+search migration). Lessons are stored compressed, so the database can't
+derive the text on its own; instead every write that changes a chapter,
+its subject or its lesson calls `reindex_chapters` inside its
+transaction, the same way those writes call `bump_curriculum_version`.
+
+`search` ranks with bm25 (SQLite) or ts_rank_cd (Postgres), title matches
+weighing most, and returns a highlighted snippet per result. Databases
+without the index (SQLite builds lacking FTS5, schemas made with
+create_all) fall back to LIKE scans over `search_documents`.
+"""
+import logging
+import re
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.curriculum import Subject, Chapter, ContentBlock
+from app.models.search import SearchDocument
+from app.schemas.search import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# Chapters reindexed per round trip
+REINDEX_BATCH_SIZE = 500
+
+# Search terms used from a query; the rest are ignored
+MAX_QUERY_TERMS = 8
+
+# The last term also matches longer words once it has this many characters (search as you type)
+MIN_PREFIX_LENGTH = 2
+
+# Matched terms in snippets are rendered as markdown bold
+HIGHLIGHT_START = "**"
+HIGHLIGHT_END = "**"
+ELLIPSIS = "…"
+SNIPPET_WORDS = 16
+
+# bm25 weights of the FTS5 columns: title, description, body, subject_name, grade_level
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 2.0, 0.0)
+
+_MARKDOWN_SYNTAX = re.compile(r"!\[[^\]]*\]\([^)]*\)|\[([^\]]*)\]\([^)]*\)|[#*_`>|~]+")
+_WHITESPACE = re.compile(r"\s+")
+_TERM = re.compile(r"\w+")
+
+# Whether the SQLite FTS5 table from the search migration exists; checked on first search
+_fts_available: Optional[bool] = None
+
+
+def lesson_text(content_data) -> str:
+    """Plain text of a lesson document (markdown syntax stripped), as indexed for search."""
+    if not isinstance(content_data, dict):
+        return ""
+    # Seeded and imported lessons use "markdown", generated ones "lesson_text"
+    markdown = content_data.get("markdown") or content_data.get("lesson_text") or ""
+    if not isinstance(markdown, str):
+        return ""
+    return _WHITESPACE.sub(" ", _MARKDOWN_SYNTAX.sub(lambda m: m.group(1) or " ", markdown)).strip()
+
+
+def query_terms(query: str) -> list[str]:
+    """The words of a user's query, lowercased; punctuation and operators are dropped."""
+    return _TERM.findall(query.lower())[:MAX_QUERY_TERMS]
+
+
+async def reindex_chapters(db: AsyncSession, chapter_ids: Iterable):
+    """
+    Bring the search documents of these chapters up to date, in the caller's
+    transaction. Chapters that no longer exist lose their document.
+
+    Flushes the session first, so pending ORM changes are indexed too.
+    """
+    ids = list({uuid.UUID(str(chapter_id)) for chapter_id in chapter_ids})
+    if not ids:
+        return
+    await db.flush()
+    for start in range(0, len(ids), REINDEX_BATCH_SIZE):
+        await _reindex_batch(db, ids[start:start + REINDEX_BATCH_SIZE])
+
+
+async def reindex_subject(db: AsyncSession, subject_id):
+    """Reindex every chapter of a subject, e.g. after it was renamed."""
+    await db.flush()
+    result = await db.execute(select(Chapter.id).where(Chapter.subject_id == subject_id))
+    await reindex_chapters(db, result.scalars().all())
+
+
+async def reindex_all(db: AsyncSession) -> int:
+    """Rebuild every chapter's document (committing per batch); returns the number of chapters."""
+    await db.execute(delete(SearchDocument))
+    await db.commit()
+    total = 0
+    last = None
+    while True:
+        query = select(Chapter.id).order_by(Chapter.id).limit(REINDEX_BATCH_SIZE)
+        if last is not None:
+            query = query.where(Chapter.id > last)
+        ids = (await db.execute(query)).scalars().all()
+        if not ids:
+            return total
+        await _reindex_batch(db, ids)
+        await db.commit()
+        total += len(ids)
+        last = ids[-1]
+
+
+async def _reindex_batch(db: AsyncSession, ids: list[uuid.UUID]):
+    result = await db.execute(
+        select(Chapter.id, Chapter.title, Chapter.description, Subject.id, Subject.name, Subject.grade_level)
+        .join(Subject, Subject.id == Chapter.subject_id)
+        .where(Chapter.id.in_(ids))
+    )
+    chapters = result.all()
+
+    # The lesson shown for a chapter is its oldest lesson block
+    lessons = {}
+    result = await db.execute(
+        select(ContentBlock.chapter_id, ContentBlock.content_data)
+        .where(ContentBlock.chapter_id.in_(ids), ContentBlock.block_type == "lesson")
+        .order_by(ContentBlock.created_at.desc(), ContentBlock.id.desc())
+    )
+    for chapter_id, content_data in result:
+        lessons[chapter_id] = content_data
+
+    found = {row[0] for row in chapters}
+    gone = [chapter_id for chapter_id in ids if chapter_id not in found]
+    if gone:
+        await db.execute(delete(SearchDocument).where(SearchDocument.chapter_id.in_(gone)))
+    if not chapters:
+        return
+
+    rows = [
+        {
+            "chapter_id": chapter_id,
+            "subject_id": subject_id,
+            "subject_name": subject_name,
+            "grade_level": grade_level,
+            "title": title,
+            "description": description,
+            "body": lesson_text(lessons.get(chapter_id)),
+        }
+        for chapter_id, title, description, subject_id, subject_name, grade_level in chapters
+    ]
+    stmt = dialect_insert(db, SearchDocument)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SearchDocument.chapter_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("subject_id", "subject_name", "grade_level", "title", "description", "body")
+        }
+    )
+    await db.execute(stmt, rows)
+
+
+async def search(db: AsyncSession, query: str, grade: Optional[int] = None,
+                 limit: Optional[int] = None) -> list[SearchResult]:
+    """Chapters matching every word of `query` (the last one as a prefix), best first."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    limit = min(limit or settings.SEARCH_DEFAULT_LIMIT, settings.SEARCH_MAX_LIMIT)
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        rows = await _search_postgres(db, terms, grade, limit)
+    elif dialect == "sqlite" and await _has_fts_index(db):
+        rows = await _search_fts(db, terms, grade, limit)
+    else:
+        rows = await _search_like(db, terms, grade, limit)
+    return [SearchResult(**row) for row in rows]
+
+
+async def _has_fts_index(db: AsyncSession) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        result = await db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_documents_fts'")
+        )
+        _fts_available = result.first() is not None
+        if not _fts_available:
+            logger.warning("search_documents_fts is missing; content search falls back to LIKE scans")
+    return _fts_available
+
+
+async def _search_fts(db: AsyncSession, terms: list[str], grade: Optional[int], limit: int) -> list[dict]:
+    # Quoted terms can't be read as FTS5 operators; the last one matches as a prefix
+    match = " ".join(f'"{term}"' for term in terms)
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        match += "*"
+    match = f"{{title description body subject_name}} : ({match})"
+    if grade is not None:
+        # A column filter lets FTS5 intersect posting lists instead of ranking every match first
+        match += f' AND grade_level : "{int(grade)}"'
+    # Ranked and snippeted inside the FTS table alone: SQLite only evaluates snippet() for the rows
+    # that survive the LIMIT, but joining (or a CTE) before the sort makes it run for every match
+    hits = (await db.execute(
+        text(
+            "SELECT rowid AS id, snippet(search_documents_fts, -1, :start, :end, :ellipsis, :words) AS snippet, "
+            f"bm25(search_documents_fts, {', '.join(map(str, FTS_WEIGHTS))}) AS rank "
+            "FROM search_documents_fts WHERE search_documents_fts MATCH :match ORDER BY rank LIMIT :limit"
+        ).bindparams(
+            start=HIGHLIGHT_START, end=HIGHLIGHT_END, ellipsis=ELLIPSIS, words=SNIPPET_WORDS,
+            match=match, limit=limit
+        )
+    )).all()
+    if not hits:
+        return []
+    documents = {
+        row.id: row
+        for row in await db.execute(
+            text(
+                "SELECT rowid AS id, chapter_id, subject_id, subject_name, grade_level, title "
+                "FROM search_documents WHERE rowid IN :ids"
+            ).bindparams(bindparam("ids", expanding=True), ids=[hit.id for hit in hits])
+        )
+    }
+    return [
+        {
+            "chapter_id": uuid.UUID(str(documents[hit.id].chapter_id)),
+            "subject_id": uuid.UUID(str(documents[hit.id].subject_id)),
+            "subject_name": documents[hit.id].subject_name,
+            "grade_level": documents[hit.id].grade_level,
+            "title": documents[hit.id].title,
+            "snippet": hit.snippet or "",
+            # bm25 is lower for better matches
+            "score": -hit.rank,
+        }
+        for hit in hits
+        if hit.id in documents
+    ]
+
+
+async def _search_postgres(db: AsyncSession, terms: list[str], grade: Optional[int], limit: int) -> list[dict]:
+    tsquery = " & ".join(terms)
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        tsquery += ":*"
+    grade_filter = "AND grade_level = :grade " if grade is not None else ""
+    # Headlines are expensive, so only the page of results gets one
+    result = await db.execute(
+        text(
+            "WITH hits AS ("
+            "SELECT chapter_id, subject_id, subject_name, grade_level, title, description, body, "
+            "ts_rank_cd(search_vector, query) AS rank "
+            "FROM search_documents, to_tsquery('english', :tsquery) AS query "
+            f"WHERE search_vector @@ query {grade_filter}"
+            "ORDER BY rank DESC LIMIT :limit) "
+            "SELECT chapter_id, subject_id, subject_name, grade_level, title, rank, "
+            "ts_headline('english', concat_ws(' ', description, body), to_tsquery('english', :tsquery), :options) "
+            "AS snippet FROM hits ORDER BY rank DESC"
+        ).bindparams(
+            tsquery=tsquery, limit=limit,
+            options=f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}", FragmentDelimiter="{ELLIPSIS}", '
+                    f'MaxFragments=1, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}',
+            **({"grade": grade} if grade is not None else {})
+        )
+    )
+    return [
+        {
+            "chapter_id": row.chapter_id,
+            "subject_id": row.subject_id,
+            "subject_name": row.subject_name,
+            "grade_level": row.grade_level,
+            "title": row.title,
+            "snippet": row.snippet or "",
+            "score": float(row.rank),
+        }
+        for row in result
+    ]
+
+
+async def _search_like(db: AsyncSession, terms: list[str], grade: Optional[int], limit: int) -> list[dict]:
+    query = select(SearchDocument).limit(limit)
+    for term in terms:
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.where(or_(
+            SearchDocument.title.ilike(pattern, escape="\\"),
+            SearchDocument.description.ilike(pattern, escape="\\"),
+            SearchDocument.body.ilike(pattern, escape="\\")
+        ))
+    if grade is not None:
+        query = query.where(SearchDocument.grade_level == grade)
+    documents = (await db.execute(query)).scalars().all()
+
+    results = []
+    for document in documents:
+        title = document.title.lower()
+        score = float(sum(term in title for term in terms))
+        results.append({
+            "chapter_id": document.chapter_id,
+            "subject_id": document.subject_id,
+            "subject_name": document.subject_name,
+            "grade_level": document.grade_level,
+            "title": document.title,
+            "snippet": _snippet(" ".join(filter(None, [document.description, document.body])), terms),
+            "score": score,
+        })
+    results.sort(key=lambda result: -result["score"])
+    return results
+
+
+def _snippet(content: str, terms: list[str]) -> str:
+    """SNIPPET_WORDS words around the first matched term, matches highlighted."""
+    words = content.split()
+    hit = next((i for i, word in enumerate(words) if any(term in word.lower() for term in terms)), 0)
+    start = max(0, hit - SNIPPET_WORDS // 2)
+    window = [
+        f"{HIGHLIGHT_START}{word}{HIGHLIGHT_END}" if any(term in word.lower() for term in terms) else word
+        for word in words[start:start + SNIPPET_WORDS]
+    ]
+    return (ELLIPSIS if start else "") + " ".join(window) + (ELLIPSIS if start + SNIPPET_WORDS < len(words) else "")
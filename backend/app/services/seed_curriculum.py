@@ -7,32 +7,22 @@ import sys
 # Ensure the project root is on PYTHONPATH so absolute imports work when running this script directly
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..", "backend")))
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.curriculum import Subject, Chapter, ContentBlock
+from app.models.curriculum import Subject, Chapter, ContentBlock, content_metadata
+from app.services.curriculum_cache import bump_curriculum_version
+from app.services import quiz_service, search_service, stats_service
 
-# Helper to create a lesson content block
-async def _create_lesson(db: AsyncSession, chapter: Chapter, title: str, markdown: str):
-    lesson = ContentBlock(
-        chapter_id=chapter.id,
-        block_type="lesson",
-        content_data={"markdown": markdown},
-        ai_model_used="seed_script",
-    )
-    db.add(lesson)
-    await db.flush()
-    return lesson
-
-# Helper to create a quiz content block
-async def _create_quiz(db: AsyncSession, chapter: Chapter, title: str, questions: list):
-    quiz = ContentBlock(
-        chapter_id=chapter.id,
-        block_type="quiz",
-        content_data={"questions": questions},
-        ai_model_used="seed_script",
-    )
-    db.add(quiz)
-    await db.flush()
-    return quiz
+# Core inserts skip the ORM listener that fills in content_size and content_hash
+def _content_block_row(chapter_id: uuid.UUID, block_type: str, content_data: dict) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "chapter_id": chapter_id,
+        "block_type": block_type,
+        "content_data": content_data,
+        **content_metadata(content_data),
+        "ai_model_used": "seed_script",
+    }
 
 # Sample data for Standard 4 (CBSE) – limited to a few chapters per subject for brevity.
 MATHS_CHAPTERS = [
@@ -121,33 +111,38 @@ SCIENCE_CHAPTERS = [
 
 async def seed_standard_4(db: AsyncSession):
     """Create subjects, chapters, lessons and quizzes for Grade 4 (CBSE)."""
-    # Subjects
-    maths = Subject(name="Mathematics", grade_level=4, description="Basic arithmetic, geometry, and data handling.")
-    english = Subject(name="English", grade_level=4, description="Reading, grammar and writing skills.")
-    science = Subject(name="Science", grade_level=4, description="Living things, matter and basic experiments.")
-    db.add_all([maths, english, science])
-    await db.flush()  # obtain IDs
-
-    # Helper to add chapters and content
-    async def _add_chapters(subject: Subject, chapters_data: list):
+    # IDs are generated here so every table is written with one multi-row INSERT
+    subjects = [
+        ("Mathematics", "Basic arithmetic, geometry, and data handling.", MATHS_CHAPTERS),
+        ("English", "Reading, grammar and writing skills.", ENGLISH_CHAPTERS),
+        ("Science", "Living things, matter and basic experiments.", SCIENCE_CHAPTERS),
+    ]
+    subject_rows, chapter_rows, block_rows = [], [], []
+    for name, description, chapters_data in subjects:
+        subject_id = uuid.uuid4()
+        subject_rows.append({"id": subject_id, "name": name, "grade_level": 4, "description": description})
         for idx, ch_data in enumerate(chapters_data, start=1):
-            chapter = Chapter(
-                subject_id=subject.id,
-                title=ch_data["title"],
-                order_index=idx,
-                description="Generated by seed script"
-            )
-            db.add(chapter)
-            await db.flush()
-            # Lesson
-            await _create_lesson(db, chapter, f"{ch_data['title']} Lesson", ch_data["lesson_md"])
-            # Quiz
-            await _create_quiz(db, chapter, f"{ch_data['title']} Quiz", ch_data["quiz_questions"])
-        await db.commit()
+            chapter_id = uuid.uuid4()
+            chapter_rows.append({
+                "id": chapter_id,
+                "subject_id": subject_id,
+                "title": ch_data["title"],
+                "order_index": idx,
+                "description": "Generated by seed script",
+            })
+            block_rows.append(_content_block_row(chapter_id, "lesson", {"markdown": ch_data["lesson_md"]}))
+            block_rows.append(_content_block_row(
+                chapter_id, "quiz", quiz_service.normalize_quiz({"questions": ch_data["quiz_questions"]})
+            ))
 
-    await _add_chapters(maths, MATHS_CHAPTERS)
-    await _add_chapters(english, ENGLISH_CHAPTERS)
-    await _add_chapters(science, SCIENCE_CHAPTERS)
+    await db.execute(insert(Subject), subject_rows)
+    await db.execute(insert(Chapter), chapter_rows)
+    await db.execute(insert(ContentBlock), block_rows)
+    await search_service.reindex_chapters(db, [row["id"] for row in chapter_rows])
+    await stats_service.increment(db, stats_service.SUBJECTS, len(subject_rows))
+    await stats_service.increment(db, stats_service.CHAPTERS, len(chapter_rows))
+    await bump_curriculum_version(db)
+    await db.commit()
 
     print("✅ Standard 4 curriculum seeded.")
 
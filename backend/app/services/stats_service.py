@@ -0,0 +1,213 @@
+"""
+Incrementally maintained platform statistics.
+
+Totals live in `stat_counters` and per-day series in `daily_stats`. Write
+paths update them in their own transaction (`increment`, `increment_daily`,
+`record_activity`), so reading the admin dashboard is one small query no
+matter how large progress and profiles grow. `rollup` recomputes
+everything from the source tables; run it periodically with
+rollup_stats.py to correct drift from writes that bypass the API.
+"""
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, delete, cast, Date, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.database import dialect_insert
+from app.models.curriculum import Subject, Chapter
+from app.models.user import Profile
+from app.models.progress import StudentProgress
+from app.models.stats import StatCounter, DailyStat, ProfileActivityDay
+
+logger = logging.getLogger(__name__)
+
+# Totals
+SUBJECTS = "subjects"
+CHAPTERS = "chapters"
+STUDENTS = "students"
+LESSONS_COMPLETED = "lessons_completed"
+COUNTERS = (SUBJECTS, CHAPTERS, STUDENTS, LESSONS_COMPLETED)
+
+# Daily series
+ACTIVE_STUDENTS = "active_students"
+NEW_STUDENTS = "new_students"
+DAILY_SERIES = (LESSONS_COMPLETED, ACTIVE_STUDENTS, NEW_STUDENTS)
+
+# (profile id, day) pairs this worker has already recorded, to skip the insert
+_recorded_activity = LRUCache(10000)
+# session.info key of the pairs recorded in a session's open transaction
+PENDING_ACTIVITY = "stats_pending_activity"
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_committed_activity(session):
+    for key in session.info.pop(PENDING_ACTIVITY, ()):
+        _recorded_activity.set(key, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_activity(session):
+    session.info.pop(PENDING_ACTIVITY, None)
+
+
+def today() -> date:
+    return datetime.utcnow().date()
+
+
+async def increment(db: AsyncSession, name: str, delta: int = 1):
+    """Add `delta` to a total, in the caller's transaction."""
+    stmt = dialect_insert(db, StatCounter).values(name=name, value=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StatCounter.name],
+        set_={"value": StatCounter.value + delta, "updated_at": func.now()}
+    )
+    await db.execute(stmt)
+
+
+async def increment_daily(db: AsyncSession, name: str, delta: int = 1, day: Optional[date] = None):
+    """Add `delta` to one day of a series (today by default), in the caller's transaction."""
+    stmt = dialect_insert(db, DailyStat).values(day=day or today(), name=name, value=delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStat.day, DailyStat.name],
+        set_={"value": DailyStat.value + delta}
+    )
+    await db.execute(stmt)
+
+
+async def record_activity(db: AsyncSession, profile_id, day: Optional[date] = None) -> bool:
+    """
+    Count a profile as active today, in the caller's transaction. Only its
+    first activity of the day moves the active-students series.
+    
+    Returns:
+        bool: False if this worker already committed it today, or this
+            transaction already recorded it, and nothing was written
+    """
+    profile_id = uuid.UUID(str(profile_id))
+    day = day or today()
+    key = (profile_id, day)
+    pending = db.info.setdefault(PENDING_ACTIVITY, set())
+    if _recorded_activity.get(key) or key in pending:
+        return False
+    result = await db.execute(
+        dialect_insert(db, ProfileActivityDay)
+        .values(profile_id=profile_id, day=day)
+        .on_conflict_do_nothing()
+    )
+    if result.rowcount:
+        await increment_daily(db, ACTIVE_STUDENTS, day=day)
+    # Only remembered once the row is committed; a rolled back transaction records it again next time
+    pending.add(key)
+    return True
+
+
+async def get_counters(db: AsyncSession) -> dict[str, int]:
+    """Every total, in one query. Missing counters read as 0."""
+    result = await db.execute(select(StatCounter.name, StatCounter.value).where(StatCounter.name.in_(COUNTERS)))
+    values = dict(result.all())
+    return {name: values.get(name, 0) for name in COUNTERS}
+
+
+async def get_daily(db: AsyncSession, days: int) -> list[dict]:
+    """
+    The last `days` days (today included) of every daily series, oldest first.
+    Days without any activity are filled with zeros.
+    """
+    end = today()
+    start = end - timedelta(days=days - 1)
+    result = await db.execute(
+        select(DailyStat.day, DailyStat.name, DailyStat.value)
+        .where(DailyStat.day >= start, DailyStat.name.in_(DAILY_SERIES))
+    )
+    by_day: dict[date, dict[str, int]] = {}
+    for day, name, value in result.all():
+        by_day.setdefault(day, {})[name] = value
+
+    points = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        values = by_day.get(day, {})
+        points.append({"day": day, **{name: values.get(name, 0) for name in DAILY_SERIES}})
+    return points
+
+
+async def rollup(db: AsyncSession, days: Optional[int] = None):
+    """
+    Recompute the totals and daily series from the source tables and commit.
+
+    Increments committed while it runs can be overwritten, so schedule it
+    for a quiet period; the next run corrects them anyway.
+
+    Args:
+        db: Database session
+        days: Only rebuild the series for this many most recent days;
+            None rebuilds all of history
+    """
+    totals = {
+        SUBJECTS: select(func.count(Subject.id)),
+        CHAPTERS: select(func.count(Chapter.id)),
+        STUDENTS: select(func.count(Profile.id)),
+        LESSONS_COMPLETED: select(func.count(StudentProgress.id)).where(StudentProgress.status == 'completed'),
+    }
+    for name, query in totals.items():
+        value = (await db.execute(query)).scalar() or 0
+        stmt = dialect_insert(db, StatCounter).values(name=name, value=value)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[StatCounter.name],
+            set_={"value": stmt.excluded.value, "updated_at": func.now()}
+        ))
+
+    start = today() - timedelta(days=days - 1) if days else None
+    completed_day = _day_of(db, StudentProgress.completed_at)
+    created_day = _day_of(db, Profile.created_at)
+    series = {
+        LESSONS_COMPLETED: (
+            select(completed_day, func.count())
+            .where(StudentProgress.status == 'completed', StudentProgress.completed_at.is_not(None))
+            .group_by(completed_day),
+            StudentProgress.completed_at
+        ),
+        NEW_STUDENTS: (
+            select(created_day, func.count()).group_by(created_day),
+            Profile.created_at
+        ),
+        ACTIVE_STUDENTS: (
+            select(ProfileActivityDay.day, func.count()).group_by(ProfileActivityDay.day),
+            ProfileActivityDay.day
+        ),
+    }
+    for name, (query, day_column) in series.items():
+        clear = delete(DailyStat).where(DailyStat.name == name)
+        if start is not None:
+            query = query.where(day_column >= start)
+            clear = clear.where(DailyStat.day >= start)
+        rows = (await db.execute(query)).all()
+        await db.execute(clear)
+        values = [
+            {"day": _as_date(day), "name": name, "value": count}
+            for day, count in rows
+            if day is not None
+        ]
+        if values:
+            await db.execute(dialect_insert(db, DailyStat), values)
+
+    await db.commit()
+    logger.info("Stats rolled up")
+
+
+def _day_of(db: AsyncSession, column):
+    """Date part of a timestamp column, grouped on in SQL."""
+    if db.get_bind().dialect.name == "sqlite":
+        # CAST(... AS DATE) has numeric affinity on SQLite and would yield the year
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text
+    return date.fromisoformat(value[:10]) if isinstance(value, str) else value
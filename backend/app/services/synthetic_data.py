@@ -0,0 +1,333 @@
+"""
+Deterministic synthetic dataset for load and performance testing.
+
+`generate` fills a database with parents, student profiles, a curriculum
+(subjects, chapters, lessons and quizzes for every grade), student
+progress, activity days and earned badges. Everything is drawn from one
+`random.Random(seed)`, ids included, so the same options always produce
+the same rows; dates are relative to `until` (today by default). Rows are
+written with multi-row INSERTs, one transaction per batch, and the
+dashboard statistics are rebuilt at the end with `stats_service.rollup`.
+
+The distributions aim to look like a real deployment rather than a grid:
+
+- families have one to three children (55% / 35% / 10%),
+- engagement is heavy-tailed (lognormal): most students have done a few
+  chapters, a few have done nearly all of their grade,
+- students take each subject's chapters in order, so early chapters are
+  the busiest, and their latest chapter per subject may be unfinished,
+- each student has a skill level (beta distribution) that drives quiz
+  scores, XP and coins,
+- activity falls between the student's sign-up date and `until`.
+
+All parents share one password so load tests can log in as any of them.
+"""
+import logging
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_password_hash
+from app.models.curriculum import Subject, Chapter, ContentBlock, content_metadata
+from app.models.gamification import Badge, ProfileBadge
+from app.models.progress import StudentProgress
+from app.models.stats import ProfileActivityDay
+from app.models.user import User, Profile
+from app.services import quiz_service, search_service, stats_service
+from app.services.curriculum_cache import bump_curriculum_version
+from app.services.seed_curriculum import MATHS_CHAPTERS, ENGLISH_CHAPTERS, SCIENCE_CHAPTERS
+from app.services.seed_data import BADGES
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DOMAIN = "synthetic.example.com"
+ADMIN_EMAIL = f"admin@{EMAIL_DOMAIN}"
+AI_MODEL = "synthetic"
+
+SUBJECTS = [
+    ("Mathematics", MATHS_CHAPTERS),
+    ("English", ENGLISH_CHAPTERS),
+    ("Science", SCIENCE_CHAPTERS),
+    ("Social Studies", None),
+    ("Computer Science", None),
+    ("Environmental Studies", None),
+    ("Hindi", None),
+    ("Art", None),
+]
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Ananya", "Arjun", "Diya", "Emma", "Ethan", "Fatima", "Ishaan", "Kabir",
+    "Kavya", "Liam", "Maya", "Meera", "Noah", "Olivia", "Priya", "Rahul", "Riya", "Rohan",
+    "Saanvi", "Sara", "Vihaan", "Zara",
+]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Iyer", "Khan", "Das", "Reddy", "Smith", "Garcia", "Nair"]
+
+# Share of families with one, two and three children
+FAMILY_SIZES = ([1, 2, 3], [55, 35, 10])
+
+# Per-student activity weight ~ lognormal(0, ENGAGEMENT_SIGMA); larger means a longer tail
+ENGAGEMENT_SIGMA = 1.2
+
+# Chance that a student's latest chapter in a subject is still in progress
+IN_PROGRESS_RATE = 0.4
+
+
+@dataclass
+class SyntheticDataset:
+    """What to generate; see generate_synthetic_data.py for the command-line equivalents."""
+    students: int = 1000
+    progress_rows: int = 20000  # Target; no student gets more than their grade's chapters
+    grades: int = 12
+    subjects_per_grade: int = 5
+    chapters_per_subject: int = 24
+    days: int = 365  # Sign-ups are spread over this many days before `until`
+    seed: int = 42
+    batch_size: int = 10000  # Progress rows per transaction
+    password: str = "password"
+    until: Optional[date] = None  # Default: today
+
+
+@dataclass
+class GenerationStats:
+    parents: int = 0
+    profiles: int = 0
+    subjects: int = 0
+    chapters: int = 0
+    content_blocks: int = 0
+    progress_rows: int = 0
+    activity_days: int = 0
+    badges_awarded: int = 0
+    batches: int = 0
+
+
+@dataclass
+class _Grade:
+    chapters: list = field(default_factory=list)  # (chapter id, question count), in the order students take them
+
+
+class _Buffer:
+    """Pending rows per table, flushed in foreign-key order."""
+
+    TABLES = (User, Profile, StudentProgress, ProfileActivityDay, ProfileBadge)
+
+    def __init__(self):
+        self.rows = {model: [] for model in self.TABLES}
+
+    async def flush(self, db: AsyncSession):
+        for model, rows in self.rows.items():
+            if rows:
+                # Core rather than ORM bulk inserts: the ORM splits a batch wherever a
+                # row's NULL columns differ from the previous row's
+                await db.execute(insert(model.__table__), rows)
+                rows.clear()
+        await db.commit()
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+async def generate(db: AsyncSession, options: SyntheticDataset) -> GenerationStats:
+    """
+    Write a synthetic dataset.
+
+    Raises:
+        ValueError: If the options are out of range or the database already
+            holds a synthetic dataset
+    """
+    if options.students < 1 or options.grades < 1 or options.subjects_per_grade < 1 or options.chapters_per_subject < 1:
+        raise ValueError("students, grades, subjects per grade and chapters per subject must be at least 1")
+    if options.subjects_per_grade > len(SUBJECTS):
+        raise ValueError(f"At most {len(SUBJECTS)} subjects per grade")
+    existing = await db.execute(select(User.id).where(User.email == ADMIN_EMAIL))
+    if existing.first() is not None:
+        raise ValueError("The database already contains a synthetic dataset")
+
+    rng = random.Random(options.seed)
+    until = datetime.combine(options.until or date.today(), time())
+    stats = GenerationStats()
+
+    grades = await _write_curriculum(db, rng, options, stats)
+    badges = await _ensure_badges(db, rng)
+
+    password_hash = get_password_hash(options.password)
+    await db.execute(insert(User), [{
+        "id": _uuid(rng), "email": ADMIN_EMAIL, "hashed_password": password_hash, "full_name": "Synthetic Admin",
+        "role": "admin", "is_admin": True, "is_active": True, "created_at": until - timedelta(days=options.days),
+    }])
+
+    # Draw every student first: progress per student is scaled so the total meets the target
+    students = [
+        (
+            rng.randint(1, options.grades),
+            rng.betavariate(4, 2),
+            rng.random() * options.days,
+            rng.lognormvariate(0, ENGAGEMENT_SIGMA),
+        )
+        for _ in range(options.students)
+    ]
+    per_grade = options.subjects_per_grade * options.chapters_per_subject
+    scale = _engagement_scale([weight for *_, weight in students], per_grade, options.progress_rows)
+
+    buffer = _Buffer()
+    next_student = 0
+    while next_student < len(students):
+        size = min(rng.choices(*FAMILY_SIZES)[0], len(students) - next_student)
+        family = students[next_student:next_student + size]
+        next_student += size
+
+        stats.parents += 1
+        parent_id = _uuid(rng)
+        last_name = rng.choice(LAST_NAMES)
+        joined = [until - timedelta(days=days_ago) for _, _, days_ago, _ in family]
+        buffer.rows[User].append({
+            "id": parent_id, "email": f"parent{stats.parents}@{EMAIL_DOMAIN}", "hashed_password": password_hash,
+            "full_name": f"{rng.choice(FIRST_NAMES)} {last_name}", "role": "parent", "is_admin": False,
+            "is_active": True, "created_at": min(joined),
+        })
+        for (grade, skill, _, weight), created_at in zip(family, joined):
+            count = min(per_grade, round(weight * scale))
+            _add_student(buffer, rng, stats, options, parent_id, f"{rng.choice(FIRST_NAMES)} {last_name}",
+                         grade, skill, created_at, until, grades[grade].chapters[:count], badges)
+
+        if len(buffer.rows[StudentProgress]) >= options.batch_size:
+            await buffer.flush(db)
+            stats.batches += 1
+            logger.info(f"Synthetic data: {stats.profiles} profiles, {stats.progress_rows} progress rows")
+    await buffer.flush(db)
+    stats.batches += 1
+
+    await bump_curriculum_version(db)
+    await stats_service.rollup(db)
+    return stats
+
+
+def _engagement_scale(weights: list[float], cap: int, target: int) -> float:
+    """Factor that makes sum(min(cap, round(w * factor))) come out at about `target`."""
+    if target >= cap * len(weights):
+        return float(cap)  # Every student does every chapter
+    low, high = 0.0, target / sum(weights) * 2 + cap
+    for _ in range(40):
+        mid = (low + high) / 2
+        if sum(min(cap, round(w * mid)) for w in weights) < target:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+async def _write_curriculum(db: AsyncSession, rng: random.Random, options: SyntheticDataset,
+                            stats: GenerationStats) -> dict[int, _Grade]:
+    fallback = MATHS_CHAPTERS + ENGLISH_CHAPTERS + SCIENCE_CHAPTERS
+    grades = {}
+    subject_rows, chapter_rows, block_rows = [], [], []
+    for grade_level in range(1, options.grades + 1):
+        grade = grades[grade_level] = _Grade()
+        by_position = [[] for _ in range(options.chapters_per_subject)]
+        for name, templates in SUBJECTS[:options.subjects_per_grade]:
+            templates = templates or fallback
+            subject_id = _uuid(rng)
+            subject_rows.append({
+                "id": subject_id, "name": name, "grade_level": grade_level,
+                "description": f"{name} for grade {grade_level}",
+            })
+            for position in range(options.chapters_per_subject):
+                template = templates[position % len(templates)]
+                title = template["title"]
+                if position >= len(templates):
+                    title = f"{title} – Part {position // len(templates) + 1}"
+                chapter_id = _uuid(rng)
+                chapter_rows.append({
+                    "id": chapter_id, "subject_id": subject_id, "title": title, "order_index": position + 1,
+                    "description": f"{title} for grade {grade_level}",
+                })
+                quiz = quiz_service.normalize_quiz({"questions": template["quiz_questions"]})
+                lesson = {"markdown": f"# {title}\n\n{template['lesson_md']}"}
+                for block_type, content_data in (("lesson", lesson), ("quiz", quiz)):
+                    # Core inserts skip the ORM listener that fills in content_size and content_hash
+                    block_rows.append({
+                        "id": _uuid(rng), "chapter_id": chapter_id, "block_type": block_type,
+                        "content_data": content_data, **content_metadata(content_data), "ai_model_used": AI_MODEL,
+                    })
+                by_position[position].append((chapter_id, len(quiz["questions"])))
+        # Students work through their subjects side by side
+        grade.chapters = [chapter for position in by_position for chapter in position]
+
+    await db.execute(insert(Subject), subject_rows)
+    await db.execute(insert(Chapter), chapter_rows)
+    for start in range(0, len(block_rows), options.batch_size):
+        await db.execute(insert(ContentBlock), block_rows[start:start + options.batch_size])
+    await search_service.reindex_chapters(db, [row["id"] for row in chapter_rows])
+    await db.commit()
+    stats.subjects, stats.chapters, stats.content_blocks = len(subject_rows), len(chapter_rows), len(block_rows)
+    return grades
+
+
+async def _ensure_badges(db: AsyncSession, rng: random.Random) -> list[tuple[uuid.UUID, str, int]]:
+    """The badge catalogue as (id, requirement type, requirement value), seeding it if it's empty."""
+    count = (await db.execute(select(func.count(Badge.id)))).scalar()
+    if not count:
+        await db.execute(insert(Badge), [{**badge, "id": _uuid(rng)} for badge in BADGES])
+        await db.commit()
+    result = await db.execute(
+        select(Badge.id, Badge.requirement_type, Badge.requirement_value).order_by(Badge.name, Badge.id)
+    )
+    return [tuple(row) for row in result]
+
+
+def _add_student(buffer: _Buffer, rng: random.Random, stats: GenerationStats, options: SyntheticDataset,
+                 parent_id: uuid.UUID, display_name: str, grade: int, skill: float,
+                 created_at: datetime, until: datetime, chapters: list, badges: list):
+    profile_id = _uuid(rng)
+    span = (until - created_at).total_seconds()
+    times = sorted(created_at + timedelta(seconds=rng.random() * span) for _ in chapters)
+    # The last chapter a student opened in each subject is the one that may be unfinished
+    frontier = len(chapters) - min(len(chapters), options.subjects_per_grade)
+
+    xp = coins = completed = streak = 0
+    last_day = None
+    earned = {}
+    days = set()
+    for index, ((chapter_id, questions), at) in enumerate(zip(chapters, times)):
+        opened_at = at - timedelta(minutes=rng.randint(2, 30))
+        days.add(opened_at.date())
+        row = {
+            "id": _uuid(rng), "profile_id": profile_id, "chapter_id": chapter_id, "status": "in_progress",
+            "score": 0, "total_questions": questions, "xp_earned": 0, "completed_at": None,
+            "created_at": opened_at, "updated_at": opened_at,
+        }
+        if index < frontier or rng.random() >= IN_PROGRESS_RATE:
+            score = sum(rng.random() < skill for _ in range(questions))
+            row.update(status="completed", score=score, xp_earned=score * 10, completed_at=at, updated_at=at)
+            xp += score * 10
+            coins += score * 5
+            completed += 1
+            day = at.date()
+            days.add(day)
+            if day != last_day:
+                streak = streak + 1 if last_day is not None and day - last_day == timedelta(days=1) else 1
+                last_day = day
+            progress = {"xp_total": xp, "lessons_completed": completed, "streak_days": streak}
+            for badge_id, requirement_type, requirement_value in badges:
+                if badge_id not in earned and progress.get(requirement_type, -1) >= (requirement_value or 0):
+                    earned[badge_id] = at
+        buffer.rows[StudentProgress].append(row)
+
+    buffer.rows[Profile].append({
+        "id": profile_id, "parent_id": parent_id, "display_name": display_name, "current_grade": grade,
+        "xp": xp, "coins": coins, "created_at": created_at,
+    })
+    buffer.rows[ProfileActivityDay].extend({"profile_id": profile_id, "day": day} for day in sorted(days))
+    buffer.rows[ProfileBadge].extend(
+        {"id": _uuid(rng), "profile_id": profile_id, "badge_id": badge_id, "earned_at": earned_at}
+        for badge_id, earned_at in earned.items()
+    )
+    stats.profiles += 1
+    stats.progress_rows += len(chapters)
+    stats.activity_days += len(days)
+    stats.badges_awarded += len(earned)
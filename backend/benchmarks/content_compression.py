@@ -0,0 +1,108 @@
+"""
+Stored size and decode latency of content_blocks.content_data for each codec
+of app/core/compression.py: plain JSON, zlib, zstd and zstd with a trained
+dictionary.
+
+The corpus is the seed curriculum's lessons and quizzes, expanded into
+`--blocks` variants (chapters recombined, numbers changed) so it looks like
+a library of generated content rather than a dozen documents. The
+dictionary is trained on half of the blocks and measured on the other half.
+
+Usage (from backend/):
+    python benchmarks/content_compression.py --blocks 4000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp(prefix="learnivo-compression-")
+os.environ["CONTENT_ZSTD_DICT_DIR"] = TMP
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import compression
+from app.core.config import settings
+from app.services.seed_curriculum import MATHS_CHAPTERS, ENGLISH_CHAPTERS, SCIENCE_CHAPTERS
+
+
+def _corpus(blocks: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    chapters = MATHS_CHAPTERS + ENGLISH_CHAPTERS + SCIENCE_CHAPTERS
+    documents = []
+    for i in range(blocks):
+        chapter = rng.choice(chapters)
+        if i % 3 == 2:
+            questions = [dict(q, question=f"{q['question']} ({rng.randint(1, 999)})") for q in chapter["quiz_questions"]]
+            documents.append({"questions": questions})
+            continue
+        # Lessons of realistic length: a chapter plus sections borrowed from others
+        sections = chapter["lesson_md"].split("\n## ")
+        for _ in range(rng.randint(0, 3)):
+            sections += rng.choice(chapters)["lesson_md"].split("\n## ")[1:]
+        markdown = "\n## ".join(sections).replace("1000", str(rng.randint(100, 99999)))
+        documents.append({"markdown": markdown})
+    return documents
+
+
+def _measure(label: str, documents: list[dict], repeats: int):
+    stored = [compression.encode(d) for d in documents]
+    raw_bytes = sum(len(compression.decompress(s)) for s in stored)
+    stored_bytes = sum(len(s) for s in stored)
+
+    start = time.perf_counter()
+    for d in documents:
+        compression.encode(d)
+    encode_us = (time.perf_counter() - start) / len(documents) * 1e6
+
+    decode_us = []
+    for s in stored:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            compression.decode(s)
+        decode_us.append((time.perf_counter() - start) / repeats * 1e6)
+    decode_us.sort()
+    p95 = decode_us[int(len(decode_us) * 0.95)]
+
+    print(f"{label:<18} {stored_bytes / 1024:>10.1f} {raw_bytes / stored_bytes:>7.2f}x "
+          f"{encode_us:>10.1f} {statistics.median(decode_us):>11.1f} {p95:>11.1f}")
+
+
+def main(blocks: int, dict_size: int, repeats: int):
+    documents = _corpus(blocks)
+    training, measured = documents[::2], documents[1::2]
+    settings.CONTENT_COMPRESSION = "none"
+    median_size = statistics.median(len(compression.encode(d)) for d in measured)
+    print(f"{len(measured)} blocks measured, median {median_size:.0f} bytes of JSON "
+          f"(documents under {settings.CONTENT_COMPRESSION_MIN_BYTES} bytes stay uncompressed)\n")
+    print(f"{'codec':<18} {'stored KB':>10} {'ratio':>8} {'encode us':>10} {'decode p50':>11} {'decode p95':>11}")
+
+    _measure("plain json", measured, repeats)
+    settings.CONTENT_COMPRESSION = "zlib"
+    _measure("zlib", measured, repeats)
+
+    try:
+        zstandard = compression.require_zstandard()
+    except RuntimeError:
+        print("zstd               (zstandard not installed)")
+        return
+    settings.CONTENT_COMPRESSION = "zstd"
+    _measure("zstd", measured, repeats)
+
+    samples = [compression.decompress(compression.encode(d)) for d in training]
+    dictionary = zstandard.train_dictionary(dict_size, samples)
+    compression.dictionary_path(dictionary.dict_id()).write_bytes(dictionary.as_bytes())
+    settings.CONTENT_ZSTD_DICT_ID = dictionary.dict_id()
+    _measure(f"zstd + {dict_size // 1024}KB dict", measured, repeats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=4000)
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--repeats", type=int, default=5, help="Decodes timed per block")
+    args = parser.parse_args()
+    main(args.blocks, args.dict_size, args.repeats)
@@ -0,0 +1,126 @@
+"""
+Throughput of the JSONL curriculum import and export (transfer_curriculum.py,
+/admin/curriculum/import and /export) on a large synthetic curriculum.
+
+Builds a throwaway SQLite database with `alembic upgrade head`, writes a
+JSONL file with `--blocks` content blocks (lessons, quizzes, flashcards and
+video scripts over 12 grades) and times:
+
+- a first import, where every row is new,
+- the same import again, where every row is found by natural key and updated,
+- a full export.
+
+Usage (from backend/):
+    python benchmarks/curriculum_transfer.py --blocks 100000 --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+TMP = tempfile.mkdtemp(prefix="learnivo-transfer-")
+DB_PATH = os.path.join(TMP, "transfer.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+
+from app.core import database
+from app.services import curriculum_transfer
+from app.services.seed_curriculum import MATHS_CHAPTERS, ENGLISH_CHAPTERS, SCIENCE_CHAPTERS
+
+SUBJECTS = ["Mathematics", "English", "Science", "Social Studies", "Computer Science"]
+BLOCK_TYPES = ["lesson", "quiz", "flashcard", "video_script"]
+
+
+def _write_curriculum(path: str, blocks: int) -> int:
+    """Write a JSONL curriculum with `blocks` content blocks; returns the number of lines."""
+    seeds = MATHS_CHAPTERS + ENGLISH_CHAPTERS + SCIENCE_CHAPTERS
+    chapters = -(-blocks // len(BLOCK_TYPES))
+    per_subject = -(-chapters // (12 * len(SUBJECTS)))
+    lines = written = 0
+    with open(path, "w") as f:
+        def emit(record):
+            nonlocal lines
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            lines += 1
+
+        emit({"type": "meta", "format": curriculum_transfer.FORMAT, "version": curriculum_transfer.FORMAT_VERSION})
+        for grade in range(1, 13):
+            for subject in SUBJECTS:
+                if written >= blocks:
+                    return lines
+                emit({"type": "subject", "grade_level": grade, "name": subject, "description": f"{subject} for grade {grade}"})
+                for i in range(per_subject):
+                    seed = seeds[i % len(seeds)]
+                    title = f"{seed['title']} {i + 1}"
+                    key = {"grade_level": grade, "subject": subject}
+                    emit({"type": "chapter", **key, "title": title, "order_index": i + 1})
+                    for block_type in BLOCK_TYPES:
+                        if written >= blocks:
+                            break
+                        if block_type == "quiz":
+                            content = {"questions": seed["quiz_questions"]}
+                        else:
+                            content = {"markdown": f"{seed['lesson_md']}\n\n{block_type} {grade}.{i}"}
+                        emit({"type": "content_block", **key, "chapter": title, "block_type": block_type,
+                              "content_data": content, "ai_model_used": "benchmark"})
+                        written += 1
+    return lines
+
+
+async def _read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            yield chunk
+
+
+async def _import(path: str, batch_size: int):
+    started = time.perf_counter()
+    async with database.AsyncSessionLocal() as db:
+        importer = curriculum_transfer.CurriculumImporter(db, batch_size)
+        stats = await importer.import_lines(curriculum_transfer.iter_lines(_read_chunks(path)))
+    return stats, time.perf_counter() - started
+
+
+async def _export() -> tuple[int, int, float]:
+    started = time.perf_counter()
+    lines = size = 0
+    async with database.AsyncSessionLocal() as db:
+        async for line in curriculum_transfer.export_curriculum(db):
+            lines += 1
+            size += len(line)
+    return lines, size, time.perf_counter() - started
+
+
+async def _run(path: str, batch_size: int):
+    for label in ("import (new rows)", "import (re-run)"):
+        stats, seconds = await _import(path, batch_size)
+        print(f"{label:<20} {stats.lines:>8} lines {seconds:>7.1f}s {stats.lines / seconds:>9.0f} lines/s "
+              f"{stats.content_blocks / seconds:>9.0f} blocks/s  created {stats.created}, skipped {stats.skipped}")
+    lines, size, seconds = await _export()
+    print(f"{'export':<20} {lines:>8} lines {seconds:>7.1f}s {lines / seconds:>9.0f} lines/s "
+          f"{size / seconds / 1e6:>9.1f} MB/s")
+
+
+def main(blocks: int, batch_size: int):
+    database.engine.echo = False
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    path = os.path.join(TMP, "curriculum.jsonl")
+    lines = _write_curriculum(path, blocks)
+    print(f"{blocks} content blocks, {lines} lines, {os.path.getsize(path) / 1e6:.1f} MB, batch size {batch_size}\n")
+    asyncio.run(_run(path, batch_size))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--blocks", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.blocks, args.batch_size)
@@ -0,0 +1,61 @@
+"""
+Compare bytes served for a chapter view: full-size originals vs the
+thumbnail derivatives the frontend now requests.
+
+Usage (from backend/):
+    python benchmarks/derivative_bytes.py --images 30 --width 480 --format webp
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image as PILImage, ImageDraw
+
+from app.services.image_derivatives import render_derivative, snap_width
+
+
+def _make_photo(path: str, size: tuple[int, int]):
+    """A phone-photo-like JPEG: gradients, shapes and sensor noise."""
+    w, h = size
+    img = PILImage.linear_gradient("L").resize(size).convert("RGB")
+    draw = ImageDraw.Draw(img)
+    for i in range(12):
+        draw.ellipse((i * w // 14, i * h // 20, i * w // 14 + w // 5, i * h // 20 + h // 5),
+                     fill=(40 * i % 255, 90, 200 - 10 * i))
+    noise = PILImage.effect_noise(size, 20).convert("RGB")
+    PILImage.blend(img, noise, 0.15).save(path, "JPEG", quality=92)
+
+
+def main(images: int, width: int, fmt: str):
+    tmp = tempfile.mkdtemp(prefix="learnivo-deriv-")
+    width = snap_width(width)
+    original_bytes = derived_bytes = 0
+    render_seconds = 0.0
+
+    for i in range(images):
+        src = os.path.join(tmp, f"photo-{i}.jpg")
+        _make_photo(src, (3024, 2268) if i % 2 else (1920, 1080))
+        original_bytes += os.path.getsize(src)
+
+        started = time.perf_counter()
+        derived_bytes += render_derivative(src, os.path.join(tmp, f"photo-{i}_w{width}.{fmt}"), width, fmt, 80)
+        render_seconds += time.perf_counter() - started
+
+    print(f"{images} images per chapter view, {width}px {fmt}")
+    print(f"originals:   {original_bytes / 1024:.0f} KiB")
+    print(f"derivatives: {derived_bytes / 1024:.0f} KiB ({original_bytes / derived_bytes:.1f}x smaller)")
+    print(f"render time: {render_seconds / images * 1000:.1f} ms per derivative (one-off, then cached)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=30)
+    parser.add_argument("--width", type=int, default=480)
+    parser.add_argument("--format", default="webp")
+    args = parser.parse_args()
+    main(args.images, args.width, args.format)
@@ -0,0 +1,159 @@
+"""
+Time GET /images listing queries on a large image library: the old
+COUNT + OFFSET + ILIKE queries against keyset pages and indexed search.
+
+Builds a throwaway SQLite database with `alembic upgrade head`, fills it in
+steps up to each requested size and times each query shape at each size.
+
+Usage (from backend/):
+    python benchmarks/image_listing.py --rows 10000 1000000
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+TMP = tempfile.mkdtemp(prefix="learnivo-listing-")
+DB_PATH = os.path.join(TMP, "listing.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["UPLOAD_DIR"] = os.path.join(TMP, "uploads")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, or_, select
+
+from app.core import database
+from app.core.pagination import encode_cursor
+from app.models.image import Image
+from app.services.image_service import image_service
+
+PAGE_SIZE = 20
+WORDS = ["diagram", "fraction", "volcano", "triangle", "planet", "molecule", "map", "graph"]
+UPLOADER = uuid.uuid4()
+START = datetime(2024, 1, 1)
+
+
+def _fill(start: int, stop: int):
+    """Insert rows start..stop-1; ten uploads share each second, like batch uploads do."""
+    conn = sqlite3.connect(DB_PATH)
+    rows = []
+    for i in range(start, stop):
+        image_id = uuid.uuid4()
+        rows.append((
+            image_id.hex,
+            f"{image_id}.png",
+            f"{WORDS[i % len(WORDS)]}-{i}.png",
+            f"images/00/00/{image_id}.png",
+            1024,
+            "image/png",
+            UPLOADER.hex,
+            (START + timedelta(seconds=i // 10)).strftime("%Y-%m-%d %H:%M:%S"),
+        ))
+        if len(rows) == 50000:
+            conn.executemany(
+                "INSERT INTO images (id, filename, original_filename, file_path, file_size, mime_type, "
+                "uploaded_by, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row + (row[-1],) for row in rows]
+            )
+            rows = []
+    if rows:
+        conn.executemany(
+            "INSERT INTO images (id, filename, original_filename, file_path, file_size, mime_type, "
+            "uploaded_by, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [row + (row[-1],) for row in rows]
+        )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+async def _timed(fn, repeat: int = 5) -> float:
+    """Best of `repeat` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def _offset_page(db, page: int, search=None):
+    """The listing as it was: exact COUNT, then OFFSET, with leading-wildcard ILIKE."""
+    query = select(Image)
+    if search:
+        query = query.where(or_(
+            Image.original_filename.ilike(f"%{search}%"),
+            Image.filename.ilike(f"%{search}%")
+        ))
+    await db.execute(select(func.count()).select_from(query.subquery()))
+    query = query.order_by(Image.created_at.desc()).offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE)
+    return (await db.execute(query)).scalars().all()
+
+
+def _cursor_at(row_number: int) -> str:
+    """Cursor a client would hold after paging down to `row_number` (newest first)."""
+    conn = sqlite3.connect(DB_PATH)
+    created_at, row_id = conn.execute(
+        "SELECT created_at, id FROM images ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (row_number - 1,)
+    ).fetchone()
+    conn.close()
+    return encode_cursor(datetime.fromisoformat(created_at), uuid.UUID(row_id))
+
+
+async def _measure(rows: int):
+    deep_page = rows // PAGE_SIZE
+    deep_cursor = _cursor_at((deep_page - 1) * PAGE_SIZE)
+    rare = f"-{rows // 2}."
+
+    async with database.AsyncSessionLocal() as db:
+        cases = [
+            ("first page", lambda: _offset_page(db, 1),
+             lambda: image_service.list_images(db, page_size=PAGE_SIZE)),
+            ("last page", lambda: _offset_page(db, deep_page),
+             lambda: image_service.list_images(db, page_size=PAGE_SIZE, cursor=deep_cursor)),
+            ("first page + estimated total", lambda: _offset_page(db, 1),
+             lambda: image_service.list_images(db, page_size=PAGE_SIZE, count="estimate")),
+            ("search, common term", lambda: _offset_page(db, 1, "volcano"),
+             lambda: image_service.list_images(db, page_size=PAGE_SIZE, search="volcano")),
+            ("search, rare term", lambda: _offset_page(db, 1, rare),
+             lambda: image_service.list_images(db, page_size=PAGE_SIZE, search=rare)),
+        ]
+        print(f"\n{rows:,} images")
+        print(f"{'query':<30} {'offset/ILIKE':>14} {'keyset/index':>14}")
+        for name, old, new in cases:
+            old_ms = await _timed(old)
+            new_ms = await _timed(new)
+            print(f"{name:<30} {old_ms:>11.2f} ms {new_ms:>11.2f} ms")
+
+
+async def _run(sizes: list[int]):
+    filled = 0
+    for rows in sizes:
+        started = time.perf_counter()
+        await asyncio.to_thread(_fill, filled, rows)
+        print(f"\nloaded {rows - filled:,} rows in {time.perf_counter() - started:.1f}s")
+        filled = rows
+        await _measure(rows)
+    await database.engine.dispose()
+
+
+def main(sizes: list[int]):
+    database.engine.echo = False
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    asyncio.run(_run(sorted(sizes)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 1000000])
+    args = parser.parse_args()
+    main(args.rows)
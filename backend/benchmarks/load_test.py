@@ -0,0 +1,555 @@
+"""
+End-to-end load test of the API with a repeatable, seeded workload.
+
+Fills a database with the synthetic dataset (app/services/synthetic_data.py)
+plus a set of uploaded images, then runs `--concurrency` virtual users for
+`--duration` seconds. Each user repeatedly picks a scenario from the mix:
+
+    login            POST /auth/login as a random parent (bcrypt-bound)
+    lesson_open      GET a lesson of the student's grade, then its images
+    quiz_submit      GET a quiz, then submit answers for it
+    image            GET an image file, half of them resized (?w=320)
+    admin_generate   POST /admin/bulk-generate of a new subject
+
+AI generation always goes through MockProvider (OPENAI_API_KEY is cleared),
+so runs measure the app rather than a model. Requests go through an
+in-process ASGI transport, or with `--server uvicorn` to a real uvicorn
+(`--workers` processes) over HTTP. The report lists throughput, errors and
+p50/p95/p99 latency per route, plus database queries per request from
+GET /metrics (with several uvicorn workers, only the worker that answers
+the scrape).
+
+Traffic can be recorded (`--record`), one request per line in JSONL, and
+replayed (`--replay`) against a fresh database with the same options, at
+the recorded pace or as fast as possible. `--save-baseline` stores a run's
+numbers; `--baseline` compares a run against them and exits with status 1
+when a route's p95 latency regresses by more than `--tolerance`.
+
+The database is a throwaway SQLite file unless DATABASE_URL points at one
+(a dataset already generated there is reused).
+
+Usage (from backend/):
+    python benchmarks/load_test.py --mix default --concurrency 20 --duration 30
+    python benchmarks/load_test.py --mix login=1 --server uvicorn --workers 4
+    python benchmarks/load_test.py --record traffic.jsonl --save-baseline baseline.json
+    python benchmarks/load_test.py --replay traffic.jsonl --baseline baseline.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+TMP = tempfile.mkdtemp(prefix="learnivo-load-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(TMP, 'load.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(TMP, "uploads"))
+os.environ["OPENAI_API_KEY"] = ""  # Every AI call goes to MockProvider
+os.environ["DATABASE_ECHO"] = "false"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from PIL import Image as PILImage
+from sqlalchemy import exists, select
+
+from app.core import database
+from app.core.security import create_access_token
+from app.models.curriculum import Subject, Chapter, ContentBlock
+from app.models.image import Image
+from app.models.user import User, Profile
+from app.services import synthetic_data
+
+MIXES = {
+    "default": {"lesson_open": 50, "quiz_submit": 20, "image": 20, "login": 8, "admin_generate": 2},
+    "students": {"lesson_open": 60, "quiz_submit": 30, "image": 10},
+    "login_storm": {"login": 1},
+}
+IMAGE_PREFIX = "load-test-"
+IMAGE_SIZE = (800, 600)
+RESIZED_WIDTH = 320
+
+
+@dataclass
+class Student:
+    email: str
+    profile_id: str
+    grade: int
+
+
+@dataclass
+class Fixtures:
+    """The ids scenarios draw from, read back from the database."""
+    students: list[Student]
+    chapters: dict[int, list[str]]  # Grade -> chapters with a lesson and a quiz
+    images: list[str]  # In upload order, so recordings can refer to them by index
+    admin_email: str
+    password: str
+    tokens: dict[str, str] = field(default_factory=dict)  # Email -> bearer token
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)  # ms
+    errors: int = 0
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[max(math.ceil(p * len(ordered)) - 1, 0)] if ordered else 0.0
+
+
+class LoadRun:
+    """Sends requests for the scenarios, timing them and optionally recording them."""
+
+    def __init__(self, client: httpx.AsyncClient, fixtures: Fixtures, record: Optional[io.TextIOBase] = None):
+        self.client = client
+        self.fixtures = fixtures
+        self.record = record
+        self.routes: dict[str, RouteStats] = defaultdict(RouteStats)
+        self.started = time.perf_counter()
+        self.generated = 0
+
+    async def request(self, scenario: str, method: str, route: str, path_params: Optional[dict] = None, *,
+                      params: Optional[dict] = None, json_body=None, as_user: Optional[str] = None,
+                      image_index: Optional[int] = None) -> Optional[httpx.Response]:
+        path = route.format(**(path_params or {}))
+        headers = {"Authorization": f"Bearer {self.fixtures.tokens[as_user]}"} if as_user else None
+        at = time.perf_counter() - self.started
+        try:
+            response = await self.client.request(method, path, params=params, json=json_body, headers=headers)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        elapsed = (time.perf_counter() - self.started - at) * 1000
+
+        stats = self.routes[f"{method} {route}"]
+        stats.latencies.append(elapsed)
+        if status == 0 or status >= 400:
+            stats.errors += 1
+        if self.record is not None:
+            line = {
+                "at": round(at, 4), "scenario": scenario, "method": method, "route": route,
+                "path_params": path_params or {}, "params": params, "json": json_body, "as": as_user,
+                "status": status, "ms": round(elapsed, 2),
+            }
+            if image_index is not None:
+                line["image_index"] = image_index
+            self.record.write(json.dumps(line) + "\n")
+        return response if status and status < 400 else None
+
+
+# -- Scenarios ---------------------------------------------------------------
+
+async def login(run: LoadRun, rng: random.Random):
+    student = rng.choice(run.fixtures.students)
+    await run.request("login", "POST", "/api/v1/auth/login",
+                      json_body={"email": student.email, "password": run.fixtures.password})
+
+
+async def lesson_open(run: LoadRun, rng: random.Random):
+    student = rng.choice(run.fixtures.students)
+    chapter_id = rng.choice(run.fixtures.chapters[student.grade])
+    response = await run.request("lesson_open", "GET", "/api/v1/learning/{chapter_id}/lesson",
+                                 {"chapter_id": chapter_id}, params={"profile_id": student.profile_id},
+                                 as_user=student.email)
+    if response is not None:
+        await run.request("lesson_open", "GET", "/api/v1/learning/{chapter_id}/images",
+                          {"chapter_id": chapter_id}, as_user=student.email)
+
+
+async def quiz_submit(run: LoadRun, rng: random.Random):
+    student = rng.choice(run.fixtures.students)
+    chapter_id = rng.choice(run.fixtures.chapters[student.grade])
+    response = await run.request("quiz_submit", "GET", "/api/v1/learning/{chapter_id}/quiz",
+                                 {"chapter_id": chapter_id}, params={"profile_id": student.profile_id},
+                                 as_user=student.email)
+    if response is None:
+        return
+    questions = (response.json().get("quiz") or {}).get("questions") or []
+    answers = {
+        str(index): rng.choice(list(question.get("options") or {"A": ""}))
+        for index, question in enumerate(questions)
+    }
+    await run.request("quiz_submit", "POST", "/api/v1/learning/{chapter_id}/submit-quiz",
+                      {"chapter_id": chapter_id}, params={"profile_id": student.profile_id},
+                      json_body=answers, as_user=student.email)
+
+
+async def image(run: LoadRun, rng: random.Random):
+    index = rng.randrange(len(run.fixtures.images))
+    params = {"w": RESIZED_WIDTH} if rng.random() < 0.5 else None
+    await run.request("image", "GET", "/api/v1/images/{image_id}/file",
+                      {"image_id": run.fixtures.images[index]}, params=params, image_index=index)
+
+
+async def admin_generate(run: LoadRun, rng: random.Random):
+    run.generated += 1
+    grade = rng.choice(list(run.fixtures.chapters))
+    name = f"Load Test {rng.getrandbits(32):08x} {run.generated}"
+    await run.request("admin_generate", "POST", "/api/v1/admin/bulk-generate",
+                      json_body={"grade_level": grade, "subject_names": [name]},
+                      as_user=run.fixtures.admin_email)
+
+
+SCENARIOS = {
+    "login": login,
+    "lesson_open": lesson_open,
+    "quiz_submit": quiz_submit,
+    "image": image,
+    "admin_generate": admin_generate,
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """A preset name or "scenario=weight,..."."""
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# -- Setup -------------------------------------------------------------------
+
+def _png(rng: random.Random) -> bytes:
+    img = PILImage.effect_noise(IMAGE_SIZE, 32).convert("RGB")
+    tint = PILImage.new("RGB", IMAGE_SIZE, tuple(rng.randrange(256) for _ in range(3)))
+    buf = io.BytesIO()
+    PILImage.blend(img, tint, 0.5).save(buf, "PNG")
+    return buf.getvalue()
+
+
+async def prepare_dataset(options: synthetic_data.SyntheticDataset):
+    """Generate the synthetic dataset unless the database already holds one."""
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(select(User.id).where(User.email == synthetic_data.ADMIN_EMAIL))
+        if result.first() is not None:
+            print("reusing the synthetic dataset already in the database")
+            return
+        started = time.perf_counter()
+        stats = await synthetic_data.generate(db, options)
+    print(f"generated {stats.profiles} students, {stats.chapters} chapters, {stats.progress_rows} progress rows "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+async def load_fixtures(users: int, password: str) -> Fixtures:
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.email, Profile.id, Profile.current_grade)
+            .join(Profile, Profile.parent_id == User.id)
+            .where(User.email.like(f"%@{synthetic_data.EMAIL_DOMAIN}"))
+            .order_by(Profile.id)
+            .limit(users)
+        )
+        students = [Student(email, str(profile_id), grade) for email, profile_id, grade in result]
+
+        has_quiz = exists().where(ContentBlock.chapter_id == Chapter.id, ContentBlock.block_type == "quiz")
+        result = await db.execute(
+            select(Subject.grade_level, Chapter.id)
+            .join(Subject, Subject.id == Chapter.subject_id)
+            .where(has_quiz)
+            .order_by(Subject.grade_level, Chapter.id)
+        )
+        chapters = defaultdict(list)
+        for grade, chapter_id in result:
+            chapters[grade].append(str(chapter_id))
+
+        result = await db.execute(
+            select(Image.id).where(Image.original_filename.like(f"{IMAGE_PREFIX}%")).order_by(Image.original_filename)
+        )
+        images = [str(image_id) for image_id in result.scalars()]
+
+        result = await db.execute(select(User.id, User.email).where(User.email.in_(
+            {student.email for student in students} | {synthetic_data.ADMIN_EMAIL}
+        )))
+        tokens = {email: create_access_token(user_id) for user_id, email in result}
+
+    students = [student for student in students if chapters.get(student.grade)]
+    return Fixtures(students, dict(chapters), images, synthetic_data.ADMIN_EMAIL, password, tokens)
+
+
+async def upload_images(client: httpx.AsyncClient, fixtures: Fixtures, count: int, seed: int):
+    """Upload the missing load-test images and show each one in a chapter."""
+    headers = {"Authorization": f"Bearer {fixtures.tokens[fixtures.admin_email]}"}
+    rng = random.Random(seed)
+    chapters = [chapter_id for grade in sorted(fixtures.chapters) for chapter_id in fixtures.chapters[grade]]
+    for index in range(count):
+        content = _png(rng)  # Drawn for every index so later images stay the same
+        if index < len(fixtures.images):
+            continue
+        response = await client.post(
+            "/api/v1/images/upload", headers=headers,
+            files={"file": (f"{IMAGE_PREFIX}{index:04d}.png", content, "image/png")},
+        )
+        response.raise_for_status()
+        image_id = response.json()["id"]
+        fixtures.images.append(image_id)
+        chapter_id = chapters[index * 7 % len(chapters)]
+        response = await client.post(
+            f"/api/v1/admin/chapters/{chapter_id}/images/bulk", headers=headers,
+            json={"images": [{"image_id": image_id, "caption": f"Figure {index}"}]},
+        )
+        response.raise_for_status()
+
+
+# -- Running -----------------------------------------------------------------
+
+async def run_mix(run: LoadRun, mix: dict[str, float], concurrency: int, duration: float, seed: int):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(rng: random.Random):
+        while time.perf_counter() < deadline:
+            await SCENARIOS[rng.choices(names, weights)[0]](run, rng)
+
+    await asyncio.gather(*(virtual_user(random.Random(seed * 1000 + i)) for i in range(concurrency)))
+
+
+async def replay(run: LoadRun, lines: list[dict], concurrency: int, speed: float):
+    """Re-send recorded requests: at the recorded pace (scaled by speed), or with speed 0 as fast as possible."""
+    images = run.fixtures.images
+
+    async def send(line: dict):
+        path_params = dict(line["path_params"])
+        if "image_index" in line:
+            # Uploaded image ids differ between databases; the upload order doesn't
+            path_params["image_id"] = images[line["image_index"] % len(images)]
+        await run.request(line["scenario"], line["method"], line["route"], path_params,
+                          params=line.get("params"), json_body=line.get("json"), as_user=line.get("as"),
+                          image_index=line.get("image_index"))
+
+    if speed <= 0:
+        queue = iter(lines)
+
+        async def worker():
+            for line in queue:
+                await send(line)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def scheduled(line: dict):
+        async with semaphore:
+            await send(line)
+
+    tasks = []
+    for line in lines:
+        delay = line["at"] / speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(scheduled(line)))
+    await asyncio.gather(*tasks)
+
+
+async def db_queries_per_request(client: httpx.AsyncClient, fixtures: Fixtures) -> dict[str, float]:
+    """Mean database queries per request by route, from GET /metrics (the worker that answers)."""
+    try:
+        response = await client.get(
+            "/metrics", headers={"Authorization": f"Bearer {fixtures.tokens[fixtures.admin_email]}"}
+        )
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    sums, counts = {}, {}
+    for line in response.text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"learnivo_http_request_db_queries{suffix}{{"
+            if line.startswith(prefix):
+                labels, value = line[len(prefix):].rsplit("} ", 1)
+                fields = dict(part.split("=", 1) for part in labels.split('",'))
+                key = f"{fields['method'].strip(chr(34))} {fields['route'].strip(chr(34))}"
+                target[key] = float(value)
+    return {key: sums[key] / counts[key] for key in sums if counts.get(key)}
+
+
+def summarize(run: LoadRun, elapsed: float) -> dict:
+    routes = {}
+    for route, stats in sorted(run.routes.items()):
+        routes[route] = {
+            "count": len(stats.latencies),
+            "errors": stats.errors,
+            "rps": len(stats.latencies) / elapsed,
+            "p50": stats.percentile(0.50),
+            "p95": stats.percentile(0.95),
+            "p99": stats.percentile(0.99),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {"elapsed": elapsed, "requests": total, "rps": total / elapsed, "routes": routes}
+
+
+def print_report(summary: dict, queries: dict[str, float]):
+    print(f"\n{'route':<50} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db q/req':>9}")
+    for route, stats in summary["routes"].items():
+        db = f"{queries[route]:.1f}" if route in queries else "-"
+        print(f"{route:<50} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8.1f} {stats['p50']:>8.1f} "
+              f"{stats['p95']:>8.1f} {stats['p99']:>8.1f} {db:>9}")
+    print(f"\n{summary['requests']} requests in {summary['elapsed']:.1f}s: {summary['rps']:.1f} req/s")
+
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the change against a baseline; returns the routes whose p95 regressed beyond tolerance."""
+    regressions = []
+    print(f"\n{'vs baseline':<50} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9}")
+    for route, stats in summary["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None:
+            print(f"{route:<50} {'(new route)':>9}")
+            continue
+        changes = [
+            (stats[key] - before[key]) / before[key] if before[key] else 0.0
+            for key in ("p50", "p95", "p99", "rps")
+        ]
+        flag = ""
+        if changes[1] > tolerance:
+            regressions.append(route)
+            flag = "  REGRESSION"
+        print(f"{route:<50} " + " ".join(f"{change:>+9.0%}" for change in changes) + flag)
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(url: str, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"uvicorn didn't come up on {url}")
+            await asyncio.sleep(0.2)
+
+
+async def main(args):
+    await prepare_dataset(synthetic_data.SyntheticDataset(
+        students=args.students, progress_rows=args.progress, grades=args.grades, seed=args.seed,
+        password=args.password,
+    ))
+    fixtures = await load_fixtures(args.users, args.password)
+    if not fixtures.students:
+        raise SystemExit("The database has no synthetic students with chapters to load test")
+
+    server = None
+    if args.server == "uvicorn":
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=os.environ.copy(),
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        await _wait_until_up(base_url)
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from app.main import app
+        base_url = "http://load-test"
+        # Unhandled errors become 500s, counted as errors like they would be over HTTP
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    record = open(args.record, "w") if args.record else None
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+            await upload_images(client, fixtures, args.images, args.seed)
+
+            if args.replay:
+                with open(args.replay) as f:
+                    lines = [json.loads(line) for line in f if line.strip()]
+                unknown = {line["as"] for line in lines if line.get("as")} - fixtures.tokens.keys()
+                if unknown:
+                    raise SystemExit(f"{len(unknown)} recorded users aren't in this dataset (e.g. {min(unknown)}); "
+                                     "replay with the --students/--progress/--grades/--seed/--users of the recording")
+                print(f"replaying {len(lines)} requests with {args.concurrency} concurrent users")
+            else:
+                print(f"running mix {args.mix} with {args.concurrency} users for {args.duration:.0f}s "
+                      f"({len(fixtures.students)} students, {len(fixtures.images)} images)")
+                # Warm-up: first requests pay for imports, pools and caches
+                warmup = LoadRun(client, fixtures)
+                await run_mix(warmup, args.mix, args.concurrency, args.warmup, args.seed + 1)
+
+            run = LoadRun(client, fixtures, record)
+            if args.replay:
+                await replay(run, lines, args.concurrency, args.replay_speed)
+            else:
+                await run_mix(run, args.mix, args.concurrency, args.duration, args.seed)
+            summary = summarize(run, time.perf_counter() - run.started)
+            print_report(summary, await db_queries_per_request(client, fixtures))
+    finally:
+        if record is not None:
+            record.close()
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary["options"] = {
+        key: value for key, value in vars(args).items()
+        if key not in ("record", "replay", "baseline", "save_baseline")
+    }
+    summary["created"] = datetime.now().isoformat(timespec="seconds")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\np95 regressed by more than {args.tolerance:.0%} on: {', '.join(regressions)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mix", type=parse_mix, default="default",
+                        help=f"Preset ({', '.join(MIXES)}) or weights, e.g. lesson_open=5,image=1")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unmeasured load first")
+    parser.add_argument("--server", choices=("inproc", "uvicorn"), default="inproc")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--students", type=int, default=2000, help="Synthetic students to generate")
+    parser.add_argument("--progress", type=int, default=50000, help="Synthetic progress rows to generate")
+    parser.add_argument("--grades", type=int, default=12)
+    parser.add_argument("--users", type=int, default=200, help="Students the virtual users act as")
+    parser.add_argument("--images", type=int, default=20, help="Images uploaded for the image scenario")
+    parser.add_argument("--password", default=synthetic_data.SyntheticDataset.password)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--record", help="Write every measured request to this JSONL file")
+    parser.add_argument("--replay", help="Replay a recorded JSONL file instead of running the mix")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Pace of replay relative to the recording; 0 sends as fast as possible")
+    parser.add_argument("--save-baseline", help="Write this run's numbers to a JSON file")
+    parser.add_argument("--baseline", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth over the baseline")
+    args = parser.parse_args()
+
+    database.engine.echo = False
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    asyncio.run(main(args))
@@ -0,0 +1,108 @@
+"""
+Overhead of the request metrics (app/core/instrumentation.py): the same
+small FastAPI app is served with and without MetricsMiddleware and the
+database hooks, through an in-process ASGI transport, and the difference
+in time per request is reported.
+
+Routes: /ping does no work at all (the worst case for relative overhead),
+/query runs `--queries` small SELECTs through the app's engine on a
+throwaway SQLite database. Both variants are run in alternating rounds so
+drift in machine load hits them equally.
+
+Usage (from backend/):
+    python benchmarks/metrics_overhead.py --requests 5000 --queries 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+TMP = tempfile.mkdtemp(prefix="learnivo-metrics-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(TMP, 'metrics.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.core import database
+from app.core.instrumentation import REGISTRY, HTTP_LATENCY, MetricsMiddleware
+from app.core.query_budget import install_db_hooks, remove_db_hooks
+
+ROUNDS = 10
+
+
+def _build_app(queries: int, instrumented: bool):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/query/{item_id}")
+    async def query(item_id: int):
+        async with database.AsyncSessionLocal() as db:
+            for _ in range(queries):
+                await db.execute(text("SELECT :id"), {"id": item_id})
+        return {"ok": True}
+
+    return MetricsMiddleware(app) if instrumented else app
+
+
+async def _time_requests(app, path: str, requests: int) -> float:
+    """Seconds per request, sequential requests."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.get(path.format(i=i))
+            response.raise_for_status()
+        return (time.perf_counter() - started) / requests
+
+
+async def _compare(queries: int, requests: int):
+    plain = _build_app(queries, instrumented=False)
+    instrumented = _build_app(queries, instrumented=True)
+    per_round = max(requests // ROUNDS, 1)
+
+    print(f"{'route':<14} {'plain us':>9} {'metrics us':>11} {'overhead us':>12} {'overhead':>9}")
+    for label, path in (("/ping", "/ping"), (f"/query x{queries}", "/query/{i}")):
+        await _time_requests(plain, path, 50)  # warm up
+        plain_times, instrumented_times = [], []
+        for _ in range(ROUNDS):
+            remove_db_hooks(database.engine.sync_engine)
+            plain_times.append(await _time_requests(plain, path, per_round))
+            install_db_hooks(database.engine.sync_engine)
+            instrumented_times.append(await _time_requests(instrumented, path, per_round))
+        base = statistics.median(plain_times) * 1e6
+        with_metrics = statistics.median(instrumented_times) * 1e6
+        print(f"{label:<14} {base:>9.1f} {with_metrics:>11.1f} {with_metrics - base:>12.1f} "
+              f"{(with_metrics - base) / base:>9.1%}")
+
+
+def _primitives():
+    n = 200000
+    observe = timeit.timeit(lambda: HTTP_LATENCY.observe(0.012, "GET", "/bench"), number=n) / n
+    print(f"\nHistogram.observe: {observe * 1e9:.0f} ns")
+    started = time.perf_counter()
+    body = REGISTRY.render()
+    print(f"render /metrics: {(time.perf_counter() - started) * 1000:.2f} ms, "
+          f"{len(body.splitlines())} lines, {len(body)} bytes")
+
+
+def main(requests: int, queries: int):
+    database.engine.echo = False
+    asyncio.run(_compare(queries, requests))
+    _primitives()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=5)
+    args = parser.parse_args()
+    main(args.requests, args.queries)
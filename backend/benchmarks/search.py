@@ -0,0 +1,152 @@
+"""
+Latency of content search (GET /search, app/services/search_service.py) on
+a large curriculum.
+
+Builds a throwaway SQLite database with `alembic upgrade head`, writes
+`--lessons` chapters, each with a lesson whose words follow a Zipf
+distribution over a synthetic vocabulary (so some terms are in most
+lessons and most terms are rare, like real text), indexes them with
+`search_service.reindex_all` and times queries of increasing selectivity,
+with and without a grade filter.
+
+Usage (from backend/):
+    python benchmarks/search.py --lessons 100000 --repeat 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+TMP = tempfile.mkdtemp(prefix="learnivo-search-")
+DB_PATH = os.path.join(TMP, "search.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert
+
+from app.core import database
+from app.models.curriculum import Subject, Chapter, ContentBlock
+from app.services import search_service
+
+GRADES = 12
+SUBJECTS = ["Mathematics", "English", "Science", "Social Studies", "Computer Science"]
+VOCABULARY_SIZE = 30000
+LESSON_WORDS = 200
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "zu", "pe", "da", "fi", "go", "hu", "je", "bo"]
+
+
+def _vocabulary(rng: random.Random) -> list[str]:
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+async def _write_corpus(lessons: int, rng: random.Random) -> list[str]:
+    """Write the curriculum; returns the vocabulary, most frequent word first."""
+    vocabulary = _vocabulary(rng)
+    rng.shuffle(vocabulary)
+    # Zipf: the k-th most frequent word appears with probability ~ 1/k
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, len(vocabulary) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    subject_ids = {}
+    subject_rows = []
+    for grade in range(1, GRADES + 1):
+        for name in SUBJECTS:
+            subject_ids[(grade, name)] = uuid.uuid4()
+            subject_rows.append({"id": subject_ids[(grade, name)], "name": name, "grade_level": grade})
+
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(insert(Subject), subject_rows)
+        batch = 5000
+        for start in range(0, lessons, batch):
+            chapter_rows, block_rows = [], []
+            for i in range(start, min(start + batch, lessons)):
+                chapter_id = uuid.uuid4()
+                grade, subject = i % GRADES + 1, SUBJECTS[i // GRADES % len(SUBJECTS)]
+                title = " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=3)).capitalize()
+                words = rng.choices(vocabulary, cum_weights=cum_weights, k=LESSON_WORDS)
+                paragraphs = [" ".join(words[j:j + 40]) + "." for j in range(0, LESSON_WORDS, 40)]
+                chapter_rows.append({
+                    "id": chapter_id, "subject_id": subject_ids[(grade, subject)], "title": f"{title} {i}",
+                    "order_index": i, "description": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=12)),
+                })
+                block_rows.append({
+                    "id": uuid.uuid4(), "chapter_id": chapter_id, "block_type": "lesson",
+                    "content_data": {"markdown": f"# {title}\n\n" + "\n\n".join(paragraphs)},
+                })
+            await db.execute(insert(Chapter.__table__), chapter_rows)
+            await db.execute(insert(ContentBlock.__table__), block_rows)
+            await db.commit()
+    return vocabulary
+
+
+async def _time_query(query: str, grade, repeat: int) -> tuple[int, list[float]]:
+    timings = []
+    hits = 0
+    async with database.AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = await search_service.search(db, query, grade)
+            timings.append((time.perf_counter() - started) * 1000)
+            hits = len(results)
+    return hits, timings
+
+
+async def _run(lessons: int, repeat: int):
+    rng = random.Random(7)
+    started = time.perf_counter()
+    vocabulary = await _write_corpus(lessons, rng)
+    print(f"wrote {lessons} lessons in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    async with database.AsyncSessionLocal() as db:
+        indexed = await search_service.reindex_all(db)
+    seconds = time.perf_counter() - started
+    print(f"indexed {indexed} chapters in {seconds:.1f}s ({indexed / seconds:.0f} chapters/s), "
+          f"database {os.path.getsize(DB_PATH) / 1e6:.0f} MB\n")
+
+    queries = [
+        ("most common word", vocabulary[0]),
+        ("common word (#20)", vocabulary[19]),
+        ("mid word (#1000)", vocabulary[999]),
+        ("rare word (#20000)", vocabulary[19999]),
+        ("two common words", f"{vocabulary[1]} {vocabulary[4]}"),
+        ("common + mid word", f"{vocabulary[2]} {vocabulary[1500]}"),
+        ("prefix (3 letters)", vocabulary[9][:3]),
+        ("prefix (2 letters)", vocabulary[9][:2]),
+    ]
+    print(f"{'query':<22} {'grade':>5} {'results':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, query in queries:
+        for grade in (None, 4):
+            hits, timings = await _time_query(query, grade, repeat)
+            timings.sort()
+            print(f"{label:<22} {grade or '-':>5} {hits:>7} {statistics.median(timings):>8.2f} "
+                  f"{timings[int(len(timings) * 0.95) - 1]:>8.2f}")
+
+
+def main(lessons: int, repeat: int):
+    database.engine.echo = False
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+    asyncio.run(_run(lessons, repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lessons", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.lessons, args.repeat)
@@ -0,0 +1,101 @@
+"""
+Measure event-loop lag while a storm of uploads goes through ImageService.
+
+A ticker coroutine sleeps for a fixed interval and records how late it wakes
+up; any blocking work on the loop shows up directly as lag. Runs against a
+throwaway SQLite database and upload directory.
+
+Usage (from backend/):
+    python benchmarks/upload_loop_lag.py --uploads 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Point the app at a scratch database and upload dir before importing it
+_tmp = tempfile.mkdtemp(prefix="learnivo-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp}/bench.db")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_tmp, "uploads"))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image as PILImage
+from starlette.datastructures import Headers, UploadFile
+
+from app.core.database import engine, AsyncSessionLocal
+from app.models import Base
+from app.models.user import User
+from app.services.image_service import image_service
+
+TICK_SECONDS = 0.005
+
+
+def _make_jpeg(size: int) -> bytes:
+    """Build a noisy JPEG so the encoder can't compress it to nothing."""
+    img = PILImage.effect_noise((size, size), 64).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=95)
+    return buf.getvalue()
+
+
+async def _ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append((time.perf_counter() - start - TICK_SECONDS) * 1000)
+
+
+async def main(uploads: int, concurrency: int, size: int):
+    engine.echo = False
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as db:
+        user = User(email="bench@learnivo.local", hashed_password="x", full_name="Bench")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    payload = _make_jpeg(size)
+    print(f"payload: {len(payload)} bytes, {uploads} uploads, concurrency {concurrency}")
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def upload_one(i: int):
+        async with sem:
+            file = UploadFile(
+                file=io.BytesIO(payload),
+                filename=f"diagram-{i}.jpg",
+                headers=Headers({"content-type": "image/jpeg"})
+            )
+            async with AsyncSessionLocal() as db:
+                await image_service.save_uploaded_file(file, user_id, db)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop, lags))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(upload_one(i) for i in range(uploads)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    lags.sort()
+    print(f"uploads/s: {uploads / elapsed:.1f}")
+    print(f"loop lag ms: p50={statistics.median(lags):.2f} "
+          f"p99={lags[int(len(lags) * 0.99) - 1]:.2f} max={lags[-1]:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size", type=int, default=1600, help="Image edge in pixels")
+    args = parser.parse_args()
+    asyncio.run(main(args.uploads, args.concurrency, args.size))
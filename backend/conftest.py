@@ -0,0 +1,132 @@
+"""
+Shared pytest fixtures.
+
+Tests run against a throwaway SQLite database migrated to head, with AI
+calls going to MockProvider. `client` talks to the app in-process, `db` is
+a session for setting up rows, and `parent` / `other_parent` / `admin` are
+users with a profile and a bearer token (`parent.headers`, ...).
+
+Query budgets are strict under pytest: a request that issues more queries
+than its route's @query_budget (or SQL_QUERY_BUDGET), or repeats a
+statement like an N+1, fails the test with the statements listed instead
+of only logging a warning. Pin a block's count with assert_max_queries:
+
+    async def test_chapter_images(client, parent, chapter, assert_max_queries):
+        with assert_max_queries(3):
+            await client.get(f"/api/v1/learning/{chapter.id}/images", headers=parent.headers)
+"""
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+
+TMP = tempfile.mkdtemp(prefix="learnivo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(TMP, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(TMP, "uploads")
+os.environ["CONTENT_ZSTD_DICT_DIR"] = os.path.join(TMP, "content_dicts")
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["DATABASE_ECHO"] = "false"
+os.environ["IMAGE_PREGENERATE_WIDTHS"] = "[]"
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from app.core import query_budget
+from app.core.database import AsyncSessionLocal
+from app.core.security import create_access_token, get_password_hash
+from app.models.curriculum import Subject, Chapter
+from app.models.user import User, Profile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class Account:
+    user: User
+    profile: Profile
+    headers: dict
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    command.upgrade(Config(os.path.join(BACKEND_DIR, "alembic.ini")), "head")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets():
+    query_budget.set_strict(True)
+    yield
+    query_budget.set_strict(False)
+
+
+@pytest.fixture
+def assert_max_queries():
+    return query_budget.assert_max_queries
+
+
+@pytest.fixture
+def count_queries():
+    """track_queries(), with the engine hooks installed: `with count_queries() as stats: ...; stats.queries`."""
+    installed = query_budget.install_db_hooks(query_budget.app_engine.sync_engine)
+    yield query_budget.track_queries
+    if installed:
+        query_budget.remove_db_hooks(query_budget.app_engine.sync_engine)
+
+
+@pytest.fixture
+async def client():
+    from app.main import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def _account(db, is_admin: bool) -> Account:
+    user = User(
+        email=f"{uuid.uuid4().hex[:12]}@example.com", hashed_password=get_password_hash("password"),
+        full_name="Test User", is_admin=is_admin, role="admin" if is_admin else "parent",
+    )
+    db.add(user)
+    await db.flush()
+    profile = Profile(parent_id=user.id, display_name="Test Student", current_grade=4)
+    db.add(profile)
+    await db.commit()
+    return Account(user, profile, {"Authorization": f"Bearer {create_access_token(user.id)}"})
+
+
+@pytest.fixture
+async def parent(db) -> Account:
+    return await _account(db, is_admin=False)
+
+
+@pytest.fixture
+async def other_parent(db) -> Account:
+    return await _account(db, is_admin=False)
+
+
+@pytest.fixture
+async def admin(db) -> Account:
+    return await _account(db, is_admin=True)
+
+
+@pytest.fixture
+async def chapter(db) -> Chapter:
+    subject = Subject(name=f"Subject {uuid.uuid4().hex[:8]}", grade_level=4)
+    db.add(subject)
+    await db.flush()
+    chapter = Chapter(subject_id=subject.id, title="Fractions", order_index=0)
+    db.add(chapter)
+    await db.commit()
+    return chapter
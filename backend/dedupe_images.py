@@ -0,0 +1,121 @@
+"""
+Move existing uploads into content-addressed storage.
+
+Images uploaded before deduplication have content_hash NULL and their own
+uuid-named file. This hashes each of them, points the row at a shared
+<sha256><ext> blob and removes the now redundant copies. It works in
+batches, commits after each one and can be re-run safely.
+
+Run after `alembic upgrade head`:
+    python dedupe_images.py [--batch-size 200] [--dry-run]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, dialect_insert
+from app.models.image import Image, ImageBlob
+from app.services.image_processing import shard_relpath
+from app.services.image_service import image_service
+
+
+def _hash_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _link_blob(src: Path, dest: Path):
+    """Make `dest` hold the bytes of `src` without removing `src` yet."""
+    if dest.exists():
+        return
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+async def dedupe(batch_size: int, dry_run: bool):
+    stats = {"images": 0, "duplicates": 0, "missing": 0, "bytes_reclaimed": 0}
+    seen_hashes: set[str] = set()
+    last_id = None
+    storage = image_service.local_storage()
+
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(Image).where(Image.content_hash.is_(None)).order_by(Image.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(Image.id > last_id)
+            images = (await db.execute(query)).scalars().all()
+            if not images:
+                break
+            last_id = images[-1].id
+
+            redundant: list[Path] = []
+            for image in images:
+                src = storage.locate(image_service.storage_name(image))
+                if not src.is_file():
+                    stats["missing"] += 1
+                    print(f"Missing file for image {image.id}: {src}")
+                    continue
+
+                digest = await asyncio.to_thread(_hash_file, src)
+                existing = await db.get(ImageBlob, digest)
+                if existing is not None or digest in seen_hashes:
+                    stats["duplicates"] += 1
+                    stats["bytes_reclaimed"] += image.file_size
+                seen_hashes.add(digest)
+                blob_name = existing.filename if existing is not None else f"{digest}{src.suffix.lower()}"
+                dest = storage.path_for(blob_name)
+                stats["images"] += 1
+
+                if dry_run:
+                    continue
+
+                await asyncio.to_thread(_link_blob, src, dest)
+                stmt = dialect_insert(db, ImageBlob).values(
+                    content_hash=digest,
+                    filename=blob_name,
+                    file_size=image.file_size,
+                    ref_count=1
+                ).on_conflict_do_update(
+                    index_elements=[ImageBlob.content_hash],
+                    set_={"ref_count": ImageBlob.ref_count + 1}
+                )
+                await db.execute(stmt)
+                image.content_hash = digest
+                image.file_path = f"images/{shard_relpath(blob_name)}"
+                if src != dest:
+                    redundant.append(src)
+
+            if dry_run:
+                continue
+
+            await db.commit()
+
+        # Only drop the old copies once the rows no longer point at them
+        for path in redundant:
+            path.unlink(missing_ok=True)
+            image_service.derivatives.remove_for(path.name)
+
+    print(
+        f"{'Would migrate' if dry_run else 'Migrated'} {stats['images']} images: "
+        f"{stats['duplicates']} duplicates, {stats['bytes_reclaimed']} bytes reclaimed, "
+        f"{stats['missing']} missing files"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate uploaded images by content hash")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without touching anything")
+    args = parser.parse_args()
+    asyncio.run(dedupe(args.batch_size, args.dry_run))
@@ -0,0 +1,60 @@
+"""
+Fill a database with a large, realistic synthetic dataset for performance work.
+
+Creates parents, student profiles, a curriculum for every grade (subjects,
+chapters, lessons and quizzes), progress rows, activity days and earned
+badges, then rebuilds the dashboard statistics (see
+app/services/synthetic_data.py for the distributions). The same options
+and --seed always produce the same rows. Every parent, and the admin
+admin@synthetic.example.com, log in with --password.
+
+Point DATABASE_URL at a scratch database first, e.g.
+    DATABASE_URL=sqlite+aiosqlite:///./load.db alembic upgrade head
+    DATABASE_URL=sqlite+aiosqlite:///./load.db python generate_synthetic_data.py --students 100000 --progress 5000000
+
+Usage (from backend/):
+    python generate_synthetic_data.py [--students N] [--progress N] [--grades N]
+        [--subjects-per-grade N] [--chapters-per-subject N] [--days N] [--seed N] [--batch-size N]
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import asdict
+
+from app.core.database import AsyncSessionLocal, engine
+from app.services import synthetic_data
+
+
+async def run(options):
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        stats = await synthetic_data.generate(db, options)
+    seconds = time.perf_counter() - started
+    print(", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in asdict(stats).items()))
+    print(f"{seconds:.1f}s ({stats.progress_rows / seconds:.0f} progress rows/s)")
+
+
+if __name__ == "__main__":
+    defaults = synthetic_data.SyntheticDataset()
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset for load testing")
+    parser.add_argument("--students", type=int, default=defaults.students, help="Student profiles")
+    parser.add_argument("--progress", type=int, default=defaults.progress_rows,
+                        help="Target number of progress rows (capped at every student finishing their grade)")
+    parser.add_argument("--grades", type=int, default=defaults.grades)
+    parser.add_argument("--subjects-per-grade", type=int, default=defaults.subjects_per_grade)
+    parser.add_argument("--chapters-per-subject", type=int, default=defaults.chapters_per_subject)
+    parser.add_argument("--days", type=int, default=defaults.days, help="Spread sign-ups over this many days")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size, help="Progress rows per transaction")
+    parser.add_argument("--password", default=defaults.password, help="Password of every generated account")
+    args = parser.parse_args()
+
+    engine.echo = False
+    try:
+        asyncio.run(run(synthetic_data.SyntheticDataset(
+            students=args.students, progress_rows=args.progress, grades=args.grades,
+            subjects_per_grade=args.subjects_per_grade, chapters_per_subject=args.chapters_per_subject,
+            days=args.days, seed=args.seed, batch_size=args.batch_size, password=args.password,
+        )))
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
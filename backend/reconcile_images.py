@@ -0,0 +1,71 @@
+"""
+Reconcile the upload directory with the images table.
+
+Finds files no row references (failed uploads, deletes whose unlink
+failed) and rows whose file is gone, without loading either side into
+memory. Orphan files are reported, quarantined or deleted; missing files
+are reported with the affected image ids. Findings are appended to
+uploads/reconcile/report-<time>.jsonl and the run's stats are written to
+uploads/reconcile/last-run.json.
+
+Interrupted runs resume from their last checkpoint. Safe to run while the
+API is serving and suitable for cron, e.g. nightly:
+    python reconcile_images.py --action quarantine --purge-quarantine-days 30
+
+Usage (from backend/):
+    python reconcile_images.py [--action report|quarantine|delete] [--min-age-hours 1]
+                               [--batch-size 1000] [--purge-quarantine-days N] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+from dataclasses import asdict
+
+from app.services.image_reconciliation import ACTIONS, ImageReconciler
+
+
+async def reconcile(args):
+    reconciler = ImageReconciler(
+        action=args.action,
+        min_age=args.min_age_hours * 3600,
+        batch_size=args.batch_size,
+        purge_quarantine_after=(
+            args.purge_quarantine_days * 86400 if args.purge_quarantine_days is not None else None
+        )
+    )
+    stats = await reconciler.run()
+
+    if args.json:
+        print(json.dumps(asdict(stats)))
+        return
+
+    print(f"Scanned {stats.files_scanned} files ({stats.bytes_scanned} bytes) in {stats.seconds:.1f}s")
+    print(f"Orphan files: {stats.orphan_files} ({stats.orphan_bytes} bytes), "
+          f"{stats.young_files_skipped} too recent to judge")
+    if args.action == "quarantine":
+        print(f"Quarantined {stats.files_quarantined} files in {reconciler.quarantine_dir}")
+    elif args.action == "delete":
+        print(f"Deleted {stats.files_deleted} files, {stats.bytes_reclaimed} bytes reclaimed")
+    print(f"Missing files: {stats.missing_files} (used by {stats.images_missing_files} images)")
+    print(f"Stale temp files removed: {stats.tmp_files_removed}")
+    if args.purge_quarantine_days is not None:
+        print(f"Quarantined files purged: {stats.quarantine_files_purged}")
+    print(f"Report: {reconciler.report_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile stored image files with the database")
+    parser.add_argument("--action", choices=ACTIONS, default="report",
+                        help="What to do with files no row references (default: report only)")
+    parser.add_argument("--min-age-hours", type=float, default=1.0,
+                        help="Leave files younger than this alone; uploads write the file before the row")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--purge-quarantine-days", type=float, default=None,
+                        help="Also delete quarantined files older than this many days")
+    parser.add_argument("--json", action="store_true", help="Print the stats as one JSON object")
+    args = parser.parse_args()
+    app_logger = logging.getLogger("app")
+    app_logger.addHandler(logging.StreamHandler())
+    app_logger.setLevel(logging.INFO)
+    asyncio.run(reconcile(args))
@@ -0,0 +1,31 @@
+"""
+Recompute the admin dashboard statistics from the source tables.
+
+The API keeps stat_counters and daily_stats up to date as it writes; this
+corrects whatever drifted (rows changed outside the API, failed writes).
+Suitable for cron, e.g. nightly:
+    python rollup_stats.py --days 7
+
+Usage (from backend/):
+    python rollup_stats.py [--days N]
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal
+from app.services import stats_service
+
+
+async def run(days):
+    async with AsyncSessionLocal() as db:
+        await stats_service.rollup(db, days)
+        counters = await stats_service.get_counters(db)
+    print(", ".join(f"{name}: {value}" for name, value in counters.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute dashboard statistics")
+    parser.add_argument("--days", type=int, default=None,
+                        help="Only rebuild the daily series for the last N days (default: all history)")
+    args = parser.parse_args()
+    asyncio.run(run(args.days))
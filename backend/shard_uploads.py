@@ -0,0 +1,142 @@
+"""
+Move uploads from the flat images/ directory into the sharded ab/cd/ layout.
+
+Safe to run while the API is serving: ImageService reads from the sharded
+path first and falls back to the flat one, so every file is reachable
+before, during and after its move. Work happens in batches with an
+optional pause between them, and the run can be interrupted and restarted
+at any point; whatever is still flat is simply picked up next time.
+
+Progress is kept in images/.shard-migration.json. When nothing flat is
+left, images/.sharded is written and ImageService stops checking the old
+location (on its next restart).
+
+Usage (from backend/):
+    python shard_uploads.py [--batch-size 500] [--pause 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from sqlalchemy import select, update, not_
+
+from app.core.database import AsyncSessionLocal
+from app.models.image import Image
+from app.services.image_processing import shard_relpath
+from app.services.image_service import image_service
+from app.services.image_storage import SHARDED_LAYOUT_MARKER
+
+STATE_FILE = ".shard-migration.json"
+
+
+def _load_state(images_dir: Path) -> dict:
+    try:
+        return json.loads((images_dir / STATE_FILE).read_text())
+    except FileNotFoundError:
+        return {"files_moved": 0, "duplicates_removed": 0, "rows_updated": 0, "batches": 0}
+
+
+def _save_state(images_dir: Path, state: dict):
+    tmp = images_dir / f"{STATE_FILE}.tmp"
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, images_dir / STATE_FILE)
+
+
+def _next_flat_batch(images_dir: Path, batch_size: int) -> list[str]:
+    """Names of up to `batch_size` files still sitting directly in images/."""
+    names = []
+    with os.scandir(images_dir) as it:
+        for entry in it:
+            if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                continue
+            names.append(entry.name)
+            if len(names) >= batch_size:
+                break
+    return names
+
+
+def _move_batch(images_dir: Path, names: list[str], state: dict):
+    for name in names:
+        src = images_dir / name
+        dest = images_dir / shard_relpath(name)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            # Already moved by an earlier interrupted run; the flat copy is identical
+            src.unlink(missing_ok=True)
+            state["duplicates_removed"] += 1
+        else:
+            try:
+                os.replace(src, dest)
+            except FileNotFoundError:
+                # Deleted through the API since the directory was listed
+                continue
+            state["files_moved"] += 1
+
+
+def _clear_flat_derivatives(cache_dir: Path):
+    """Derivatives cached before sharding are unreachable now; they regenerate on demand."""
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                os.unlink(entry.path)
+
+
+async def _update_rows(batch_size: int, state: dict):
+    """Point file_path of every row still using a flat path at its sharded location."""
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Image.id, Image.file_path)
+                .where(not_(Image.file_path.like("images/%/%/%")))
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return
+            for image_id, file_path in rows:
+                name = Path(file_path).name
+                await db.execute(
+                    update(Image)
+                    .where(Image.id == image_id)
+                    .values(file_path=f"images/{shard_relpath(name)}")
+                )
+            await db.commit()
+            state["rows_updated"] += len(rows)
+
+
+async def migrate(batch_size: int, pause: float):
+    images_dir = image_service.local_storage().root
+    state = _load_state(images_dir)
+    started = time.perf_counter()
+
+    while True:
+        names = await asyncio.to_thread(_next_flat_batch, images_dir, batch_size)
+        if not names:
+            break
+        await asyncio.to_thread(_move_batch, images_dir, names, state)
+        state["batches"] += 1
+        await asyncio.to_thread(_save_state, images_dir, state)
+        print(f"batch {state['batches']}: {state['files_moved']} moved, "
+              f"{state['duplicates_removed']} duplicates removed")
+        if pause:
+            await asyncio.sleep(pause)
+
+    # Files are all in place, so rows can now safely point at the new paths
+    await _update_rows(batch_size, state)
+    await asyncio.to_thread(_clear_flat_derivatives, image_service.derivatives.cache_dir)
+    (images_dir / SHARDED_LAYOUT_MARKER).touch()
+    _save_state(images_dir, state)
+
+    print(f"Done in {time.perf_counter() - started:.1f}s: {state['files_moved']} files moved, "
+          f"{state['rows_updated']} rows updated. Restart the API to drop the flat-layout fallback.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate uploads to the sharded directory layout")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.pause))
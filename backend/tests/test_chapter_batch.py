@@ -0,0 +1,93 @@
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.models.curriculum import Chapter, Subject
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def chapters(db) -> list[Chapter]:
+    subject = Subject(name=f"Subject {uuid.uuid4().hex[:8]}", grade_level=4)
+    db.add(subject)
+    await db.flush()
+    chapters = [Chapter(subject_id=subject.id, title=title, order_index=index)
+                for index, title in enumerate(("Counting", "Adding", "Taking away"), start=1)]
+    db.add_all(chapters)
+    await db.commit()
+    return chapters
+
+
+def _url(chapters) -> str:
+    return f"/api/v1/admin/subjects/{chapters[0].subject_id}/chapters/order"
+
+
+async def test_reorder_only(client, admin, chapters):
+    order = [chapters[2], chapters[0], chapters[1]]
+    response = await client.put(_url(chapters), headers=admin.headers,
+                                json={"chapters": [{"id": str(chapter.id)} for chapter in order]})
+    assert response.status_code == 200
+    assert [chapter["title"] for chapter in response.json()] == ["Taking away", "Counting", "Adding"]
+
+
+async def test_swap_titles(client, admin, chapters):
+    response = await client.put(_url(chapters), headers=admin.headers, json={"chapters": [
+        {"id": str(chapters[0].id), "title": "Adding"},
+        {"id": str(chapters[1].id), "title": "Counting"},
+        {"id": str(chapters[2].id), "title": "Taking away"},
+    ]})
+    assert response.status_code == 200
+    assert [chapter["title"] for chapter in response.json()] == ["Adding", "Counting", "Taking away"]
+
+
+@pytest.fixture
+def bound_text():
+    """Every string parameter bound while the fixture is active."""
+    values = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        for params in (parameters if executemany else [parameters]):
+            values.extend(v for v in (params.values() if isinstance(params, dict) else params) if isinstance(v, str))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", collect)
+    yield values
+    event.remove(engine.sync_engine, "before_cursor_execute", collect)
+
+
+async def test_rotate_titles_without_nul_placeholders(client, admin, chapters, bound_text):
+    # Postgres rejects NUL bytes in text, so the swap placeholders must be printable
+    response = await client.put(_url(chapters), headers=admin.headers, json={"chapters": [
+        {"id": str(chapters[0].id), "title": "Adding"},
+        {"id": str(chapters[1].id), "title": "Taking away"},
+        {"id": str(chapters[2].id), "title": "Counting"},
+    ]})
+    assert response.status_code == 200
+    assert [chapter["title"] for chapter in response.json()] == ["Adding", "Taking away", "Counting"]
+    assert any(value.startswith("__swap__") for value in bound_text)
+    assert not any("\x00" in value for value in bound_text)
+
+
+async def test_changed_title_must_be_free(client, admin, chapters):
+    response = await client.put(_url(chapters), headers=admin.headers, json={"chapters": [
+        {"id": str(chapters[0].id), "title": "Adding"},
+        {"id": str(chapters[1].id)},
+        {"id": str(chapters[2].id)},
+    ]})
+    assert response.status_code == 400
+    assert "Adding" in response.json()["detail"]
+
+
+async def test_single_chapter_endpoints_check_titles(client, admin, chapters):
+    subject_id = chapters[0].subject_id
+    response = await client.post(f"/api/v1/admin/subjects/{subject_id}/chapters", headers=admin.headers,
+                                 json={"title": "Adding"})
+    assert response.status_code == 400
+    response = await client.put(f"/api/v1/admin/chapters/{chapters[0].id}", headers=admin.headers,
+                                json={"title": "Adding"})
+    assert response.status_code == 400
+    response = await client.put(f"/api/v1/admin/chapters/{chapters[0].id}", headers=admin.headers,
+                                json={"title": "Counting", "description": "Same title, new description"})
+    assert response.status_code == 200
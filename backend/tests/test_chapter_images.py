@@ -0,0 +1,59 @@
+import uuid
+
+import pytest
+
+from app.models.image import ChapterImage, Image
+
+pytestmark = pytest.mark.anyio
+
+IMAGES = 5
+
+
+@pytest.fixture
+async def chapter_images(db, admin, chapter):
+    """IMAGES images in the chapter, added in reverse display order."""
+    images = []
+    for order in reversed(range(IMAGES)):
+        name = f"{uuid.uuid4().hex}.png"
+        image = Image(
+            filename=name, original_filename=f"figure-{order}.png", file_path=name, file_size=100,
+            mime_type="image/png", width=640, height=480 + order, uploaded_by=admin.user.id,
+        )
+        db.add(image)
+        await db.flush()
+        db.add(ChapterImage(chapter_id=chapter.id, image_id=image.id, display_order=order, caption=f"Figure {order}"))
+        images.append(image)
+    await db.commit()
+    return images
+
+
+async def test_student_chapter_images_in_one_query(client, parent, chapter, chapter_images, assert_max_queries):
+    # Authentication plus one query, however many images the chapter has
+    with assert_max_queries(3):
+        response = await client.get(f"/api/v1/learning/{chapter.id}/images", headers=parent.headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == IMAGES
+    assert [image["caption"] for image in body["images"]] == [f"Figure {order}" for order in range(IMAGES)]
+    assert [image["height"] for image in body["images"]] == [480 + order for order in range(IMAGES)]
+
+
+async def test_admin_chapter_images_in_one_query(client, admin, chapter, chapter_images, assert_max_queries):
+    with assert_max_queries(3):
+        response = await client.get(f"/api/v1/admin/chapters/{chapter.id}/images", headers=admin.headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == IMAGES
+    assert [item["display_order"] for item in body["chapter_images"]] == list(range(IMAGES))
+    assert [item["image"]["original_filename"] for item in body["chapter_images"]] == [
+        f"figure-{order}.png" for order in range(IMAGES)
+    ]
+
+
+async def test_chapter_images_of_empty_and_missing_chapter(client, parent, chapter, assert_max_queries):
+    with assert_max_queries(3):
+        response = await client.get(f"/api/v1/learning/{chapter.id}/images", headers=parent.headers)
+    assert response.json()["total"] == 0
+
+    response = await client.get(f"/api/v1/learning/{uuid.uuid4()}/images", headers=parent.headers)
+    assert response.status_code == 404
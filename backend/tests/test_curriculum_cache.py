@@ -0,0 +1,30 @@
+"""bump_curriculum_version expires this worker's cached version when the bump commits."""
+import pytest
+from app.services.curriculum_cache import bump_curriculum_version, curriculum_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def expirations(monkeypatch):
+    calls = []
+    monkeypatch.setattr(curriculum_cache, "expire_version", lambda: calls.append(1))
+    return calls
+
+
+async def test_bumps_expire_once_per_commit(db, expirations):
+    for _ in range(3):
+        await bump_curriculum_version(db)
+    await db.commit()
+    assert expirations == [1]
+
+    # Nothing is left registered for the session's later transactions
+    await db.commit()
+    assert expirations == [1]
+
+
+async def test_rolled_back_bump_does_not_expire(db, expirations):
+    await bump_curriculum_version(db)
+    await db.rollback()
+    await db.commit()
+    assert expirations == []
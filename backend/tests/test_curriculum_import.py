@@ -0,0 +1,66 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.curriculum import Chapter, ContentBlock, Subject
+from app.services.curriculum_transfer import CurriculumImporter
+
+pytestmark = pytest.mark.anyio
+
+
+def _curriculum(subject: str, lesson: str) -> list[bytes]:
+    key = {"grade_level": 4, "subject": subject}
+    records = [
+        {"type": "meta", "format": "learnivo-curriculum", "version": 1},
+        {"type": "subject", "grade_level": 4, "name": subject, "description": "Imported"},
+        {"type": "chapter", **key, "title": "Fractions", "order_index": 1},
+        {"type": "chapter", **key, "title": "Decimals", "order_index": 2},
+        {"type": "content_block", **key, "chapter": "Fractions", "block_type": "lesson",
+         "content_data": {"markdown": lesson}},
+        {"type": "content_block", **key, "chapter": "Fractions", "block_type": "quiz",
+         "content_data": {"questions": [{"question": "1/2 + 1/2?", "options": ["1", "2"], "answer": "1"}]}},
+    ]
+    return [json.dumps(record).encode() for record in records]
+
+
+async def _lines(lines):
+    for line in lines:
+        yield line
+
+
+async def _counts(db, subject: str) -> tuple[int, int, int]:
+    subject_ids = select(Subject.id).where(Subject.name == subject).scalar_subquery()
+    chapter_ids = select(Chapter.id).where(Chapter.subject_id.in_(subject_ids)).scalar_subquery()
+    return (
+        (await db.execute(select(func.count()).where(Subject.name == subject))).scalar(),
+        (await db.execute(select(func.count()).where(Chapter.subject_id.in_(subject_ids)))).scalar(),
+        (await db.execute(select(func.count()).where(ContentBlock.chapter_id.in_(chapter_ids)))).scalar(),
+    )
+
+
+async def test_reimport_updates_in_place(db):
+    subject = f"Maths {uuid.uuid4().hex[:8]}"
+    first = await CurriculumImporter(db, batch_size=2).import_lines(_lines(_curriculum(subject, "v1")))
+    assert (first.created, first.skipped) == (5, 0)
+
+    # A separate importer knows none of the ids; the natural keys still match
+    second = await CurriculumImporter(db, batch_size=100).import_lines(_lines(_curriculum(subject, "v2")))
+    assert (second.created, second.skipped) == (0, 0)
+    assert await _counts(db, subject) == (1, 2, 2)
+
+    block = (await db.execute(
+        select(ContentBlock).join(Chapter).where(Chapter.title == "Fractions", ContentBlock.block_type == "lesson")
+        .join(Subject).where(Subject.name == subject)
+    )).scalar_one()
+    assert block.content_data == {"markdown": "v2"}
+    assert block.content_version == 2
+    assert block.content_size == len(json.dumps({"markdown": "v2"}))
+
+
+async def test_natural_keys_are_unique(db, chapter):
+    db.add(Chapter(subject_id=chapter.subject_id, title=chapter.title))
+    with pytest.raises(IntegrityError):
+        await db.commit()
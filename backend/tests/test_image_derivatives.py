@@ -0,0 +1,57 @@
+"""Rendering of resized derivatives."""
+import pytest
+from PIL import Image as PILImage
+
+from app.services.image_derivatives import render_derivative
+from app.services.image_processing import ORIENTATION_TAG
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA", "P"])
+def test_transparency_becomes_white_in_jpeg(tmp_path, mode):
+    source = tmp_path / "source.png"
+    img = PILImage.new("RGBA", (40, 20), (0, 0, 0, 0))
+    img.paste((200, 0, 0, 255), (0, 0, 20, 20))  # Opaque red left half, transparent right half
+    if mode == "LA":
+        img = img.convert("LA")
+    elif mode == "P":
+        img = img.convert("P")
+        img.info["transparency"] = img.getpixel((39, 0))
+    img.save(source, "PNG")
+
+    dest = tmp_path / "out.jpg"
+    render_derivative(str(source), str(dest), 20, "jpeg", 90)
+
+    with PILImage.open(dest) as out:
+        out = out.convert("RGB")
+        assert out.size == (20, 10)
+        assert all(channel > 240 for channel in out.getpixel((17, 5)))
+        assert sum(out.getpixel((2, 5))) < 400  # The opaque half keeps its colour
+
+
+def test_png_keeps_alpha(tmp_path):
+    source = tmp_path / "source.png"
+    PILImage.new("RGBA", (40, 20), (0, 0, 0, 0)).save(source, "PNG")
+    dest = tmp_path / "out.png"
+    render_derivative(str(source), str(dest), 20, "png", 90)
+    with PILImage.open(dest) as out:
+        assert out.mode == "RGBA"
+        assert out.getpixel((5, 5))[3] == 0
+
+
+def test_exif_orientation_is_applied(tmp_path):
+    # Stored 400x200, displayed rotated 90 degrees clockwise (orientation 6) as 200x400
+    source = tmp_path / "phone.jpg"
+    img = PILImage.new("RGB", (400, 200), "white")
+    img.paste((0, 0, 200), (0, 0, 200, 200))  # Blue left half, which ends up on top once rotated
+    exif = PILImage.Exif()
+    exif[ORIENTATION_TAG] = 6
+    img.save(source, "JPEG", exif=exif, quality=95)
+
+    for fmt, suffix in (("jpeg", ".jpg"), ("png", ".png")):
+        dest = tmp_path / f"out{suffix}"
+        render_derivative(str(source), str(dest), 100, fmt, 90)
+        with PILImage.open(dest) as out:
+            out = out.convert("RGB")
+            assert out.size == (100, 200)
+            assert out.getpixel((50, 40))[2] > 150 and out.getpixel((50, 40))[0] < 60  # Blue on top
+            assert min(out.getpixel((50, 160))) > 200  # White at the bottom
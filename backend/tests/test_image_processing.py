@@ -0,0 +1,84 @@
+"""Blocking image helpers."""
+import io
+
+import pytest
+from PIL import Image as PILImage
+
+from app.services.image_processing import ORIENTATION_TAG, optimize_image, probe_image
+
+
+def _png(size: tuple[int, int]) -> bytes:
+    buf = io.BytesIO()
+    PILImage.new("RGB", size, "white").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_probe_reads_type_and_size():
+    probe = probe_image(_png((30, 20)))
+    assert (probe.format, probe.mime_type, probe.extension, probe.width, probe.height) == (
+        "PNG", "image/png", ".png", 30, 20
+    )
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image", _png((4, 4))[:20]])
+def test_probe_rejects_non_images(data):
+    with pytest.raises(ValueError):
+        probe_image(data)
+
+
+def test_probe_rejects_decompression_bombs(monkeypatch):
+    # PIL refuses images over twice MAX_IMAGE_PIXELS as soon as the header is read
+    monkeypatch.setattr(PILImage, "MAX_IMAGE_PIXELS", 100)
+    with pytest.raises(ValueError):
+        probe_image(_png((30, 20)))
+
+
+GPS_IFD = 0x8825
+
+
+def test_optimize_strips_exif_even_when_not_smaller(tmp_path):
+    # A small, heavily compressed JPEG grows when re-encoded at the optimize quality
+    source = tmp_path / "photo.jpg"
+    exif = PILImage.Exif()
+    exif[0x010F] = "PhoneMaker"
+    exif.get_ifd(GPS_IFD)[2] = (48.0, 51.0, 24.0)  # GPSLatitude
+    PILImage.effect_noise((64, 64), 40).convert("RGB").save(source, "JPEG", quality=20, exif=exif)
+    dest = tmp_path / "out.jpg"
+
+    result = optimize_image(str(source), str(dest), 2048, 95)
+
+    assert result is not None
+    assert result.file_size > source.stat().st_size
+    with PILImage.open(dest) as out:
+        assert len(out.getexif()) == 0
+        assert "exif" not in out.info
+
+
+def test_optimize_keeps_plain_files_that_would_not_shrink(tmp_path):
+    source = tmp_path / "plain.png"
+    PILImage.new("RGB", (64, 64), "white").save(source, "PNG", optimize=True)
+    dest = tmp_path / "out.png"
+    assert optimize_image(str(source), str(dest), 2048, 85) is None
+    assert not dest.exists()
+
+
+def test_optimize_strips_png_text_chunks(tmp_path):
+    from PIL.PngImagePlugin import PngInfo
+
+    source = tmp_path / "text.png"
+    info = PngInfo()
+    info.add_text("Author", "Someone")
+    PILImage.new("RGB", (64, 64), "white").save(source, "PNG", optimize=True, pnginfo=info)
+    dest = tmp_path / "out.png"
+    assert optimize_image(str(source), str(dest), 2048, 85) is not None
+    with PILImage.open(dest) as out:
+        assert "Author" not in out.info
+
+
+def test_optimize_applies_orientation(tmp_path):
+    source = tmp_path / "rotated.jpg"
+    exif = PILImage.Exif()
+    exif[ORIENTATION_TAG] = 6
+    PILImage.new("RGB", (40, 20), "white").save(source, "JPEG", exif=exif)
+    result = optimize_image(str(source), str(tmp_path / "out.jpg"), 2048, 85)
+    assert (result.width, result.height) == (20, 40)
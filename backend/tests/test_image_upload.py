@@ -0,0 +1,196 @@
+"""Content-addressed image storage: blob references across uploads and deletes."""
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image as PILImage
+from sqlalchemy import select
+
+from app.models.image import ImageBlob
+from app.services.image_service import image_service
+
+pytestmark = pytest.mark.anyio
+
+
+def _png(color: str, size: tuple[int, int] = (32, 24)) -> bytes:
+    buf = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+async def _upload(client, admin, data: bytes, name: str = "photo.png") -> dict:
+    response = await client.post(
+        "/api/v1/images/upload", headers=admin.headers, files={"file": (name, data, "image/png")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _blob(db, content_hash: str):
+    db.expire_all()
+    return (await db.execute(select(ImageBlob).where(ImageBlob.content_hash == content_hash))).scalar_one_or_none()
+
+
+async def _content_hash(db, image_id: str) -> str:
+    image = await image_service.get_image_by_id(image_id, db)
+    return image.content_hash
+
+
+async def test_identical_uploads_share_one_blob(client, admin, db):
+    data = _png("red")
+    first = await _upload(client, admin, data)
+    second = await _upload(client, admin, data, name="copy.png")
+
+    content_hash = await _content_hash(db, first["id"])
+    assert await _content_hash(db, second["id"]) == content_hash
+    blob = await _blob(db, content_hash)
+    assert blob.ref_count == 2
+    assert await image_service.storage.size(blob.filename) == len(data)
+
+
+async def test_deleting_the_last_reference_removes_the_file(client, admin, db):
+    data = _png("green")
+    first = await _upload(client, admin, data)
+    second = await _upload(client, admin, data)
+    content_hash = await _content_hash(db, first["id"])
+    filename = (await _blob(db, content_hash)).filename
+
+    await client.delete(f"/api/v1/images/{first['id']}", headers=admin.headers)
+    assert (await _blob(db, content_hash)).ref_count == 1
+    assert await image_service.storage.size(filename) == len(data)
+
+    await client.delete(f"/api/v1/images/{second['id']}", headers=admin.headers)
+    assert await _blob(db, content_hash) is None
+    assert await image_service.storage.size(filename) is None
+
+    # Uploading the same bytes again creates the blob and writes its file anew
+    again = await _upload(client, admin, data)
+    assert (await _blob(db, content_hash)).ref_count == 1
+    assert await image_service.storage.size(filename) == len(data)
+    response = await client.get(f"/api/v1/images/{again['id']}/file", headers=admin.headers)
+    assert response.status_code == 200
+    assert response.content == data
+
+
+async def test_batch_takes_one_reference_per_file(client, admin, db):
+    stored = _png("blue")
+    existing = await _upload(client, admin, stored)
+    fresh = _png("yellow")
+
+    response = await client.post(
+        "/api/v1/images/upload/batch",
+        headers=admin.headers,
+        files=[
+            ("files", ("a.png", fresh, "image/png")),
+            ("files", ("b.png", fresh, "image/png")),
+            ("files", ("c.png", stored, "image/png")),
+        ],
+    )
+    assert response.status_code == 200, response.text
+    ids = [item["image"]["id"] for item in response.json()["results"]]
+
+    stored_blob = await _blob(db, await _content_hash(db, existing["id"]))
+    assert stored_blob.ref_count == 2
+    fresh_blob = await _blob(db, await _content_hash(db, ids[0]))
+    assert fresh_blob.ref_count == 2
+    assert await image_service.storage.size(fresh_blob.filename) == len(fresh)
+
+
+async def test_stored_bytes_are_not_optimized_again(client, admin, db, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "IMAGE_OPTIMIZE_UPLOADS", True)
+    monkeypatch.setattr(settings, "IMAGE_MAX_DIMENSION", 100)
+    data = _png("purple", size=(300, 200))
+    first = await _upload(client, admin, data)
+    assert (first["width"], first["height"]) == (100, 67)
+
+    # With other settings a fresh optimization would produce a different file than the stored one
+    monkeypatch.setattr(settings, "IMAGE_MAX_DIMENSION", 50)
+    optimized = []
+    original = image_service._optimize_upload
+
+    async def spy(staged):
+        optimized.append(staged.content_hash)
+        return await original(staged)
+
+    monkeypatch.setattr(image_service, "_optimize_upload", spy)
+    second = await _upload(client, admin, data)
+    response = await client.post(
+        "/api/v1/images/upload/batch", headers=admin.headers, files=[("files", ("c.png", data, "image/png"))]
+    )
+    third = response.json()["results"][0]["image"]
+
+    assert optimized == []
+    for image in (second, third):
+        assert (image["width"], image["height"], image["file_size"]) == (100, 67, first["file_size"])
+    blob = await _blob(db, await _content_hash(db, first["id"]))
+    assert await image_service.storage.size(blob.filename) == first["file_size"]
+
+
+async def test_decompression_bomb_is_rejected(client, admin, monkeypatch):
+    monkeypatch.setattr(PILImage, "MAX_IMAGE_PIXELS", 100)
+    response = await client.post(
+        "/api/v1/images/upload", headers=admin.headers, files={"file": ("bomb.png", _png("red"), "image/png")}
+    )
+    assert response.status_code == 400
+
+
+async def test_batch_reports_unexpected_staging_errors_per_file(client, admin, monkeypatch):
+    stage = image_service._stage_upload
+
+    async def flaky_stage(file):
+        if file.filename == "broken.png":
+            raise RuntimeError("disk on fire")
+        return await stage(file)
+
+    monkeypatch.setattr(image_service, "_stage_upload", flaky_stage)
+    response = await client.post(
+        "/api/v1/images/upload/batch",
+        headers=admin.headers,
+        files=[
+            ("files", ("good.png", _png("orange"), "image/png")),
+            ("files", ("broken.png", _png("pink"), "image/png")),
+        ],
+    )
+    assert response.status_code == 200, response.text
+    good, broken = response.json()["results"]
+    assert good["success"] and not broken["success"]
+    assert broken["error"] == "Failed to process file"
+    assert list(image_service.tmp_dir.iterdir()) == []
+
+
+async def test_batch_interrupted_while_staging_leaves_no_temp_files(admin, db, monkeypatch):
+    class Interrupted(BaseException):
+        pass
+
+    stage = image_service._stage_upload
+
+    async def interrupted_stage(file):
+        if file.filename == "last.png":
+            raise Interrupted()
+        return await stage(file)
+
+    monkeypatch.setattr(image_service, "_stage_upload", interrupted_stage)
+    files = [UploadFile(io.BytesIO(_png(color)), filename=name) for color, name in (("navy", "first.png"), ("teal", "last.png"))]
+    with pytest.raises(Interrupted):
+        await image_service.save_uploaded_files(files, admin.user.id, db)
+    assert list(image_service.tmp_dir.iterdir()) == []
+
+
+async def test_optimized_uploads_are_counted_in_metrics(client, admin, monkeypatch):
+    from app.core.config import settings
+    from app.core.instrumentation import IMAGE_UPLOADS_OPTIMIZED, IMAGE_UPLOAD_BYTES_SAVED
+
+    monkeypatch.setattr(settings, "IMAGE_OPTIMIZE_UPLOADS", True)
+    monkeypatch.setattr(settings, "IMAGE_MAX_DIMENSION", 64)
+    optimized, saved = IMAGE_UPLOADS_OPTIMIZED.value(), IMAGE_UPLOAD_BYTES_SAVED.value()
+    buf = io.BytesIO()
+    PILImage.effect_noise((400, 300), 60).convert("RGB").save(buf, "PNG")
+    image = await _upload(client, admin, buf.getvalue())
+
+    assert IMAGE_UPLOADS_OPTIMIZED.value() == optimized + 1
+    assert IMAGE_UPLOAD_BYTES_SAVED.value() == saved + len(buf.getvalue()) - image["file_size"]
+    response = await client.get("/metrics", headers=admin.headers)
+    assert "learnivo_image_uploads_optimized_total" in response.text
+    assert "learnivo_image_upload_bytes_saved_total" in response.text
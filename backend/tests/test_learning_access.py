@@ -0,0 +1,41 @@
+"""Profile-scoped learning endpoints only serve the profile's parent and admins."""
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_parent_reads_own_progress(client, parent, chapter):
+    response = await client.get(
+        f"/api/v1/learning/{chapter.id}/progress", params={"profile_id": str(parent.profile.id)}, headers=parent.headers
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "not_started"
+
+
+async def test_other_parents_profile_is_forbidden(client, parent, other_parent, chapter):
+    for path in ("progress", "quiz", "lesson"):
+        response = await client.get(
+            f"/api/v1/learning/{chapter.id}/{path}", params={"profile_id": str(other_parent.profile.id)}, headers=parent.headers
+        )
+        assert response.status_code == 403, path
+    response = await client.post(
+        f"/api/v1/learning/{chapter.id}/submit-quiz", params={"profile_id": str(other_parent.profile.id)},
+        json={}, headers=parent.headers
+    )
+    assert response.status_code == 403
+
+
+async def test_unknown_profile_is_not_found(client, parent, chapter):
+    response = await client.get(
+        f"/api/v1/learning/{chapter.id}/progress", params={"profile_id": str(uuid.uuid4())}, headers=parent.headers
+    )
+    assert response.status_code == 404
+
+
+async def test_admin_reads_any_progress(client, admin, parent, chapter):
+    response = await client.get(
+        f"/api/v1/learning/{chapter.id}/progress", params={"profile_id": str(parent.profile.id)}, headers=admin.headers
+    )
+    assert response.status_code == 200
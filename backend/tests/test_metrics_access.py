@@ -0,0 +1,23 @@
+"""GET /metrics is only served to the scrape job's token and to admins."""
+import pytest
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_needs_credentials(client, parent):
+    assert (await client.get("/metrics")).status_code == 401
+    assert (await client.get("/metrics", headers=parent.headers)).status_code == 403
+
+
+async def test_admin_reads_metrics(client, admin):
+    response = await client.get("/metrics", headers=admin.headers)
+    assert response.status_code == 200
+    assert "learnivo_http_requests_total" in response.text
+
+
+async def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})).status_code == 200
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core.query_budget import QueryBudgetExceeded, QueryStats, check_query_budget, statement_shape
+from app.models.curriculum import Chapter, Subject
+from app.models.gamification import Badge
+from app.models.progress import StudentProgress
+from app.services.seed_data import BADGES
+
+pytestmark = pytest.mark.anyio
+
+
+def test_statement_shape_collapses_parameter_lists():
+    assert statement_shape("SELECT * FROM t\n WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (…)"
+    assert statement_shape("INSERT INTO t (a, b) VALUES (:a, :b), (:a2, :b2)") == "INSERT INTO t (a, b) VALUES (…)"
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one():
+    stats = QueryStats()
+    for _ in range(10):
+        stats.record("SELECT * FROM images WHERE images.id = ?", 0.001)
+    with pytest.raises(QueryBudgetExceeded, match="same statement 10 times"):
+        check_query_budget("GET /chapters", None, stats)
+
+
+def test_budget_is_per_endpoint():
+    stats = QueryStats()
+    for table in ("users", "chapters", "images", "captions"):
+        stats.record(f"SELECT * FROM {table}", 0.001)
+
+    async def endpoint():
+        pass
+    endpoint.__query_budget__ = 3
+
+    with pytest.raises(QueryBudgetExceeded, match="issued 4 queries \\(budget 3\\)"):
+        check_query_budget("GET /chapters", endpoint, stats)
+
+
+async def _ensure_badges(db):
+    if not (await db.execute(select(func.count()).select_from(Badge))).scalar():
+        await db.execute(insert(Badge), BADGES)
+        await db.commit()
+
+
+async def test_check_and_award_badges_query_count(client, db, parent, assert_max_queries):
+    await _ensure_badges(db)
+    subject = Subject(name="Badges", grade_level=4)
+    db.add(subject)
+    await db.flush()
+    for index in range(3):
+        chapter = Chapter(subject_id=subject.id, title=f"Chapter {index}", order_index=index)
+        db.add(chapter)
+        await db.flush()
+        db.add(StudentProgress(profile_id=parent.profile.id, chapter_id=chapter.id, status="completed"))
+    parent.profile.xp = 150
+    await db.commit()
+    url = f"/api/v1/gamification/badges/check/{parent.profile.id}"
+
+    # Authentication, the qualifying-badges query and one insert for all of them
+    with assert_max_queries(3):
+        response = await client.post(url, headers=parent.headers)
+    assert response.status_code == 200
+    assert {badge["name"] for badge in response.json()["newly_earned"]} == {"First Steps", "Math Whiz"}
+
+    with assert_max_queries(2):
+        response = await client.post(url, headers=parent.headers)
+    assert response.json()["count"] == 0
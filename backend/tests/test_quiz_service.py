@@ -0,0 +1,150 @@
+"""Quiz normalization and scoring, and the frozen copy the quiz migration runs."""
+import importlib.util
+import os
+
+import pytest
+
+from app.services.quiz_service import answer_key, normalize_quiz, score
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "alembic", "versions", "c3e7a9d1f5b2_normalize_quizzes.py",
+)
+
+
+def _quiz(*questions) -> dict:
+    return {"questions": list(questions)}
+
+
+# (name, stored quiz, expected options of the first question, expected answer key)
+NORMALIZED = [
+    (
+        "list options, answer text",
+        _quiz({"question": "2 + 2?", "options": ["3", "4", "5"], "answer": "4"}),
+        {"A": "3", "B": "4", "C": "5"}, "B",
+    ),
+    (
+        "list options, answer index",
+        _quiz({"question": "2 + 2?", "options": ["3", "4", "5"], "answer": 2}),
+        {"A": "3", "B": "4", "C": "5"}, "C",
+    ),
+    (
+        "letter keys",
+        _quiz({"question": "Red?", "options": {"A": "red", "B": "blue"}, "correct_answer": "A"}),
+        {"A": "red", "B": "blue"}, "A",
+    ),
+    (
+        "lower-case letter keys and answer",
+        _quiz({"question": "Blue?", "options": {"a": "red", "b": "blue"}, "correct_answer": "b"}),
+        {"A": "red", "B": "blue"}, "B",
+    ),
+    (
+        "letter keys out of order",
+        _quiz({"question": "Blue?", "options": {"B": "blue", "A": "red"}, "correct_answer": "B"}),
+        {"A": "red", "B": "blue"}, "B",
+    ),
+    (
+        "answer given as 'C) text'",
+        _quiz({"question": "5?", "options": {"A": "3", "B": "4", "C": "5"}, "correct_answer": "C) 5"}),
+        {"A": "3", "B": "4", "C": "5"}, "C",
+    ),
+    (
+        "numeric keys, answer key",
+        _quiz({"question": "Even?", "options": {"1": "three", "2": "four"}, "correct_answer": "2"}),
+        {"A": "three", "B": "four"}, "B",
+    ),
+    (
+        "numeric keys, answer text",
+        _quiz({"question": "Odd?", "options": {"1": "three", "2": "four"}, "answer": "three"}),
+        {"A": "three", "B": "four"}, "A",
+    ),
+    (
+        "several questions",
+        _quiz(
+            {"question": "One?", "options": ["x", "y"], "answer": "y"},
+            {"question": "Two?", "options": {"a": "x", "b": "y"}, "correct_answer": "a"},
+        ),
+        {"A": "x", "B": "y"}, "BA",
+    ),
+]
+
+MALFORMED = [
+    ("not an object", ["questions"]),
+    ("no question list", {"questions": "What?"}),
+    ("no questions", {"questions": []}),
+    ("question not an object", _quiz("2 + 2?")),
+    ("no question text", _quiz({"question": " ", "options": ["3", "4"], "answer": "4"})),
+    ("one option", _quiz({"question": "2 + 2?", "options": ["4"], "answer": "4"})),
+    ("options not a list or object", _quiz({"question": "2 + 2?", "options": "3, 4", "answer": "4"})),
+    ("answer not an option", _quiz({"question": "2 + 2?", "options": ["3", "4"], "answer": "5"})),
+    ("answer index out of range", _quiz({"question": "2 + 2?", "options": ["3", "4"], "answer": 2})),
+    ("no answer", _quiz({"question": "2 + 2?", "options": ["3", "4"]})),
+    ("too many options", _quiz({"question": "Pick", "options": [str(i) for i in range(27)], "answer": "1"})),
+]
+
+
+def _load_migration():
+    spec = importlib.util.spec_from_file_location("normalize_quizzes_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def migration():
+    return _load_migration()
+
+
+@pytest.mark.parametrize("name, quiz, options, key", NORMALIZED, ids=[case[0] for case in NORMALIZED])
+def test_normalize(name, quiz, options, key):
+    normalized = normalize_quiz(quiz)
+    assert normalized["questions"][0]["options"] == options
+    assert normalized["answer_key"] == key
+    assert [q["correct_answer"] for q in normalized["questions"]] == list(key)
+
+
+@pytest.mark.parametrize("name, quiz, options, key", NORMALIZED, ids=[case[0] for case in NORMALIZED])
+def test_normalize_is_idempotent(name, quiz, options, key):
+    normalized = normalize_quiz(quiz)
+    assert normalize_quiz(normalized) == normalized
+
+
+def test_explanation_is_kept():
+    quiz = _quiz({"question": "2 + 2?", "options": ["3", "4"], "answer": "4", "explanation": "Count on."})
+    assert normalize_quiz(quiz)["questions"][0]["explanation"] == "Count on."
+
+
+@pytest.mark.parametrize("name, quiz", MALFORMED, ids=[case[0] for case in MALFORMED])
+def test_malformed(name, quiz):
+    with pytest.raises(ValueError):
+        normalize_quiz(quiz)
+
+
+@pytest.mark.parametrize("name, quiz, options, key", NORMALIZED, ids=[case[0] for case in NORMALIZED])
+def test_migration_matches_normalize_quiz(migration, name, quiz, options, key):
+    assert migration._normalize_quiz(quiz) == normalize_quiz(quiz)
+
+
+@pytest.mark.parametrize("name, quiz", MALFORMED, ids=[case[0] for case in MALFORMED])
+def test_migration_rejects_malformed(migration, name, quiz):
+    with pytest.raises(ValueError):
+        migration._normalize_quiz(quiz)
+
+
+@pytest.mark.parametrize("answers, expected", [
+    ({0: "B", 1: "A", 2: "C"}, 3),
+    ({0: "b", 1: " a ", 2: "c"}, 3),  # Lower case and stray whitespace still count
+    ({0: "B"}, 1),  # Missing answers score nothing
+    ({}, 0),
+    ({0: "B", 1: None, 2: ""}, 1),
+    ({0: "BA", 1: "A", 2: "-"}, 1),  # Neither several letters nor the placeholder match
+    ({0: "B", 1: "A", 2: "C", 3: "D"}, 3),  # Answers beyond the quiz are ignored
+])
+def test_score(answers, expected):
+    assert score("BAC", answers) == expected
+
+
+def test_answer_key_of_rows_stored_before_normalization():
+    legacy = _quiz({"question": "2 + 2?", "options": ["3", "4"], "answer": "4"})
+    assert answer_key(legacy) == "B"
+    assert answer_key({**normalize_quiz(legacy), "answer_key": "B"}) == "B"
@@ -0,0 +1,34 @@
+"""record_activity's per-worker memo of profiles already counted as active."""
+import pytest
+from sqlalchemy import select
+
+from app.models.stats import ProfileActivityDay
+from app.services import stats_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def _activity_rows(db, profile_id) -> int:
+    result = await db.execute(select(ProfileActivityDay).where(ProfileActivityDay.profile_id == profile_id))
+    return len(result.all())
+
+
+async def test_rolled_back_activity_is_recorded_again(db, parent):
+    profile_id = parent.profile.id
+    assert await stats_service.record_activity(db, profile_id)
+    await db.rollback()
+    assert await _activity_rows(db, profile_id) == 0
+
+    assert await stats_service.record_activity(db, profile_id)
+    await db.commit()
+    assert await _activity_rows(db, profile_id) == 1
+
+
+async def test_committed_activity_is_skipped(db, parent):
+    profile_id = parent.profile.id
+    assert await stats_service.record_activity(db, profile_id)
+    # Already recorded in this transaction
+    assert not await stats_service.record_activity(db, profile_id)
+    await db.commit()
+
+    assert not await stats_service.record_activity(db, profile_id)
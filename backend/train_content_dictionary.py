@@ -0,0 +1,103 @@
+"""
+Train a zstd dictionary on the stored content blocks.
+
+Lessons and quizzes are small JSON documents that repeat the same keys,
+markdown structure and phrasing, which plain compression can't exploit
+within a single block. A dictionary trained on a sample of them lets
+CONTENT_COMPRESSION=zstd compress each block against what they share.
+
+The dictionary is written to CONTENT_ZSTD_DICT_DIR as <dict id>.zdict.
+Deploy that file with every worker, then set CONTENT_COMPRESSION=zstd and
+CONTENT_ZSTD_DICT_ID to the printed id. Keep old dictionary files around
+for as long as rows compressed with them exist; --recompress rewrites
+every row with the new dictionary so older ones can be retired.
+
+Needs the zstandard package.
+
+Usage (from backend/):
+    python train_content_dictionary.py [--samples N] [--size BYTES] [--recompress] [--batch-size N]
+"""
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import select, update, func
+
+from app.core import compression
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.curriculum import ContentBlock
+
+
+async def _sample(db, samples: int) -> list[bytes]:
+    result = await db.execute(
+        select(ContentBlock.content_data).order_by(func.random()).limit(samples)
+    )
+    return [
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+        for data in result.scalars()
+    ]
+
+
+async def _recompress(db, batch_size: int) -> int:
+    """Rewrite every row with the current compression settings, keyset-paginated by id."""
+    last_id, rewritten = None, 0
+    while True:
+        query = select(ContentBlock.id, ContentBlock.content_data).order_by(ContentBlock.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(ContentBlock.id > last_id)
+        rows = (await db.execute(query)).all()
+        if not rows:
+            return rewritten
+        for block_id, data in rows:
+            await db.execute(update(ContentBlock).where(ContentBlock.id == block_id).values(content_data=data))
+        await db.commit()
+        rewritten += len(rows)
+        last_id = rows[-1][0]
+        print(f"  {rewritten} rows rewritten")
+
+
+async def run(samples: int, size: int, recompress: bool, batch_size: int):
+    zstandard = compression.require_zstandard()
+    engine.echo = False
+
+    async with AsyncSessionLocal() as db:
+        documents = await _sample(db, samples)
+        if len(documents) < 10:
+            print(f"Only {len(documents)} content blocks stored; generate more content before training")
+            return
+
+        dictionary = zstandard.train_dictionary(size, documents)
+        dict_id = dictionary.dict_id()
+        path = compression.dictionary_path(dict_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(dictionary.as_bytes())
+
+        raw = sum(len(d) for d in documents)
+        plain = sum(len(zstandard.ZstdCompressor().compress(d)) for d in documents)
+        with_dict = sum(len(zstandard.ZstdCompressor(dict_data=dictionary).compress(d)) for d in documents)
+        print(f"Trained on {len(documents)} blocks ({raw} bytes): "
+              f"zstd {plain} bytes, zstd + dictionary {with_dict} bytes")
+        print(f"Wrote {path}")
+
+        if recompress:
+            settings.CONTENT_COMPRESSION = "zstd"
+            settings.CONTENT_ZSTD_DICT_ID = dict_id
+            print("Recompressing stored content blocks...")
+            await _recompress(db, batch_size)
+
+    print(f"Set CONTENT_COMPRESSION=zstd and CONTENT_ZSTD_DICT_ID={dict_id} on every worker")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary for content block compression")
+    parser.add_argument("--samples", type=int, default=5000,
+                        help="Content blocks to train on, picked at random (default: 5000)")
+    parser.add_argument("--size", type=int, default=64 * 1024,
+                        help="Dictionary size in bytes (default: 64KB)")
+    parser.add_argument("--recompress", action="store_true",
+                        help="Rewrite every stored block with the new dictionary")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="Rows rewritten per transaction with --recompress (default: 500)")
+    args = parser.parse_args()
+    asyncio.run(run(args.samples, args.size, args.recompress, args.batch_size))
@@ -0,0 +1,83 @@
+"""
+Export a curriculum to JSONL, or import one, straight against the database.
+
+Same format and behaviour as GET /admin/curriculum/export and
+POST /admin/curriculum/import (see app/services/curriculum_transfer.py),
+without going through the API; use it to load large syllabi or to move a
+curriculum between environments:
+
+    python transfer_curriculum.py export --grade 4 -o grade4.jsonl
+    python transfer_curriculum.py import grade4.jsonl --batch-size 2000
+
+Imports upsert by natural key, so they can be re-run safely.
+
+Usage (from backend/):
+    python transfer_curriculum.py export [--grade N] [-o FILE]
+    python transfer_curriculum.py import FILE [--batch-size N]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.services import curriculum_transfer
+
+# Bytes read from the import file at a time
+READ_SIZE = 1024 * 1024
+
+
+async def export(grade, output):
+    out = open(output, "wb") if output else sys.stdout.buffer
+    lines = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            async for line in curriculum_transfer.export_curriculum(db, grade):
+                out.write(line)
+                lines += 1
+    finally:
+        if output:
+            out.close()
+    print(f"Exported {lines} lines", file=sys.stderr)
+
+
+async def _read_chunks(path):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            yield chunk
+
+
+async def run_import(path, batch_size):
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        importer = curriculum_transfer.CurriculumImporter(db, batch_size)
+        stats = await importer.import_lines(curriculum_transfer.iter_lines(_read_chunks(path)))
+    seconds = time.perf_counter() - started
+
+    print(f"{stats.lines} lines in {seconds:.1f}s ({stats.lines / seconds:.0f} lines/s), {stats.batches} batches")
+    print(f"subjects: {stats.subjects}, chapters: {stats.chapters}, content blocks: {stats.content_blocks}, "
+          f"chapter images: {stats.chapter_images}, created: {stats.created}, skipped: {stats.skipped}")
+    for error in stats.errors:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import a curriculum as JSONL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write the curriculum as JSONL")
+    export_parser.add_argument("--grade", type=int, default=None, help="Only this grade (default: all)")
+    export_parser.add_argument("-o", "--output", default=None, help="Output file (default: stdout)")
+
+    import_parser = commands.add_parser("import", help="Upsert a JSONL curriculum")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--batch-size", type=int, default=settings.CURRICULUM_IMPORT_BATCH_SIZE,
+                               help=f"Lines written per transaction (default: {settings.CURRICULUM_IMPORT_BATCH_SIZE})")
+
+    args = parser.parse_args()
+    engine.echo = False
+    if args.command == "export":
+        asyncio.run(export(args.grade, args.output))
+    else:
+        asyncio.run(run_import(args.file, args.batch_size))
@@ -14,6 +14,13 @@ export function addImageToChapter(chapterId, imageId, caption = '') {
     });
 }
 
+/** Add several existing images to a chapter in one request.
+ * @param {Array<{image_id: string, caption?: string}>} images - In display order.
+ */
+export function addImagesToChapter(chapterId, images) {
+    return api.post(`/admin/chapters/${chapterId}/images/bulk`, { images });
+}
+
 /** Remove an image from a chapter */
 export function removeImageFromChapter(chapterId, imageId) {
     return api.delete(`/admin/chapters/${chapterId}/images/${imageId}`);
@@ -25,3 +32,12 @@ export function updateImageOrder(chapterId, imageId, newOrder) {
         order_index: newOrder,
     });
 }
+
+/** Set the order of all images in a chapter at once.
+ * @param {string[]} imageIds - Every image id of the chapter, in the new order.
+ */
+export function reorderChapterImages(chapterId, imageIds) {
+    return api.put(`/admin/chapters/${chapterId}/images/order`, {
+        images: imageIds.map((imageId) => ({ image_id: imageId })),
+    });
+}
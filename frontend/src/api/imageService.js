@@ -57,8 +57,15 @@ export function deleteImage(imageId) {
     return api.delete(`/images/${imageId}`);
 }
 
-/** Get the public URL for an image file */
-export function getImageUrl(imageId) {
+/** Get the public URL for an image file.
+ * Pass `width` (and optionally `format`, e.g. 'webp') to get a resized
+ * variant instead of the full-size original.
+ */
+export function getImageUrl(imageId, { width, format } = {}) {
     // Backend serves the file at /images/{id}/file
-    return `${api.defaults.baseURL}/images/${imageId}/file`;
+    const params = new URLSearchParams();
+    if (width) params.set('w', width);
+    if (format) params.set('format', format);
+    const query = params.toString();
+    return `${api.defaults.baseURL}/images/${imageId}/file${query ? `?${query}` : ''}`;
 }
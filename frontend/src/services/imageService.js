@@ -38,14 +38,17 @@ export function uploadImages(files, onUploadProgress) {
     });
 }
 
-/** Fetch a paginated list of images.
- * @param {number} page - Page number (starting at 1).
+/** Fetch a page of images, newest first.
+ * @param {string|null} cursor - `next_cursor` of the previous page, or null for the first page.
  * @param {number} pageSize - Items per page.
  * @param {string} search - Optional search term (filename).
  */
-export function listImages({ page = 1, pageSize = 20, search = '' } = {}) {
+export function listImages({ cursor = null, pageSize = 20, search = '' } = {}) {
+    const params = { page_size: pageSize };
+    if (cursor) params.cursor = cursor;
+    if (search) params.search = search;
     return axios.get(`${API_BASE}/api/v1/images`, {
-        params: { page, page_size: pageSize, search },
+        params,
         headers: authHeaders(),
     });
 }
@@ -61,10 +64,15 @@ export function deleteImage(imageId) {
 
 /** Get the public URL for an image file.
  * @param {string} imageId
+ * @param {{width?: number, format?: string}} [options] Request a resized variant
  */
-export function getImageFileUrl(imageId) {
+export function getImageFileUrl(imageId, { width, format } = {}) {
     // Public endpoint does not need auth.
-    return `${API_BASE}/api/v1/images/${imageId}/file`;
+    const params = new URLSearchParams();
+    if (width) params.set('w', width);
+    if (format) params.set('format', format);
+    const query = params.toString();
+    return `${API_BASE}/api/v1/images/${imageId}/file${query ? `?${query}` : ''}`;
 }
 
 /** Fetch image metadata (size, dimensions, etc.) */